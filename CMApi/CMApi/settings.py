@@ -93,6 +93,27 @@ DATABASES = {
 
 }
 
+# Tenant shards: extra databases holding whole developer workspaces.
+# SHARD_DATABASE_URLS="shard_a=sqlite:///shard_a.sqlite3,shard_b=postgres://..."
+# Run `python manage.py migrate --database <alias>` for each shard and move
+# developers with `python manage.py move_tenant <developer> <alias>`.
+for _shard in filter(None, (s.strip() for s in os.getenv('SHARD_DATABASE_URLS', '').split(','))):
+    _alias, _url = _shard.split('=', 1)
+    DATABASES[_alias.strip()] = dj_database_url.parse(_url.strip(), conn_max_age=600)
+
+TENANT_SHARDS = list(DATABASES)
+# where developers without a directory entry live
+TENANT_DEFAULT_SHARD = os.getenv('TENANT_DEFAULT_SHARD', 'default')
+
+DATABASE_ROUTERS = ['accounts.sharding.TenantShardRouter']
+
+# Leaderboard and analytics versions live in the cache: with several workers
+# set CACHE_URL (e.g. redis://localhost:6379/1) so they share one. Without it
+# each process has its own LocMemCache.
+if os.getenv('CACHE_URL'):
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+                          'LOCATION': os.getenv('CACHE_URL')}}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -132,13 +153,19 @@ STATIC_URL = 'static/'
 
 STATIC_ROOT = BASE_DIR / 'static'
 
+STORAGES = {
+    # uploads are stored once per content digest and reference-counted (mainapp/storage.py)
+    "default": {"BACKEND": "mainapp.storage.ContentAddressedStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
 if not DEBUG:
     # Tell Django to copy static assets into a path called `staticfiles` (this is specific to Render)
     STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
     # Enable the WhiteNoise storage backend, which compresses static files to reduce disk use
     # and renames the files with unique names for each version to support long-term caching
-    STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+    STORAGES["staticfiles"]["BACKEND"] = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -162,4 +189,40 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         "rest_framework.permissions.IsAuthenticated",
     ],
-}
\ No newline at end of file
+}
+
+# /api/changes/ holds back log entries younger than this so late-committing
+# transactions cannot land behind a client's cursor
+CHANGE_FEED_SETTLE_SECONDS = 2
+
+# /api/events/ fans out in-process by default; with several ASGI workers run
+# `python manage.py run_event_broker` and point every worker at it
+EVENTS_BROKER_URL = os.getenv("EVENTS_BROKER_URL") or None
+
+# /api/batch/: sub-requests per call, and threads for "parallel": true GETs
+BATCH_MAX_REQUESTS = 25
+BATCH_MAX_WORKERS = 4
+
+# /api/courses/{id}/completion/ results; writes invalidate them sooner
+ANALYTICS_CACHE_SECONDS = 300
+
+# leaderboard version keys expire, so a worker that missed a bump (no shared
+# cache) reloads its in-memory boards after at most this long
+LEADERBOARD_VERSION_SECONDS = 60
+
+# /api/uploads/: resumable course-material uploads
+UPLOAD_MAX_BYTES = 10 * 1024 ** 3
+UPLOAD_CHUNK_MAX_BYTES = 64 * 1024 ** 2
+# how long one PATCH may take before another one can take over its offset
+UPLOAD_CHUNK_LEASE_SECONDS = 600
+# idle sessions are removed by `python manage.py purge_uploads`
+UPLOAD_SESSION_TTL_HOURS = 24
+
+# /download/ endpoints: None serves files from Django (FileResponse / 206 ranges);
+# "x-accel-redirect" (nginx) or "x-sendfile" (Apache) hands the transfer to the web server
+DOWNLOAD_OFFLOAD = os.getenv("DOWNLOAD_OFFLOAD") or None
+# nginx: location /protected-media/ { internal; alias <MEDIA_ROOT>/; }
+DOWNLOAD_ACCEL_PREFIX = "/protected-media/"
+
+# bulk user import: processes hashing passwords (unset: one per CPU)
+BULK_IMPORT_HASH_WORKERS = int(os.getenv("BULK_IMPORT_HASH_WORKERS", "0")) or None
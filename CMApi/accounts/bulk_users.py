@@ -0,0 +1,264 @@
+# accounts/bulk_users.py
+"""
+Bulk user import (CSV or NDJSON) for onboarding a whole school at once.
+
+Each row is username, email, password, first_name, last_name, role, the same
+fields as POST /api/accounts/register/. Rows are checked one by one; a bad or
+duplicate row is reported with its line number and skipped, the rest go in.
+Valid rows are inserted per batch: passwords are hashed in a process pool
+(accounts/hashing.py), then users, group memberships and the Teacher /
+Student / Guest profiles are written with bulk_create in one transaction.
+
+``change_roles`` is the bulk form of ChangeUserRoleView: a fixed number of
+queries for any number of (username, role) pairs.
+"""
+import codecs
+import csv
+import json
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.validators import validate_email
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, router, transaction
+from rest_framework.exceptions import ValidationError
+
+from mainapp.models import Guest, Student, Teacher
+from .hashing import hash_passwords, hash_pool
+from .sharding import mirror_users
+
+User = get_user_model()
+
+COLUMNS = ("username", "email", "password", "first_name", "last_name", "role")
+ROLES = dict(User.ROLE_CHOICES)
+NAME_MAX_LENGTH = 150
+
+
+def decode(byte_lines):
+    """Text lines from an iterable of bytes lines (a file or request body); drops a UTF-8 BOM."""
+    return codecs.iterdecode(byte_lines, "utf-8-sig")
+
+
+def parse_csv(lines):
+    """(line number, record) pairs from CSV text lines with a header row."""
+    reader = csv.DictReader(lines)
+    if not reader.fieldnames or "username" not in reader.fieldnames or "role" not in reader.fieldnames:
+        raise ValidationError({"detail": f"The CSV header must name the columns ({', '.join(COLUMNS)})."})
+    for record in reader:
+        yield reader.line_num, record
+
+
+def parse_ndjson(lines):
+    """(line number, record) pairs from NDJSON lines; a line that is not JSON gives a None record."""
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError:
+            yield number, None
+
+
+PARSERS = {"csv": parse_csv, "ndjson": parse_ndjson}
+
+
+def _clean(record):
+    """(values, errors) for one input record."""
+    if not isinstance(record, dict):
+        return None, {"row": "Not a JSON object."}
+    values = {name: str(record.get(name) or "").strip() for name in COLUMNS if name != "password"}
+    values["password"] = str(record.get("password") or "")
+    values["role"] = values["role"].lower()
+    errors = {}
+    if not values["username"]:
+        errors["username"] = "This field is required."
+    else:
+        try:
+            User.username_validator(values["username"])
+        except DjangoValidationError as error:
+            errors["username"] = error.messages[0]
+        if len(values["username"]) > NAME_MAX_LENGTH:
+            errors["username"] = f"At most {NAME_MAX_LENGTH} characters."
+    if values["role"] not in ROLES:
+        errors["role"] = f"Must be one of: {', '.join(ROLES)}."
+    if values["email"]:
+        try:
+            validate_email(values["email"])
+        except DjangoValidationError:
+            errors["email"] = "Enter a valid email address."
+    for name in ("first_name", "last_name"):
+        if len(values[name]) > NAME_MAX_LENGTH:
+            errors[name] = f"At most {NAME_MAX_LENGTH} characters."
+    return values, errors
+
+
+def _profile(role, user, developer):
+    # same defaults as RegisterSerializer
+    if role == "teacher":
+        return Teacher(user=user, developer=developer, specialization="Not set", experience=0)
+    if role == "student":
+        return Student(user=user, developer=developer, age=0)
+    if role == "guest":
+        return Guest(user=user, developer=developer)
+    return None
+
+
+class _Import:
+    def __init__(self, developer, pool):
+        self.developer = developer
+        self.pool = pool
+        self.groups = {role: Group.objects.get_or_create(name=role.capitalize())[0] for role in ROLES}
+        self.created = {}
+        self.errors = []
+
+    def reject(self, number, username, errors):
+        self.errors.append({"row": number, "username": username, "errors": errors})
+
+    def insert(self, batch, retry=True):
+        taken = set(User.objects.filter(username__in=[values["username"] for _, values in batch])
+                    .values_list("username", flat=True))
+        for number, values in batch:
+            if values["username"] in taken:
+                self.reject(number, values["username"], {"username": "A user with that username already exists."})
+        batch = [(number, values) for number, values in batch if values["username"] not in taken]
+        if not batch:
+            return
+        # hashing is the slow part: done before the transaction opens
+        hashes = hash_passwords([values["password"] for _, values in batch], self.pool)
+        users = [
+            User(password=hashed, **{name: values[name] for name in COLUMNS if name != "password"})
+            for (_, values), hashed in zip(batch, hashes)
+        ]
+        shard = router.db_for_write(Teacher)
+        try:
+            with transaction.atomic(using=DEFAULT_DB_ALIAS), transaction.atomic(using=shard):
+                User.objects.bulk_create(users)
+                if any(user.pk is None for user in users):
+                    # backends that cannot return ids from a bulk insert
+                    ids = dict(User.objects.filter(username__in=[u.username for u in users])
+                               .values_list("username", "pk"))
+                    for user in users:
+                        user.pk = ids[user.username]
+                User.groups.through.objects.bulk_create(
+                    [User.groups.through(user_id=user.pk, group_id=self.groups[user.role].pk) for user in users]
+                )
+                # profiles on a shard reference local copies of the accounts
+                mirror_users(shard, users)
+                profiles = [_profile(user.role, user, self.developer) for user in users]
+                for model in (Teacher, Student, Guest):
+                    model.objects.bulk_create([p for p in profiles if isinstance(p, model)])
+        except IntegrityError as error:
+            if retry:
+                # a username was registered between the check and the insert: check again
+                return self.insert(batch, retry=False)
+            for number, values in batch:
+                self.reject(number, values["username"], {"row": f"Could not be inserted: {error}"})
+            return
+        for user in users:
+            self.created[user.role] = self.created.get(user.role, 0) + 1
+
+
+def import_users(developer, rows, batch_size=1000, workers=None):
+    """
+    Create the users of ``rows`` ((line number, record) pairs, see PARSERS)
+    in ``developer``'s workspace. Returns
+    {"created": n, "by_role": {...}, "errors": [{"row", "username", "errors"}]}.
+    """
+    seen = set()
+    with hash_pool(workers) as pool:
+        job = _Import(developer, pool)
+        batch = []
+        for number, record in rows:
+            values, errors = _clean(record)
+            username = values["username"] if values else ""
+            if not errors and username in seen:
+                errors = {"username": "Duplicate of an earlier row."}
+            if errors:
+                job.reject(number, username, errors)
+                continue
+            seen.add(username)
+            batch.append((number, values))
+            if len(batch) >= batch_size:
+                job.insert(batch)
+                batch = []
+        if batch:
+            job.insert(batch)
+    job.errors.sort(key=lambda error: error["row"])
+    return {"created": sum(job.created.values()), "by_role": job.created, "errors": job.errors}
+
+
+PROFILE_MODELS = {"teacher": Teacher, "student": Student, "guest": Guest}
+
+
+def change_roles(developer, changes):
+    """
+    Apply (username, role) ``changes`` to users of ``developer``'s workspace.
+
+    The user's role field and role group are rewritten and the profile for
+    the new role is created. Teacher and Student profiles of the old role are
+    detached from the account (``user`` cleared, ``is_active`` off) rather
+    than deleted, since courses, submissions and progress hang off them; the
+    permission checks look for ``user.teacher`` / ``user.student``, so a
+    deactivated profile that stayed attached would keep its access. A Guest
+    profile holds nothing and is deleted. A user made ``admin`` keeps the
+    profile they have, which keeps them in the workspace. Returns
+    {"updated": n, "changed": n, "errors": [...]}, ``changed`` counting users
+    whose role was different before.
+    """
+    errors, wanted = [], {}
+    for username, role in changes:
+        role = str(role or "").lower()
+        if role not in ROLES:
+            errors.append({"username": username, "error": f"Role must be one of: {', '.join(ROLES)}."})
+        elif username in wanted:
+            errors.append({"username": username, "error": "Listed more than once."})
+        else:
+            wanted[username] = role
+
+    users = {user.username: user for user in User.objects.filter(username__in=list(wanted))}
+    # role -> ids of the users that have that profile here
+    profiles = {
+        role: set(model.objects.filter(developer=developer, user_id__in=[user.pk for user in users.values()])
+                  .values_list("user_id", flat=True))
+        for role, model in PROFILE_MODELS.items()
+    }
+    members = set().union(*profiles.values())
+    for username in wanted:
+        if username not in users or users[username].pk not in members:
+            errors.append({"username": username, "error": "No such user in this workspace."})
+    targets = [user for username, user in users.items() if user.pk in members]
+    if not targets:
+        return {"updated": 0, "changed": 0, "errors": errors}
+
+    changed = 0
+    for user in targets:
+        changed += user.role != wanted[user.username]
+        user.role = wanted[user.username]
+    ids = [user.pk for user in targets]
+    groups = {role: Group.objects.get_or_create(name=role.capitalize())[0] for role in ROLES}
+    Membership = User.groups.through
+
+    shard = router.db_for_write(Teacher)
+    with transaction.atomic(using=DEFAULT_DB_ALIAS), transaction.atomic(using=shard):
+        User.objects.bulk_update(targets, ["role"], batch_size=1000)
+        Membership.objects.filter(user_id__in=ids, group_id__in=[g.pk for g in groups.values()]).delete()
+        Membership.objects.bulk_create(
+            [Membership(user_id=user.pk, group_id=groups[user.role].pk) for user in targets], batch_size=1000,
+        )
+        mirror_users(shard, targets)
+        for role, model in PROFILE_MODELS.items():
+            keep = [user.pk for user in targets if user.role == role]
+            # admin is not a workspace role: promoted users keep their profile
+            drop = [user.pk for user in targets
+                    if user.role not in (role, "admin") and user.pk in profiles[role]]
+            if role == "guest":
+                model.objects.filter(developer=developer, user_id__in=drop).delete()
+            else:
+                model.objects.filter(developer=developer, user_id__in=drop).update(user=None, is_active=False)
+                model.objects.filter(developer=developer, user_id__in=keep, is_active=False).update(is_active=True)
+            model.objects.bulk_create(
+                [_profile(role, user, developer) for user in targets
+                 if user.role == role and user.pk not in profiles[role]],
+                batch_size=1000,
+            )
+    return {"updated": len(targets), "changed": changed, "errors": errors}
@@ -0,0 +1,50 @@
+# accounts/hashing.py
+"""
+Password hashing in worker processes, for bulk user imports.
+
+PBKDF2 is deliberately slow (~tens of ms per password) and holds the GIL, so
+threads do not help; a process pool spreads it over the CPUs. This module
+imports no models, so a worker started with the "spawn" method only has to
+configure Django settings, not load the apps.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+
+# below this many passwords the pool round trip is not worth it
+POOL_THRESHOLD = 64
+# passwords per task sent to a worker
+TASK_SIZE = 32
+
+
+def _init_worker(settings_module):
+    if not settings.configured:
+        os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+        django.setup()
+
+
+def _hash_all(passwords):
+    from django.contrib.auth.hashers import make_password
+
+    # None / "" -> an unusable password (the user has to reset it)
+    return [make_password(p or None) for p in passwords]
+
+
+def hash_pool(workers=None):
+    """A pool for ``hash_passwords``; None workers means BULK_IMPORT_HASH_WORKERS, then one per CPU."""
+    workers = workers or getattr(settings, "BULK_IMPORT_HASH_WORKERS", None) or os.cpu_count() or 1
+    return ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker,
+        initargs=(os.environ.get("DJANGO_SETTINGS_MODULE", ""),),
+    )
+
+
+def hash_passwords(passwords, pool=None):
+    """Hashes for ``passwords``, in order. Uses ``pool`` (see hash_pool) for large lists."""
+    passwords = list(passwords)
+    if pool is None or len(passwords) < POOL_THRESHOLD:
+        return _hash_all(passwords)
+    chunks = [passwords[i:i + TASK_SIZE] for i in range(0, len(passwords), TASK_SIZE)]
+    return [hashed for chunk in pool.map(_hash_all, chunks) for hashed in chunk]
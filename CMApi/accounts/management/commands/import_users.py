@@ -0,0 +1,52 @@
+# accounts/management/commands/import_users.py
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from accounts import bulk_users
+from accounts.sharding import developer_shard
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Create users (with their role group and Teacher/Student/Guest profile) in a developer "
+        "workspace from a CSV or NDJSON file. Passwords are hashed in a process pool; bad or "
+        "duplicate rows are reported and skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("developer", help="Developer id or username")
+        parser.add_argument("file", help="CSV (with a header row) or NDJSON file")
+        parser.add_argument("--format", choices=sorted(bulk_users.PARSERS),
+                            help="Default: from the file extension (.csv, otherwise NDJSON)")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--workers", type=int, help="Hashing processes (default: one per CPU)")
+
+    def handle(self, *args, **options):
+        value = options["developer"]
+        lookup = {"pk": int(value)} if value.isdigit() else {"username": value}
+        developer = User.objects.filter(**lookup).first()
+        if developer is None:
+            raise CommandError(f"Developer '{value}' not found.")
+        kind = options["format"] or ("csv" if os.path.splitext(options["file"])[1].lower() == ".csv" else "ndjson")
+
+        try:
+            with open(options["file"], "rb") as f, developer_shard(developer):
+                rows = bulk_users.PARSERS[kind](bulk_users.decode(f))
+                report = bulk_users.import_users(developer, rows, batch_size=options["batch_size"],
+                                                 workers=options["workers"])
+        except ValidationError as error:
+            raise CommandError(str(error.detail))
+
+        for error in report["errors"]:
+            reasons = "; ".join(f"{field}: {message}" for field, message in error["errors"].items())
+            self.stderr.write(f"line {error['row']} ({error['username'] or '-'}): {reasons}")
+        by_role = ", ".join(f"{role}: {n}" for role, n in report["by_role"].items()) or "none"
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {report['created']} users in {developer.username} ({by_role}); "
+            f"{len(report['errors'])} rows skipped."
+        ))
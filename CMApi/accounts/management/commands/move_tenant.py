@@ -0,0 +1,105 @@
+# accounts/management/commands/move_tenant.py
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connections, transaction
+
+from accounts.models import TenantShard
+from accounts.sharding import (
+    developer_lookup, mirror_users, shard_aliases, shard_for_developer, tenant_models,
+)
+from mainapp.models import Teacher, Student, Guest
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Move every row of a developer workspace to another tenant shard in bulk. "
+        "Rows keep their primary keys; the move aborts if a key is already used "
+        "by another tenant on the target shard."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("developer", help="Developer id or username")
+        parser.add_argument("target", help="Target shard alias (see settings.TENANT_SHARDS)")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--dry-run", action="store_true", help="Only report row counts")
+
+    def handle(self, *args, **options):
+        developer = self._get_developer(options["developer"])
+        target = options["target"]
+        batch_size = options["batch_size"]
+        if target not in shard_aliases():
+            raise CommandError(f"Unknown shard '{target}'. Configured: {', '.join(shard_aliases())}")
+
+        source = shard_for_developer(developer.pk)
+        if source == target:
+            self.stdout.write(f"{developer.username} already lives on '{target}'.")
+            return
+
+        models = tenant_models()
+        querysets = [
+            (model, model._default_manager.using(source).filter(**{developer_lookup(model): developer.pk}))
+            for model in models
+        ]
+        for model, qs in querysets:
+            self.stdout.write(f"  {model._meta.label}: {qs.count()} rows")
+        if options["dry_run"]:
+            return
+
+        # users stay on default; the target needs copies for the foreign keys
+        user_ids = {developer.pk}
+        for profile in (Teacher, Student, Guest):
+            user_ids.update(
+                profile.objects.using(source).filter(developer=developer)
+                .exclude(user_id=None).values_list("user_id", flat=True)
+            )
+        mirror_users(target, User.objects.filter(pk__in=user_ids).iterator(), batch_size=batch_size)
+
+        with transaction.atomic(using=source):
+            with transaction.atomic(using=target):
+                for model, qs in querysets:
+                    copied = self._copy(model, qs, target, developer, batch_size)
+                    self.stdout.write(f"Copied {copied} {model._meta.label} rows")
+                # rows were inserted with explicit ids; move sequences past them
+                with connections[target].cursor() as cursor:
+                    for sql in connections[target].ops.sequence_reset_sql(no_style(), models):
+                        cursor.execute(sql)
+            # target committed: point the directory at it, then drop the source rows
+            TenantShard.objects.update_or_create(developer=developer, defaults={"alias": target})
+            for model, qs in reversed(querysets):
+                deleted = qs._raw_delete(source)
+                self.stdout.write(f"Deleted {deleted} {model._meta.label} rows from '{source}'")
+
+        self.stdout.write(self.style.SUCCESS(f"Moved {developer.username}: '{source}' -> '{target}'."))
+
+    def _get_developer(self, value):
+        lookup = {"pk": int(value)} if value.isdigit() else {"username": value}
+        try:
+            return User.objects.get(**lookup)
+        except User.DoesNotExist:
+            raise CommandError(f"Developer '{value}' not found.")
+
+    def _copy(self, model, qs, target, developer, batch_size):
+        """Chunked copy by primary key; re-running after a failed delete is a no-op."""
+        lookup = developer_lookup(model)
+        target_qs = model._default_manager.using(target)
+        copied = 0
+        last_pk = None
+        while True:
+            chunk_qs = qs.order_by("pk")
+            if last_pk is not None:
+                chunk_qs = chunk_qs.filter(pk__gt=last_pk)
+            chunk = list(chunk_qs[:batch_size])
+            if not chunk:
+                return copied
+            pks = [obj.pk for obj in chunk]
+            if target_qs.filter(pk__in=pks).exclude(**{lookup: developer.pk}).exists():
+                raise CommandError(
+                    f"{model._meta.label}: primary keys {pks[0]}..{pks[-1]} are already used "
+                    f"by another tenant on '{target}'."
+                )
+            target_qs.bulk_create(chunk, ignore_conflicts=True)
+            copied += len(chunk)
+            last_pk = pks[-1]
@@ -0,0 +1,80 @@
+# accounts/management/commands/purge_tenant.py
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts import purge
+from accounts.models import TenantPurge
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete a developer workspace (every tenant row, its user accounts and uploaded files) "
+        "in chunks, without loading it into memory. Re-running resumes an interrupted purge."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("developer", nargs="?", help="Developer id or username")
+        parser.add_argument("--resume", action="store_true", help="Resume every unfinished purge")
+        parser.add_argument("--status", action="store_true", help="List purges and their progress")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--keep-account", action="store_true",
+                            help="Keep the (deactivated) developer account itself")
+        parser.add_argument("--noinput", "--no-input", action="store_false", dest="interactive",
+                            help="Do not ask for confirmation")
+
+    def handle(self, *args, **options):
+        if options["status"]:
+            for job in TenantPurge.objects.order_by("-started_at"):
+                self.stdout.write(f"{job.username} (#{job.developer_id}) on '{job.shard}': {job.status}, "
+                                  f"step {job.step or '-'}, {sum(job.deleted.values())} rows, "
+                                  f"{job.files_released} files {job.error}")
+            return
+        if options["resume"]:
+            jobs = list(purge.unfinished())
+        elif options["developer"]:
+            jobs = [self._start(options)]
+        else:
+            raise CommandError("Give a developer, --resume or --status.")
+
+        for job in jobs:
+            self.stdout.write(f"Purging {job.username} from '{job.shard}'...")
+            try:
+                purge.run(job, batch_size=options["batch_size"], progress=self._reporter())
+            except purge.PurgeInProgress as busy:
+                self.stderr.write(str(busy))
+                continue
+            summary = ", ".join(f"{label}: {n}" for label, n in job.deleted.items() if n) or "nothing"
+            self.stdout.write(self.style.SUCCESS(
+                f"Purged {job.username}: {summary}; {job.files_released} file references released."
+            ))
+
+    def _start(self, options):
+        value = options["developer"]
+        lookup = {"pk": int(value)} if value.isdigit() else {"username": value}
+        developer = User.objects.filter(**lookup).first()
+        if developer is None:
+            job = TenantPurge.objects.filter(**{"developer_id" if value.isdigit() else "username": value}).first()
+            if job is None:
+                raise CommandError(f"Developer '{value}' not found.")
+            return job
+        if options["interactive"]:
+            answer = input(f"This deletes the whole workspace of {developer.username}. "
+                           f"Type the username to confirm: ")
+            if answer.strip() != developer.username:
+                raise CommandError("Purge cancelled.")
+        return purge.start(developer, keep_account=options["keep_account"])
+
+    def _reporter(self):
+        state = {"step": None, "chunks": 0}
+
+        def report(job):
+            # one line per table, then every 50 chunks
+            state["chunks"] += 1
+            if job.step != state["step"] or state["chunks"] % 50 == 0:
+                state["step"] = job.step
+                rows = job.deleted.get(job.step, sum(job.deleted.values()))
+                self.stdout.write(f"  {job.step}: {rows} rows deleted")
+
+        return report
@@ -1,6 +1,8 @@
 # accounts/middleware.py
+from django.http import JsonResponse
 from django.utils import timezone
-from accounts.models import ApiKey
+from accounts.models import ApiKey, TenantPurge
+from accounts.sharding import shard_aliases, pinned_shard
 import hashlib
 import re
 def is_sha256_hash(value):
@@ -8,10 +10,41 @@ def is_sha256_hash(value):
     return bool(re.fullmatch(r"[a-f0-9]{64}", value))
 
 
+# hashed key -> shard alias it was last found on (a hint; verified on every lookup)
+_key_shard_hints = {}
+_MAX_KEY_HINTS = 10000
+
+
+def find_api_key(hashed_key):
+    """
+    Look the key up on the shard it was last seen on, then fan out to the
+    other shards. Returns (api_key, alias) or (None, None).
+    """
+    aliases = shard_aliases()
+    hint = _key_shard_hints.get(hashed_key)
+    if hint in aliases:
+        aliases.remove(hint)
+        aliases.insert(0, hint)
+    for alias in aliases:
+        api_key = ApiKey.objects.using(alias).filter(HashedKey=hashed_key).first()
+        if api_key is not None:
+            if len(_key_shard_hints) >= _MAX_KEY_HINTS:
+                _key_shard_hints.clear()
+            _key_shard_hints[hashed_key] = alias
+            return api_key, alias
+    return None, None
+
+
+def is_being_purged(developer_id):
+    return TenantPurge.objects.filter(developer_id=developer_id).exclude(status=TenantPurge.DONE).exists()
+
+
 class DeveloperFromApiKeyMiddleware:
     """
     Reads X-API-Key or 'Authorization: ApiKey <key>',
     verifies expiry, and attaches request.workspace + request.api_key.
+    Deactivated keys and workspaces with an unfinished purge get a 403.
+    The rest of the request is pinned to the shard holding the key's tenant.
     """
     def __init__(self, get_response):
         self.get_response = get_response
@@ -34,12 +67,18 @@ class DeveloperFromApiKeyMiddleware:
             else:
                 hashed_input = hashlib.sha256(header_key.encode()).hexdigest()
 
-            try:
-                api_key = ApiKey.objects.get(HashedKey=hashed_input)
+            api_key, alias = find_api_key(hashed_input)
+            if api_key is not None:
+                if not api_key.is_active:
+                    return JsonResponse({"detail": "This API key has been deactivated."}, status=403)
+                if is_being_purged(api_key.developer_id):
+                    # a purge run must not meet rows written behind its back
+                    return JsonResponse({"detail": "This workspace is being deleted."}, status=403)
                 request.developer = api_key.developer
                 print(f"Developer attached to request: {request.developer}")
-            except ApiKey.DoesNotExist:
-                request.developer = None
+                with pinned_shard(alias):
+                    return self.get_response(request)
+            request.developer = None
 
 
         return self.get_response(request)
@@ -0,0 +1,24 @@
+# Generated by Django 5.1 on 2026-10-19 13:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_rename_user_apikey_developer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenantShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alias', models.CharField(max_length=64)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('developer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='tenant_shard', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
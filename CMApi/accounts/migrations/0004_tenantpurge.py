@@ -0,0 +1,31 @@
+# Generated by Django 5.1 on 2026-10-19 14:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_tenantshard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenantPurge',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('developer_id', models.IntegerField(unique=True)),
+                ('username', models.CharField(max_length=150)),
+                ('shard', models.CharField(max_length=64)),
+                ('keep_account', models.BooleanField(default=False)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('failed', 'Failed'), ('done', 'Done')], default='pending', max_length=10)),
+                ('step', models.CharField(blank=True, max_length=100)),
+                ('deleted', models.JSONField(default=dict)),
+                ('files_released', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -70,4 +70,44 @@ class ApiKey(models.Model):
 
     def verify_key(self, raw_key):
         """Compare a provided API key to its hash."""
-        return self.HashedKey == self.hash_key(raw_key)
\ No newline at end of file
+        return self.HashedKey == self.hash_key(raw_key)
+
+
+class TenantShard(models.Model):
+    """
+    Developer -> shard directory (see accounts/sharding.py).
+    Always stored on the default database; developers without a row live on
+    settings.TENANT_DEFAULT_SHARD.
+    """
+    developer = models.OneToOneField(User, on_delete=models.CASCADE, related_name="tenant_shard")
+    alias = models.CharField(max_length=64)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.developer.username} -> {self.alias}"
+
+class TenantPurge(models.Model):
+    """
+    Progress of a workspace purge (accounts/purge.py). Always on the default
+    database; keeps plain ids because the developer account goes last.
+    """
+    PENDING, RUNNING, FAILED, DONE = "pending", "running", "failed", "done"
+    STATUS_CHOICES = ((PENDING, "Pending"), (RUNNING, "Running"), (FAILED, "Failed"), (DONE, "Done"))
+
+    developer_id = models.IntegerField(unique=True)
+    username = models.CharField(max_length=150)
+    shard = models.CharField(max_length=64)
+    keep_account = models.BooleanField(default=False)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    # model label being deleted, then "accounts" / "done"
+    step = models.CharField(max_length=100, blank=True)
+    # model label -> rows deleted so far
+    deleted = models.JSONField(default=dict)
+    files_released = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"purge {self.username} ({self.status}, {self.step})"
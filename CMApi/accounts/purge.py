@@ -0,0 +1,190 @@
+# accounts/purge.py
+"""
+Deleting a whole developer workspace.
+
+``developer.delete()`` goes through Django's collector: every related row is
+loaded into memory and gets pre/post_delete signals, which does not finish
+for a large tenant. A purge instead deletes in chunks with raw DELETEs on the
+tenant's shard:
+
+1. ``start`` records a ``TenantPurge`` job and locks the workspace out: the
+   developer account and its API key are deactivated, and the API key
+   middleware refuses every request of a workspace with an unfinished job
+   (JWTs of its teachers and students included, since they need the key).
+2. ``run`` walks ``tenant_models()`` children first. Each chunk of at most
+   ``batch_size`` rows is one ``DELETE ... WHERE pk IN (...)`` committed on its
+   own, so locks stay short and memory flat; the job row records the rows
+   deleted so far.
+3. The workspace's accounts (the users behind its Teacher / Student / Guest
+   profiles) are deleted with their profiles, except accounts that still have
+   a profile in another workspace, which only lose this one's. Then the
+   shard directory entry goes and, unless ``keep_account``, the developer
+   account itself.
+
+Uploaded files of deleted rows are released after each chunk commits
+(``storage.delete`` drops one reference of a deduplicated file). Every step
+filters by developer, so a run that stopped half way is resumed by calling
+``run`` again; a crash between a commit and the file release leaves at most
+one chunk of stale references, which ``dedupe_media`` repairs.
+"""
+import os
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import FileField, Q
+from django.utils import timezone
+
+from mainapp.models import Guest, Student, Teacher, UploadSession
+from mainapp.uploads import partial_path
+from .models import ApiKey, TenantPurge, TenantShard
+from .sharding import developer_lookup, fan_out, shard_for_developer, tenant_models
+
+User = get_user_model()
+
+PROFILE_MODELS = (Teacher, Student, Guest)
+# a job whose runner has not reported for this long is considered dead
+LEASE = timedelta(minutes=10)
+
+
+class PurgeInProgress(Exception):
+    """Another runner holds the job."""
+
+
+def start(developer, keep_account=False):
+    """The purge job for ``developer``, created (and the workspace locked) if needed."""
+    job, _ = TenantPurge.objects.get_or_create(
+        developer_id=developer.pk,
+        defaults={"username": developer.username, "shard": shard_for_developer(developer.pk),
+                  "keep_account": keep_account},
+    )
+    # no new logins or API calls while the workspace is being emptied
+    User.objects.filter(pk=developer.pk).update(is_active=False)
+    ApiKey.objects.using(job.shard).filter(developer_id=developer.pk).update(is_active=False)
+    return job
+
+
+def unfinished():
+    return TenantPurge.objects.exclude(status=TenantPurge.DONE).order_by("started_at")
+
+
+def _acquire(job):
+    """Mark the job running, unless a live runner already has it."""
+    now = timezone.now()
+    taken = (
+        TenantPurge.objects.filter(pk=job.pk)
+        .filter(Q(status__in=[TenantPurge.PENDING, TenantPurge.FAILED])
+                | Q(status=TenantPurge.RUNNING, updated_at__lt=now - LEASE))
+        .update(status=TenantPurge.RUNNING, error="", updated_at=now)
+    )
+    if not taken:
+        raise PurgeInProgress(f"Purge of {job.username} is done or running elsewhere.")
+    job.refresh_from_db()
+
+
+def _save(job, progress):
+    job.save(update_fields=["step", "deleted", "files_released", "status", "error", "finished_at", "updated_at"])
+    if progress is not None:
+        progress(job)
+
+
+def _release_files(file_fields, rows):
+    released = 0
+    for i, field in enumerate(file_fields, start=1):
+        for row in rows:
+            if row[i]:
+                field.storage.delete(row[i])
+                released += 1
+    return released
+
+
+def _purge_model(job, model, batch_size, progress):
+    alias = job.shard
+    label = model._meta.label
+    rows_of = model._base_manager.using(alias).filter(**{developer_lookup(model): job.developer_id})
+    file_fields = [f for f in model._meta.concrete_fields if isinstance(f, FileField)]
+    job.step = label
+    while True:
+        rows = list(rows_of.order_by("pk").values_list("pk", *[f.attname for f in file_fields])[:batch_size])
+        if not rows:
+            return
+        pks = [row[0] for row in rows]
+        deleted = model._base_manager.using(alias).filter(pk__in=pks)._raw_delete(alias)
+        job.files_released += _release_files(file_fields, rows)
+        if model is UploadSession:
+            for pk in pks:
+                path = partial_path(UploadSession(pk=pk))
+                if os.path.exists(path):
+                    os.remove(path)
+        job.deleted[label] = job.deleted.get(label, 0) + deleted
+        _save(job, progress)
+
+
+def _purge_accounts(job, batch_size, progress):
+    """The users behind the workspace's profiles, a chunk of accounts at a time."""
+    alias = job.shard
+    job.step = "accounts"
+    while True:
+        user_ids = set()
+        for model in PROFILE_MODELS:
+            user_ids.update(
+                model._base_manager.using(alias).filter(developer_id=job.developer_id)
+                .exclude(user_id=None).order_by("user_id").values_list("user_id", flat=True)[:batch_size]
+            )
+        if not user_ids:
+            return
+        # developer accounts (of this or another workspace) only lose the profile
+        keep = set(User.objects.filter(Q(pk__in=user_ids) & (Q(role="admin") | Q(pk=job.developer_id)))
+                   .values_list("pk", flat=True))
+        # so do accounts that also have a profile in another workspace, on any shard
+        for model in PROFILE_MODELS:
+            keep.update(fan_out(
+                model._base_manager.filter(user_id__in=user_ids).exclude(developer_id=job.developer_id)
+                .values_list("user_id", flat=True)
+            ))
+        for model in PROFILE_MODELS:
+            label = model._meta.label
+            deleted = (model._base_manager.using(alias)
+                       .filter(developer_id=job.developer_id, user_id__in=user_ids)._raw_delete(alias))
+            job.deleted[label] = job.deleted.get(label, 0) + deleted
+        doomed = user_ids - keep
+        if alias != DEFAULT_DB_ALIAS:
+            # the shard's mirrored copies
+            User._base_manager.using(alias).filter(pk__in=doomed)._raw_delete(alias)
+        # nothing of the workspace points at them any more: the collector only
+        # meets their group memberships here
+        User.objects.filter(pk__in=doomed).delete()
+        job.deleted["accounts.User"] = job.deleted.get("accounts.User", 0) + len(doomed)
+        _save(job, progress)
+
+
+def run(job, batch_size=1000, progress=None):
+    """
+    Run (or resume) ``job`` to the end. ``progress(job)`` is called after
+    every chunk. Raises PurgeInProgress if another runner holds it.
+    """
+    _acquire(job)
+    try:
+        for model in reversed(tenant_models()):
+            if model not in PROFILE_MODELS:
+                _purge_model(job, model, batch_size, progress)
+        _purge_accounts(job, batch_size, progress)
+        # profiles without an account
+        for model in PROFILE_MODELS:
+            _purge_model(job, model, batch_size, progress)
+
+        TenantShard.objects.filter(developer_id=job.developer_id).delete()
+        if not job.keep_account:
+            if job.shard != DEFAULT_DB_ALIAS:
+                User._base_manager.using(job.shard).filter(pk=job.developer_id)._raw_delete(job.shard)
+            User.objects.filter(pk=job.developer_id).delete()
+        job.step = "done"
+        job.status = TenantPurge.DONE
+        job.finished_at = timezone.now()
+        _save(job, progress)
+    except Exception as error:
+        job.status = TenantPurge.FAILED
+        job.error = repr(error)
+        _save(job, None)
+        raise
+    return job
@@ -0,0 +1,211 @@
+# accounts/sharding.py
+"""
+Tenant sharding.
+
+Every mainapp row (and the developer's ApiKey) belongs to exactly one developer,
+so a developer's whole workspace can live in its own database ("shard").
+
+* ``settings.TENANT_SHARDS`` lists the database aliases that can hold tenants.
+* ``TenantShard`` (always on ``default``) is the developer -> shard directory.
+* ``DeveloperFromApiKeyMiddleware`` pins every query of a request to the shard
+  the API key was found on, through ``pinned_shard``.
+* ``TenantShardRouter`` sends tenant models to the pinned shard; users, groups,
+  sessions and the directory stay on ``default``.
+
+Users stay authoritative on ``default``. Because tenant tables have foreign keys
+to ``accounts_user``, the users a tenant references are mirrored into its shard
+(``mirror_users``) so the constraints hold on every backend.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+TENANT_APP_LABELS = {"mainapp"}
+TENANT_EXTRA_MODELS = {"accounts.apikey"}
+# models that must live on default even though they sit in a tenant app
+DIRECTORY_MODELS = {"accounts.tenantshard", "accounts.tenantpurge", "mainapp.storedblob"}
+
+_current_shard = ContextVar("current_shard", default=None)
+
+
+def shard_aliases():
+    return list(getattr(settings, "TENANT_SHARDS", None) or [DEFAULT_DB_ALIAS])
+
+
+def is_sharded():
+    return len(shard_aliases()) > 1
+
+
+def current_shard():
+    """Shard pinned for the running request/job, or the default shard."""
+    return _current_shard.get() or getattr(settings, "TENANT_DEFAULT_SHARD", DEFAULT_DB_ALIAS)
+
+
+@contextmanager
+def pinned_shard(alias):
+    """Route every tenant query inside the block to ``alias``."""
+    if alias not in shard_aliases():
+        raise ValueError(f"Unknown tenant shard: {alias}")
+    token = _current_shard.set(alias)
+    try:
+        yield alias
+    finally:
+        _current_shard.reset(token)
+
+
+def iter_on_current_shard(iterable):
+    """
+    For StreamingHttpResponse bodies: the middleware's pin ends when the view
+    returns, so every step of the lazy iterable is re-pinned to the shard that
+    was current when the response was built.
+    """
+    # read now, while the view still runs pinned: a generator body would only
+    # start on the first next(), after the middleware has unpinned
+    alias = current_shard()
+
+    def pinned_iter():
+        iterator = iter(iterable)
+        while True:
+            with pinned_shard(alias):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    return pinned_iter()
+
+
+def is_directory_model(model):
+    return model._meta.label_lower in DIRECTORY_MODELS
+
+
+def is_tenant_model(model):
+    if is_directory_model(model):
+        return False
+    opts = model._meta
+    return opts.app_label in TENANT_APP_LABELS or opts.label_lower in TENANT_EXTRA_MODELS
+
+
+def shard_for_developer(developer_id):
+    """Directory lookup: where does this developer's workspace live?"""
+    from .models import TenantShard
+
+    alias = (
+        TenantShard.objects.filter(developer_id=developer_id)
+        .values_list("alias", flat=True)
+        .first()
+    )
+    if alias in shard_aliases():
+        return alias
+    return getattr(settings, "TENANT_DEFAULT_SHARD", DEFAULT_DB_ALIAS)
+
+
+@contextmanager
+def developer_shard(developer):
+    """Pin the block to the shard holding ``developer`` (for commands/jobs)."""
+    developer_id = getattr(developer, "pk", developer)
+    with pinned_shard(shard_for_developer(developer_id)) as alias:
+        yield alias
+
+
+def fan_out(queryset):
+    """
+    Evaluate ``queryset`` on every shard and chain the results.
+    Used for cross-tenant (admin/ops) reads.
+    """
+    for alias in shard_aliases():
+        yield from queryset.using(alias)
+
+
+def count_across_shards(queryset):
+    return sum(queryset.using(alias).count() for alias in shard_aliases())
+
+
+def mirror_users(alias, users, batch_size=1000):
+    """Upsert copies of ``users`` into ``alias`` so tenant FKs to them hold."""
+    if alias == DEFAULT_DB_ALIAS:
+        return
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    fields = [f for f in User._meta.concrete_fields if not f.primary_key]
+    copies = [
+        User(pk=u.pk, **{f.attname: getattr(u, f.attname) for f in fields})
+        for u in users
+    ]
+    if copies:
+        User.objects.using(alias).bulk_create(
+            copies,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=["id"],
+            update_fields=[f.name for f in fields],
+        )
+
+
+def tenant_models():
+    """
+    Tenant models (including auto-created M2M through tables) in dependency
+    order: parents before children. Deletes should walk it reversed.
+    """
+    models = [
+        m for m in apps.get_models(include_auto_created=True)
+        if is_tenant_model(m)
+    ]
+    deps = {
+        m: {
+            f.related_model for f in m._meta.concrete_fields
+            if f.is_relation and f.related_model in models and f.related_model is not m
+        }
+        for m in models
+    }
+    ordered = []
+    while deps:
+        ready = [m for m, d in deps.items() if not d - set(ordered)]
+        if not ready:
+            raise RuntimeError("Circular dependency between tenant models.")
+        for m in sorted(ready, key=lambda m: m._meta.label):
+            ordered.append(m)
+            del deps[m]
+    return ordered
+
+
+def developer_lookup(model):
+    """ORM lookup that filters ``model`` down to one developer's rows."""
+    names = {f.name for f in model._meta.concrete_fields}
+    if "developer" in names:
+        return "developer_id"
+    for f in model._meta.concrete_fields:
+        if f.is_relation and "developer" in {g.name for g in f.related_model._meta.concrete_fields}:
+            return f"{f.name}__developer_id"
+    raise LookupError(f"{model._meta.label} cannot be filtered by developer.")
+
+
+class TenantShardRouter:
+    """
+    Routes tenant models to the pinned shard, everything else to default.
+    Related-object hints keep a row's relations on the database it came from.
+    """
+
+    def _route(self, model, **hints):
+        if not is_tenant_model(model):
+            return DEFAULT_DB_ALIAS
+        instance = hints.get("instance")
+        if instance is not None and is_tenant_model(type(instance)) and instance._state.db:
+            return instance._state.db
+        return current_shard()
+
+    db_for_read = _route
+    db_for_write = _route
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # users are mirrored into every shard that references them
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if model_name and f"{app_label}.{model_name}" in DIRECTORY_MODELS:
+            return db == DEFAULT_DB_ALIAS
+        # full schema everywhere: tenant tables reference accounts_user
+        return None
@@ -0,0 +1,17 @@
+# accounts/signals.py
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .sharding import current_shard, is_sharded, mirror_users
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def mirror_user_into_shard(sender, instance, using, **kwargs):
+    """Users created/changed inside a tenant request are copied into its shard."""
+    if not is_sharded() or using != DEFAULT_DB_ALIAS:
+        return
+    alias = current_shard()
+    if alias != DEFAULT_DB_ALIAS:
+        mirror_users(alias, [instance])
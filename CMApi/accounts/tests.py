@@ -1,3 +1,93 @@
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from mainapp.models import Course, Guest, Lesson, Student, Teacher
+from . import bulk_users, purge
+from .models import ApiKey, User
+from .sharding import current_shard, iter_on_current_shard, pinned_shard
+
+
+@override_settings(TENANT_SHARDS=["default", "shard_x"])
+class IterOnCurrentShardTests(SimpleTestCase):
+
+    def test_consumed_after_the_pin_ends(self):
+        # like a StreamingHttpResponse body: built pinned, read after the view returned
+        with pinned_shard("shard_x"):
+            body = iter_on_current_shard(current_shard() for _ in range(3))
+        self.assertEqual(current_shard(), "default")
+        self.assertEqual(list(body), ["shard_x"] * 3)
+
+
+class PurgeLockoutTests(TestCase):
+
+    def setUp(self):
+        self.developer = User.objects.create_user("purged_dev", password="x", role="admin")
+        _, self.api_key = ApiKey.create_for_dev(self.developer)
+        self.user = User.objects.create_user("purged_student", password="x", role="student")
+        student = Student.objects.create(developer=self.developer, user=self.user, age=20)
+        today = timezone.now().date()
+        course = Course.objects.create(developer=self.developer, title="C", description="d",
+                                       start_date=today, end_date=today, duration=1)
+        course.students.add(student)
+        self.lesson = Lesson.objects.create(developer=self.developer, course=course, title="L", content="c", order=1)
+
+    def requests(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        return (
+            client.get("/api/courses/", HTTP_X_API_KEY=self.api_key).status_code,
+            client.post("/api/progress/sync/", {"items": [{"lesson": self.lesson.pk}]}, format="json",
+                        HTTP_X_API_KEY=self.api_key).status_code,
+        )
+
+    def test_requests_refused_after_start(self):
+        self.assertEqual(self.requests(), (200, 200))
+        purge.start(self.developer)
+        self.assertEqual(self.requests(), (403, 403))
+
+    def test_reactivated_key_still_refused_while_purging(self):
+        purge.start(self.developer)
+        ApiKey.objects.filter(developer=self.developer).update(is_active=True)
+        self.assertEqual(self.requests(), (403, 403))
+
+
+class ChangeRolesTests(TestCase):
+
+    def setUp(self):
+        self.developer = User.objects.create_user("roles_dev", password="x", role="admin")
+        self.user = User.objects.create_user("roles_teacher", password="x", role="teacher")
+        self.teacher = Teacher.objects.create(developer=self.developer, user=self.user,
+                                              specialization="s", experience=1)
+
+    def test_admin_and_back(self):
+        result = bulk_users.change_roles(self.developer, [("roles_teacher", "admin")])
+        self.assertEqual((result["updated"], result["errors"]), (1, []))
+        self.assertEqual(Teacher.objects.get(pk=self.teacher.pk).user_id, self.user.pk)
+
+        result = bulk_users.change_roles(self.developer, [("roles_teacher", "teacher")])
+        self.assertEqual((result["updated"], result["errors"]), (1, []))
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual((user.role, user.teacher.pk), ("teacher", self.teacher.pk))
+        self.assertEqual(list(user.groups.values_list("name", flat=True)), ["Teacher"])
+
+
+class PurgeAccountsTests(TestCase):
+    # other workspaces' profiles are looked up on every shard
+    databases = "__all__"
+
+    def test_accounts_of_other_workspaces_are_kept(self):
+        developer = User.objects.create_user("purge_dev", password="x", role="admin")
+        other = User.objects.create_user("other_dev", password="x", role="admin")
+        only_here = User.objects.create_user("only_here", password="x", role="student")
+        shared = User.objects.create_user("shared", password="x", role="student")
+        Student.objects.create(developer=developer, user=only_here, age=20)
+        Student.objects.create(developer=developer, user=shared, age=20)
+        Guest.objects.create(developer=other, user=shared)
+
+        purge.run(purge.start(developer))
+
+        self.assertFalse(User.objects.filter(pk__in=[developer.pk, only_here.pk]).exists())
+        self.assertTrue(User.objects.filter(pk=shared.pk).exists())
+        self.assertFalse(Student.objects.filter(user=shared).exists())
+        self.assertTrue(Guest.objects.filter(developer=other, user=shared).exists())
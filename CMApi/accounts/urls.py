@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import RegisterView, ChangeUserRoleView, DeveloperRegisterView, DeveloperLoginView, DeveloperProfileView, DeveloperApiKeyView, DeleteAPIKeyView
+from .views import RegisterView, ChangeUserRoleView, DeveloperRegisterView, DeveloperLoginView, DeveloperProfileView, DeveloperApiKeyView, DeleteAPIKeyView, BulkUserImportView, BulkChangeUserRoleView, TenantOverviewView
 from rest_framework_simplejwt.views import TokenRefreshView
 
 urlpatterns = [
@@ -7,10 +7,13 @@ urlpatterns = [
     path("admin/login/", DeveloperLoginView.as_view(), name="developer-login"),
     path('admin/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path("admin/info/", DeveloperProfileView.as_view(), name="developer-info"),
+    path("admin/tenants/", TenantOverviewView.as_view(), name="tenant-overview"),
     path("admin/api-key/", DeveloperApiKeyView.as_view(), name="developer-api-key"),
     path("admin/api-key/delete/", DeleteAPIKeyView.as_view(), name="developer-api-key-delete"),
     path("register/", RegisterView.as_view(), name="register"),
+    path("admin/users/import/", BulkUserImportView.as_view(), name="bulk-user-import"),
     path("admin/change-role/", ChangeUserRoleView.as_view(), name="change_role"),
+    path("admin/change-role/bulk/", BulkChangeUserRoleView.as_view(), name="bulk_change_role"),
     #path("api-key/create/", CreateApiKeyView.as_view(), name="create_api_key"),
     #path("api-key/", GetApiKeyView.as_view(), name="get_api_key"),
 ]
@@ -13,6 +13,10 @@ from django.utils import timezone
 from datetime import timedelta
 from django.core.exceptions import ObjectDoesNotExist
 from mainapp.permissions import HasDeveloper, IsAdminRole
+from django.db.models import Count
+from .sharding import count_across_shards, developer_shard, fan_out, mirror_users, shard_for_developer
+from mainapp.models import Course, Student, Teacher
+from . import bulk_users
 #from django.urls import reverse_lazy
 
 
@@ -55,6 +59,34 @@ class DeveloperProfileView(APIView):
             "date_joined": user.date_joined,
         })
 
+class TenantOverviewView(APIView):
+    """
+    Endpoint: GET /api/accounts/admin/tenants/
+    Superusers only: per-developer course/teacher/student counts read from
+    every tenant shard, plus the totals.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    COUNTED = {"courses": Course, "teachers": Teacher, "students": Student}
+
+    def get(self, request):
+        if not request.user.is_superuser:
+            return Response({"detail": "Superuser required."}, status=status.HTTP_403_FORBIDDEN)
+        rows = {}
+        for name, model in self.COUNTED.items():
+            per_developer = model.objects.order_by().values("developer_id").annotate(n=Count("id"))
+            for row in fan_out(per_developer):
+                counts = rows.setdefault(row["developer_id"], dict.fromkeys(self.COUNTED, 0))
+                counts[name] += row["n"]
+        usernames = dict(User.objects.filter(pk__in=list(rows)).values_list("pk", "username"))
+        return Response({
+            "totals": {name: count_across_shards(model.objects.all()) for name, model in self.COUNTED.items()},
+            "developers": [
+                {"id": pk, "username": usernames.get(pk), "shard": shard_for_developer(pk), **counts}
+                for pk, counts in sorted(rows.items())
+            ],
+        })
+
+
 class DeveloperApiKeyView(APIView):
     """
     Handles developer API key operations.
@@ -68,15 +100,17 @@ class DeveloperApiKeyView(APIView):
     def post(self, request):
         """Create or return the existing API key for the developer."""
         developer = request.user
-        existing_key = ApiKey.objects.filter(developer=developer).first()
+        with developer_shard(developer) as alias:
+            existing_key = ApiKey.objects.filter(developer=developer).first()
 
-        if existing_key:
-            return Response({
-                "message": "API key already exists.",
-                "api_key": existing_key.HashedKey
-            }, status=status.HTTP_200_OK)
-        
-        api_key_obj, raw_key = ApiKey.create_for_dev(developer)
+            if existing_key:
+                return Response({
+                    "message": "API key already exists.",
+                    "api_key": existing_key.HashedKey
+                }, status=status.HTTP_200_OK)
+
+            mirror_users(alias, [developer])
+            api_key_obj, raw_key = ApiKey.create_for_dev(developer)
 
         return Response({
             "message": "API key created successfully.",
@@ -86,7 +120,8 @@ class DeveloperApiKeyView(APIView):
     def get(self, request):
         """Retrieve the current API key for the developer."""
         developer = request.user
-        api_key = ApiKey.objects.filter(developer=developer).first()
+        with developer_shard(developer):
+            api_key = ApiKey.objects.filter(developer=developer).first()
         if not api_key:
             return Response({"error": "No API key found."}, status=status.HTTP_404_NOT_FOUND)
         return Response({
@@ -108,8 +143,9 @@ class DeleteAPIKeyView(APIView):
             return Response({"error": "Invalid credentials"}, status=status.HTTP_403_FORBIDDEN)
 
         try:
-            api_key = ApiKey.objects.get(developer=request.user)
-            api_key.delete()
+            with developer_shard(request.user):
+                api_key = ApiKey.objects.get(developer=request.user)
+                api_key.delete()
             return Response({"message": "API key deleted successfully"}, status=status.HTTP_200_OK)
         except ApiKey.DoesNotExist:
             return Response({"error": "No API key found"}, status=status.HTTP_404_NOT_FOUND)
@@ -126,6 +162,30 @@ class RegisterView(generics.CreateAPIView):
     # success_url = reverse_lazy('token_obtain_pair')
 
 
+class BulkUserImportView(APIView):
+    """
+    POST /api/accounts/admin/users/import/
+    Body: CSV with a header row (Content-Type: text/csv) or NDJSON
+    (application/x-ndjson), columns username, email, password, first_name,
+    last_name, role. Bad or duplicate rows are reported and skipped.
+    """
+    permission_classes = [HasDeveloper, IsAdminRole]
+    FORMATS = {"text/csv": "csv", "application/x-ndjson": "ndjson", "application/jsonl": "ndjson"}
+
+    def post(self, request):
+        if not (request.user.is_superuser or request.user.pk == request.developer.pk):
+            return Response({"detail": "Only the workspace's developer account can import users."},
+                            status=status.HTTP_403_FORBIDDEN)
+        kind = self.FORMATS.get(request.content_type.split(";")[0].strip())
+        if kind is None:
+            return Response({"detail": "Send text/csv or application/x-ndjson."},
+                            status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+        # the raw body, read line by line: DRF's parsers never see it
+        rows = bulk_users.PARSERS[kind](bulk_users.decode(request.stream or []))
+        report = bulk_users.import_users(request.developer, rows)
+        return Response(report, status=status.HTTP_201_CREATED if report["created"] else status.HTTP_200_OK)
+
+
 class ChangeUserRoleView(APIView):
     permission_classes = [IsAdminRole]  # only admin/staff can change roles
 
@@ -177,6 +237,32 @@ class ChangeUserRoleView(APIView):
         return Response({"detail": f"{user.username} set to role {role}"})
 
 
+class BulkChangeUserRoleView(APIView):
+    """
+    POST /api/accounts/admin/change-role/bulk/
+    body: {"changes": [{"username": "jane", "role": "teacher"}, ...]}
+    Users must belong to this workspace; bad entries are reported, the rest applied.
+    """
+    permission_classes = [HasDeveloper, IsAdminRole]
+    MAX_CHANGES = 10000
+
+    def post(self, request):
+        if not (request.user.is_superuser or request.user.pk == request.developer.pk):
+            return Response({"detail": "Only the workspace's developer account can change roles."},
+                            status=status.HTTP_403_FORBIDDEN)
+        changes = request.data.get("changes")
+        if not isinstance(changes, list) or not changes:
+            return Response({"detail": "changes must be a non-empty list."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(changes) > self.MAX_CHANGES:
+            return Response({"detail": f"At most {self.MAX_CHANGES} changes per call."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not all(isinstance(c, dict) and isinstance(c.get("username"), str) for c in changes):
+            return Response({"detail": "Each change needs a username and a role."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        result = bulk_users.change_roles(request.developer, [(c["username"], c.get("role")) for c in changes])
+        return Response(result)
+
+
 
 # def _parse_ttl_hours(request, default=24, min_h=1, max_h=24*30):
 #     """
@@ -0,0 +1,117 @@
+# mainapp/analytics.py
+"""
+Course completion analytics (students x lessons).
+
+Completed progress comes out of the database as one ``values_list`` of
+(student_id, lesson_id) pairs; ids are mapped to matrix positions
+with ``np.searchsorted`` and the rates are plain axis means, so a 5k x 200
+course never builds a Python object per cell.
+
+Results are cached per course under a version number; Progress, lesson and
+roster writes call ``invalidate`` (see mainapp/signals.py and
+mainapp/enrollment.py), which bumps the version so the next read recomputes.
+"""
+import itertools
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router, transaction
+
+from accounts.sharding import current_shard
+from .models import Course, Lesson, Progress
+
+Enrollment = Course.students.through
+
+# bool cells as bytes -> "0"/"1" characters
+_BITS = bytes.maketrans(b"\x00\x01", b"01")
+
+
+def _version_key(alias, course_id):
+    # course ids repeat across shard databases
+    return f"analytics:completion:v:{alias}:{course_id}"
+
+
+def _bump_versions(alias, course_ids):
+    for course_id in course_ids:
+        key = _version_key(alias, course_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # no version yet: nothing cached under the default one either
+            cache.add(key, 2, timeout=None)
+
+
+def invalidate(*course_ids):
+    """Drop cached results for these courses once the current transaction commits."""
+    course_ids = {course_id for course_id in course_ids if course_id is not None}
+    if course_ids:
+        # after commit, so a concurrent read cannot re-cache pre-commit data
+        alias = router.db_for_write(Progress)
+        transaction.on_commit(lambda: _bump_versions(alias, course_ids), using=alias)
+
+
+def completion_matrix(course):
+    """
+    (student_ids, lesson_ids, matrix) where matrix[i, j] is True when student i
+    completed lesson j. Students are the course roster, lessons in course order.
+    """
+    student_ids = np.fromiter(
+        Enrollment.objects.filter(course_id=course.pk).order_by("student_id").values_list("student_id", flat=True),
+        dtype=np.int64,
+    )
+    lesson_ids = np.fromiter(
+        Lesson.objects.filter(course_id=course.pk).order_by("order", "pk").values_list("pk", flat=True),
+        dtype=np.int64,
+    )
+    matrix = np.zeros((len(student_ids), len(lesson_ids)), dtype=bool)
+    # one query; only completed cells matter, so the database drops the rest
+    rows = (
+        Progress.objects.filter(lesson__course_id=course.pk, completed=True)
+        .order_by().values_list("student_id", "lesson_id")
+    )
+    data = np.fromiter(itertools.chain.from_iterable(rows), dtype=np.int64).reshape(-1, 2)
+    if not len(data) or not len(student_ids) or not len(lesson_ids):
+        return student_ids, lesson_ids, matrix
+
+    lesson_order = np.argsort(lesson_ids)
+    sorted_lessons = lesson_ids[lesson_order]
+    row = np.searchsorted(student_ids, data[:, 0])
+    col = np.searchsorted(sorted_lessons, data[:, 1])
+    # progress of students who have since left the roster is ignored
+    keep = (row < len(student_ids)) & (col < len(sorted_lessons))
+    keep[keep] = student_ids[row[keep]] == data[keep, 0]
+    matrix[row[keep], lesson_order[col[keep]]] = True
+    return student_ids, lesson_ids, matrix
+
+
+def _rates(values):
+    return [round(float(v), 4) for v in values]
+
+
+def compute_completion(course, include_matrix=False):
+    student_ids, lesson_ids, matrix = completion_matrix(course)
+    result = {
+        "course": course.pk,
+        "students": student_ids.tolist(),
+        "lessons": lesson_ids.tolist(),
+        "per_student": _rates(matrix.mean(axis=1)) if matrix.shape[1] else [0.0] * len(student_ids),
+        "per_lesson": _rates(matrix.mean(axis=0)) if matrix.shape[0] else [0.0] * len(lesson_ids),
+        "overall": round(float(matrix.mean()), 4) if matrix.size else 0.0,
+    }
+    if include_matrix:
+        # one "0110..." string per student keeps a 5k x 200 heatmap compact
+        result["matrix"] = [r.tobytes().translate(_BITS).decode() for r in matrix.view(np.uint8)]
+    return result
+
+
+def course_completion(course, include_matrix=False):
+    """Cached compute_completion()."""
+    alias = current_shard()
+    version = cache.get_or_set(_version_key(alias, course.pk), 1, timeout=None)
+    key = f"analytics:completion:{alias}:{course.pk}:{version}:{int(include_matrix)}"
+    result = cache.get(key)
+    if result is None:
+        result = compute_completion(course, include_matrix)
+        cache.set(key, result, getattr(settings, "ANALYTICS_CACHE_SECONDS", 300))
+    return result
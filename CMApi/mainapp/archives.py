@@ -0,0 +1,95 @@
+# mainapp/archives.py
+"""
+Streamed ZIP archive of an assignment's submissions.
+
+``zipfile`` writes to an unseekable sink (local headers + data descriptors),
+so each member is read in CHUNK_SIZE pieces and the bytes produced so far are
+yielded straight away. No temp file is used; memory holds one chunk plus the
+central directory (one small ZipInfo per member). Files are stored, not
+deflated: submissions are mostly PDFs, images and archives already.
+"""
+import csv
+import io
+import os
+import zipfile
+
+from .models import Submission
+
+CHUNK_SIZE = 256 * 1024
+
+
+class _ZipSink(io.RawIOBase):
+    """Write-only stream that hands back what has been written since the last drain()."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _rows(assignment):
+    return (
+        Submission.objects.filter(assignment=assignment)
+        .order_by("student_id", "pk")
+        .values_list("pk", "student_id", "student__user__username", "student__user__first_name",
+                     "student__user__last_name", "submitted_at", "grade", "file")
+    )
+
+
+def _member_name(pk, student_id, username, file_name):
+    folder = username or f"student-{student_id}"
+    return f"{folder}/{pk}{os.path.splitext(file_name)[1]}"
+
+
+def iter_submission_zip(assignment, storage):
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        # manifest first, from its own pass over the rows, so nothing is kept for later
+        with archive.open("manifest.csv", mode="w", force_zip64=True) as member:
+            text = io.TextIOWrapper(member, encoding="utf-8", newline="")
+            writer = csv.writer(text)
+            writer.writerow(["submission_id", "student_id", "student", "submitted_at", "grade", "file"])
+            for n, (pk, student_id, username, first, last, submitted_at, grade, file_name) in enumerate(
+                _rows(assignment).iterator()
+            ):
+                if n and not n % 1000:
+                    text.flush()
+                    yield sink.drain()
+                present = bool(file_name) and storage.exists(file_name)
+                writer.writerow([
+                    pk, student_id, f"{first} {last}".strip() or username or "",
+                    submitted_at.isoformat(), "" if grade is None else grade,
+                    _member_name(pk, student_id, username, file_name) if present else "",
+                ])
+            text.flush()
+            text.detach()
+        yield sink.drain()
+
+        for pk, student_id, username, _, _, submitted_at, _, file_name in _rows(assignment).iterator():
+            if not file_name or not storage.exists(file_name):
+                continue
+            info = zipfile.ZipInfo(_member_name(pk, student_id, username, file_name),
+                                   date_time=submitted_at.timetuple()[:6])
+            info.compress_type = zipfile.ZIP_STORED
+            with storage.open(file_name, "rb") as source, archive.open(info, mode="w", force_zip64=True) as member:
+                for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+                    member.write(chunk)
+                    yield sink.drain()
+            yield sink.drain()
+    # central directory
+    yield sink.drain()
@@ -0,0 +1,52 @@
+# mainapp/bench_utils.py
+"""Helpers shared by the bench_* management commands."""
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+
+from accounts.sharding import developer_lookup, tenant_models
+from .models import Teacher, Student, Guest
+
+User = get_user_model()
+
+
+def fresh_bench_developer(username):
+    """A throw-away developer account; any earlier run's data is dropped first."""
+    old = User.objects.filter(username=username).first()
+    if old is not None:
+        drop_bench_developer(old)
+    return User.objects.create_user(username=username, password=None, role="admin")
+
+
+def drop_bench_developer(developer):
+    """Raw-delete every tenant row of ``developer`` plus its actor users (no signals)."""
+    user_ids = {developer.pk}
+    for profile in (Teacher, Student, Guest):
+        user_ids.update(
+            profile.objects.filter(developer=developer).exclude(user_id=None).values_list("user_id", flat=True)
+        )
+    for model in reversed(tenant_models()):
+        qs = model._default_manager.filter(**{developer_lookup(model): developer.pk})
+        qs._raw_delete(qs.db)
+    User.groups.through.objects.filter(user_id__in=user_ids).delete()
+    User.objects.filter(pk__in=user_ids).delete()
+
+
+@contextmanager
+def timer(samples):
+    start = time.perf_counter()
+    yield
+    samples.append(time.perf_counter() - start)
+
+
+def summarize(samples):
+    """ms figures for a list of second timings."""
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+    }
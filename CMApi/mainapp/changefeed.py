@@ -0,0 +1,180 @@
+# mainapp/changefeed.py
+"""
+Incremental sync for mobile clients.
+
+Signals (mainapp/signals.py) append a ``ChangeLogEntry`` for every create,
+update and delete of the synced models; the entry id is the sequence clients
+keep as their cursor. ``changes_since`` collapses a page of entries to the
+latest operation per row, loads the surviving rows in one query per model and
+serializes them with the regular API serializers.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Exists, Max, OuterRef
+from django.utils import timezone
+
+from .models import (
+    Course, Lesson, Assignment, CourseMaterial, Submission, Progress,
+    ChangeLogEntry, ChangeFeedHorizon,
+)
+from .serializers import (
+    CourseSerializer, LessonSerializer, AssignmentSerializer, CourseMaterialSerializer,
+    SubmissionTeacherSerializer, SubmissionStudentSerializer, ProgressSerializer,
+)
+from .visibility import visible_courses
+
+# feed name -> (model, lookup from the model to its Course)
+FEED_MODELS = {
+    "course": (Course, "pk"),
+    "lesson": (Lesson, "course"),
+    "assignment": (Assignment, "course"),
+    "material": (CourseMaterial, "course"),
+    "submission": (Submission, "assignment__course"),
+    "progress": (Progress, "lesson__course"),
+}
+FEED_NAMES = {model: name for name, (model, _) in FEED_MODELS.items()}
+
+
+class ResyncRequired(Exception):
+    """The cursor is older than the compaction horizon: refetch everything."""
+
+
+def record_change(instance, op):
+    name = FEED_NAMES.get(type(instance))
+    if name is not None:
+        ChangeLogEntry.objects.create(
+            developer_id=instance.developer_id, model=name, object_id=instance.pk, op=op,
+        )
+
+
+def record_changes(model, developer_id, ids, op):
+    """Bulk variant for code paths that bypass model signals (bulk_create/bulk_update)."""
+    name = FEED_NAMES[model]
+    ChangeLogEntry.objects.bulk_create(
+        [ChangeLogEntry(developer_id=developer_id, model=name, object_id=pk, op=op) for pk in ids],
+        batch_size=1000,
+    )
+
+
+def latest_seq(developer):
+    return ChangeLogEntry.objects.filter(developer=developer).aggregate(seq=Max("id"))["seq"] or 0
+
+
+def _visible_rows(request, name, ids):
+    model, course_lookup = FEED_MODELS[name]
+    rows = model.objects.filter(developer=request.developer, pk__in=ids)
+    user = request.user
+    student = getattr(user, "student", None)
+    if name in ("submission", "progress") and student is not None and not user.is_superuser:
+        rows = rows.filter(student=student)
+    else:
+        rows = rows.filter(**{f"{course_lookup}__in": visible_courses(request).values("pk")})
+    if name == "course":
+        rows = rows.prefetch_related("students")
+    return rows
+
+
+def _serializer_for(request, name):
+    if name == "submission":
+        user = request.user
+        if user.is_superuser or hasattr(user, "teacher"):
+            return SubmissionTeacherSerializer
+        return SubmissionStudentSerializer
+    return {
+        "course": CourseSerializer,
+        "lesson": LessonSerializer,
+        "assignment": AssignmentSerializer,
+        "material": CourseMaterialSerializer,
+        "progress": ProgressSerializer,
+    }[name]
+
+
+def changes_since(request, since, limit=500):
+    """
+    One page of changes after ``since`` for request.developer.
+    Entries younger than CHANGE_FEED_SETTLE_SECONDS are held back so a
+    transaction that committed late cannot slip in behind a client's cursor.
+    """
+    developer = request.developer
+    horizon = ChangeFeedHorizon.objects.filter(developer=developer).values_list("seq", flat=True).first() or 0
+    if since < horizon:
+        raise ResyncRequired()
+
+    settled = timezone.now() - timedelta(seconds=getattr(settings, "CHANGE_FEED_SETTLE_SECONDS", 2))
+    entries = list(
+        ChangeLogEntry.objects
+        .filter(developer=developer, id__gt=since, changed_at__lte=settled)
+        .order_by("id")
+        .values_list("id", "model", "object_id", "op")[:limit + 1]
+    )
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    latest = {}
+    for seq, name, object_id, op in entries:
+        latest[(name, object_id)] = (seq, op)
+
+    upserts = {}
+    for (name, object_id), (_, op) in latest.items():
+        if op == "upsert":
+            upserts.setdefault(name, []).append(object_id)
+
+    data = {}
+    context = {"request": request}
+    for name, ids in upserts.items():
+        serializer_class = _serializer_for(request, name)
+        for row in _visible_rows(request, name, ids):
+            data[(name, row.pk)] = serializer_class(row, context=context).data
+
+    changes = []
+    for (name, object_id), (seq, op) in sorted(latest.items(), key=lambda item: item[1][0]):
+        if op == "delete":
+            changes.append({"seq": seq, "model": name, "op": "delete", "id": object_id})
+        elif (name, object_id) in data:
+            changes.append({"seq": seq, "model": name, "op": "upsert", "id": object_id,
+                            "data": data[(name, object_id)]})
+        # upserts of rows deleted since (a tombstone follows) or not visible are skipped
+
+    return {
+        "cursor": str(entries[-1][0] if entries else since),
+        "has_more": has_more,
+        "changes": changes,
+    }
+
+
+def compact(tombstone_age=timedelta(days=30), batch_size=5000):
+    """
+    Drop entries superseded by a later entry for the same row, then tombstones
+    older than ``tombstone_age``. Cursors older than a dropped tombstone can no
+    longer be served incrementally, so the per-developer horizon moves past it.
+    Returns (superseded_deleted, tombstones_deleted).
+    """
+    newer = ChangeLogEntry.objects.filter(
+        developer=OuterRef("developer"), model=OuterRef("model"),
+        object_id=OuterRef("object_id"), id__gt=OuterRef("id"),
+    )
+    superseded = _delete_in_batches(ChangeLogEntry.objects.filter(Exists(newer)), batch_size)
+
+    old_tombstones = ChangeLogEntry.objects.filter(
+        op="delete", changed_at__lt=timezone.now() - tombstone_age,
+    )
+    horizons = old_tombstones.values("developer").annotate(seq=Max("id")).order_by()
+    for row in horizons:
+        horizon, created = ChangeFeedHorizon.objects.get_or_create(
+            developer_id=row["developer"], defaults={"seq": row["seq"]},
+        )
+        if not created and horizon.seq < row["seq"]:
+            horizon.seq = row["seq"]
+            horizon.save(update_fields=["seq", "compacted_at"])
+    tombstones = _delete_in_batches(old_tombstones, batch_size)
+    return superseded, tombstones
+
+
+def _delete_in_batches(queryset, batch_size):
+    deleted = 0
+    while True:
+        ids = list(queryset.order_by("id").values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += ChangeLogEntry.objects.filter(id__in=ids).delete()[0]
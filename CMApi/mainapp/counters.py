@@ -0,0 +1,82 @@
+# mainapp/counters.py
+"""
+Denormalized counters for course cards and assignment lists.
+
+Signals (mainapp/signals.py) apply +1/-1 with F() UPDATEs, so concurrent
+writers never lose an increment and no aggregate runs on the read path.
+``recount`` rebuilds every counter from the source tables with one UPDATE per
+counter and only touches rows that drifted (``python manage.py recount``).
+"""
+from django.db.models import Count, F, OuterRef, PositiveIntegerField, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Course, Assignment, Lesson, Submission
+
+Enrollment = Course.students.through
+
+
+def bump(model, pk, **deltas):
+    """Atomically add the given deltas to one row's counters (never below zero)."""
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if pk is None or not deltas:
+        return
+    model.objects.filter(pk=pk).update(**{
+        field: Greatest(F(field) + delta, Value(0), output_field=PositiveIntegerField())
+        for field, delta in deltas.items()
+    })
+
+
+def bump_course_of_assignment(assignment_id, **deltas):
+    """Same as bump() for the course of an assignment, without loading it."""
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if assignment_id is None or not deltas:
+        return
+    Course.objects.filter(
+        pk=Subquery(Assignment.objects.filter(pk=assignment_id).values("course_id")[:1]),
+    ).update(**{
+        field: Greatest(F(field) + delta, Value(0), output_field=PositiveIntegerField())
+        for field, delta in deltas.items()
+    })
+
+
+def submission_added(assignment_id, graded):
+    bump(Assignment, assignment_id, submission_count=1, graded_count=int(graded))
+    bump_course_of_assignment(assignment_id, submission_count=1)
+
+
+def submission_removed(assignment_id, graded):
+    bump(Assignment, assignment_id, submission_count=-1, graded_count=-int(graded))
+    bump_course_of_assignment(assignment_id, submission_count=-1)
+
+
+def _count(queryset, outer_field):
+    return Coalesce(Subquery(
+        queryset.filter(**{outer_field: OuterRef("pk")}).order_by()
+        .values(outer_field).annotate(n=Count("pk")).values("n")
+    ), 0)
+
+
+COURSE_COUNTERS = {
+    "student_count": lambda: _count(Enrollment.objects.all(), "course_id"),
+    "lesson_count": lambda: _count(Lesson.objects.all(), "course_id"),
+    "assignment_count": lambda: _count(Assignment.objects.all(), "course_id"),
+    "submission_count": lambda: _count(Submission.objects.all(), "assignment__course_id"),
+}
+ASSIGNMENT_COUNTERS = {
+    "submission_count": lambda: _count(Submission.objects.all(), "assignment_id"),
+    "graded_count": lambda: _count(Submission.objects.filter(grade__isnull=False), "assignment_id"),
+}
+
+
+def recount(developer=None):
+    """Repair drifted counters; returns {"Course.lesson_count": rows fixed, ...}."""
+    fixed = {}
+    for model, counters in ((Course, COURSE_COUNTERS), (Assignment, ASSIGNMENT_COUNTERS)):
+        rows = model.objects.all()
+        if developer is not None:
+            rows = rows.filter(developer=developer)
+        for field, expression in counters.items():
+            fixed[f"{model.__name__}.{field}"] = (
+                rows.filter(~Q(**{field: expression()})).update(**{field: expression()})
+            )
+    return fixed
@@ -0,0 +1,160 @@
+# mainapp/downloads.py
+"""
+Authenticated file downloads for Submission.file and CourseMaterial.file.
+
+The views check access. The bytes are then sent in one of two ways:
+
+* DOWNLOAD_OFFLOAD = "x-accel-redirect" (nginx) or "x-sendfile" (Apache,
+  lighttpd): the response carries only headers and the web server streams
+  the file itself, including Range requests. For nginx, map
+  DOWNLOAD_ACCEL_PREFIX to MEDIA_ROOT in an ``internal`` location.
+* otherwise Django serves it: a whole file goes out as a FileResponse (the
+  server's wsgi.file_wrapper / sendfile, no copy through Python); a single
+  ``Range: bytes=`` request gets a 206 that reads only that slice. If-Range,
+  If-None-Match and If-Modified-Since are honoured.
+"""
+import mimetypes
+import os
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+from .storage import is_blob_name
+
+CHUNK_SIZE = 64 * 1024
+
+
+class _FileSlice:
+    """File-like view of ``length`` bytes from ``start``, so FileResponse reads just the range."""
+
+    def __init__(self, f, start, length):
+        f.seek(start)
+        self.file = f
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b""
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def _etag(name, stat):
+    if is_blob_name(name):
+        # content-addressed: the digest is the file name
+        return quote_etag(os.path.splitext(os.path.basename(name))[0])
+    return quote_etag(f"{stat.st_mtime_ns:x}-{stat.st_size:x}")
+
+
+def parse_range(header, size):
+    """
+    (start, end) inclusive for a single "bytes=" range, None to send the
+    whole file (no/multiple/foreign ranges), or False when unsatisfiable.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            # suffix range: the last N bytes
+            length = int(last)
+            if length <= 0:
+                return False
+            start, end = max(size - length, 0), size - 1
+    except ValueError:
+        return None
+    if start < 0 or start > end or start >= size:
+        return False
+    return start, min(end, size - 1)
+
+
+def _if_range_matches(request, etag, mtime):
+    value = request.headers.get("If-Range")
+    if not value:
+        return True
+    if value.startswith(('"', "W/")):
+        # only strong validators are allowed here
+        return value == etag
+    since = parse_http_date_safe(value)
+    return since is not None and int(mtime) <= since
+
+
+def serve_file(request, field_file, download_name):
+    if not field_file:
+        raise Http404("No file.")
+    storage = field_file.storage
+    try:
+        path = storage.path(field_file.name)
+        stat = os.stat(path)
+    except (NotImplementedError, FileNotFoundError):
+        raise Http404("File is missing.")
+
+    etag = _etag(field_file.name, stat)
+    headers = {
+        "ETag": etag, "Last-Modified": http_date(stat.st_mtime),
+        "Accept-Ranges": "bytes", "Cache-Control": "private, max-age=0, must-revalidate",
+    }
+    none_match = request.headers.get("If-None-Match")
+    since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+    if (none_match and etag in [tag.strip() for tag in none_match.split(",")]) or (
+        not none_match and since is not None and int(stat.st_mtime) <= since
+    ):
+        response = HttpResponseNotModified()
+        for key, value in headers.items():
+            response[key] = value
+        return response
+
+    content_type = mimetypes.guess_type(download_name)[0] or "application/octet-stream"
+    offload = getattr(settings, "DOWNLOAD_OFFLOAD", None)
+    if offload:
+        response = HttpResponse(content_type=content_type)
+        if offload == "x-accel-redirect":
+            prefix = getattr(settings, "DOWNLOAD_ACCEL_PREFIX", "/protected-media/")
+            response["X-Accel-Redirect"] = prefix.rstrip("/") + "/" + quote(field_file.name)
+        else:
+            response["X-Sendfile"] = path
+        response["Content-Disposition"] = f"attachment; filename*=UTF-8''{quote(download_name)}"
+        for key, value in headers.items():
+            response[key] = value
+        return response
+
+    requested = parse_range(request.headers.get("Range"), stat.st_size)
+    if requested is not None and not _if_range_matches(request, etag, stat.st_mtime):
+        requested = None
+    if requested is False:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{stat.st_size}"
+        return response
+
+    f = open(path, "rb")
+    if requested is None:
+        response = FileResponse(f, as_attachment=True, filename=download_name, content_type=content_type)
+    else:
+        start, end = requested
+        response = FileResponse(
+            _FileSlice(f, start, end - start + 1), as_attachment=True, filename=download_name,
+            content_type=content_type, status=206,
+        )
+        response.block_size = CHUNK_SIZE
+        response["Content-Length"] = str(end - start + 1)
+        response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+    for key, value in headers.items():
+        response[key] = value
+    return response
+
+
+def download_name(stem, field_file):
+    """Readable attachment name; content-addressed names only keep the extension."""
+    extension = os.path.splitext(field_file.name)[1]
+    stem = "".join(c if c.isalnum() or c in " ._-" else "_" for c in stem).strip() or "download"
+    return f"{stem}{extension}"
@@ -0,0 +1,177 @@
+# mainapp/enrollment.py
+"""
+Roster changes that write the Course.students through table directly.
+
+Rewriting ``students`` through CourseSerializer loads and diffs the whole
+roster; these helpers validate the given ids in one query and bulk insert or
+delete only the affected rows. They do not send m2m_changed.
+
+``Course.student_count`` is the seat counter. Self-enrollment claims a seat
+with a conditional UPDATE (``student_count < capacity``), which the database
+applies atomically per row, so concurrent signups cannot overbook; students
+who find no seat join the FIFO ``CourseWaitlistEntry`` queue and are promoted
+as seats free up. Instructor bulk changes are not capped and recount instead.
+"""
+from django.db import IntegrityError, router, transaction
+from django.db.models import F, Q
+from rest_framework.exceptions import ValidationError
+
+from . import analytics, changefeed, counters, leaderboard
+from .models import Course, CourseWaitlistEntry, Student
+
+MAX_STUDENTS_PER_REQUEST = 10_000
+
+Enrollment = Course.students.through
+
+
+def parse_student_ids(data):
+    """Deduplicated student ids from {"student_ids": [...]}, in request order."""
+    values = data.get("student_ids") if hasattr(data, "get") else None
+    if not isinstance(values, list) or not values:
+        raise ValidationError({"student_ids": "A non-empty list of student ids is required."})
+    if len(values) > MAX_STUDENTS_PER_REQUEST:
+        raise ValidationError({"student_ids": f"At most {MAX_STUDENTS_PER_REQUEST} ids per request."})
+    if any(isinstance(v, bool) or not isinstance(v, int) for v in values):
+        raise ValidationError({"student_ids": "Student ids must be integers."})
+    return list(dict.fromkeys(values))
+
+
+def validate_tenant_students(course, student_ids):
+    """One query: every id must be a student of the course's developer."""
+    known = set(
+        Student.objects.filter(developer_id=course.developer_id, pk__in=student_ids)
+        .values_list("pk", flat=True)
+    )
+    unknown = [pk for pk in student_ids if pk not in known]
+    if unknown:
+        raise ValidationError({"student_ids": f"Not students of this workspace: {unknown[:50]}"})
+
+
+def enroll_students(course, student_ids, batch_size=1000):
+    """Add students to the roster; returns the ids that were not enrolled before."""
+    with transaction.atomic(using=router.db_for_write(Enrollment)):
+        existing = set(
+            Enrollment.objects.filter(course_id=course.pk, student_id__in=student_ids)
+            .values_list("student_id", flat=True)
+        )
+        added = [pk for pk in student_ids if pk not in existing]
+        # ignore_conflicts: a concurrent request may have added the same rows
+        Enrollment.objects.bulk_create(
+            [Enrollment(course_id=course.pk, student_id=pk) for pk in added],
+            batch_size=batch_size, ignore_conflicts=True,
+        )
+        CourseWaitlistEntry.objects.filter(course_id=course.pk, student_id__in=added).delete()
+        recount([course.pk])
+        if added:
+            changefeed.record_changes(Course, course.developer_id, [course.pk], "upsert")
+            analytics.invalidate(course.pk)
+            leaderboard.invalidate(course.pk)
+    return added
+
+
+def unenroll_students(course, student_ids):
+    """Remove students from the roster; returns how many were enrolled."""
+    with transaction.atomic(using=router.db_for_write(Enrollment)):
+        removed, _ = Enrollment.objects.filter(course_id=course.pk, student_id__in=student_ids).delete()
+        if removed:
+            recount([course.pk])
+            changefeed.record_changes(Course, course.developer_id, [course.pk], "upsert")
+            analytics.invalidate(course.pk)
+            leaderboard.invalidate(course.pk)
+    if removed:
+        promote_waitlist(course)
+    return removed
+
+
+def recount(course_ids):
+    """Reset student_count from the through table (after uncapped bulk changes)."""
+    Course.objects.filter(pk__in=course_ids).update(
+        student_count=counters.COURSE_COUNTERS["student_count"](),
+    )
+
+
+def claim_seat(course_id):
+    """Take one seat if the cap allows; True on success. Locks the course row until commit."""
+    return Course.objects.filter(
+        Q(capacity__isnull=True) | Q(student_count__lt=F("capacity")), pk=course_id,
+    ).update(student_count=F("student_count") + 1) == 1
+
+
+def release_seat(course_id):
+    Course.objects.filter(pk=course_id, student_count__gt=0).update(student_count=F("student_count") - 1)
+
+
+def _insert_enrollment(course_id, student_id):
+    """False if the student is already enrolled (unique course/student pair)."""
+    try:
+        with transaction.atomic(using=router.db_for_write(Enrollment)):
+            Enrollment.objects.create(course_id=course_id, student_id=student_id)
+        return True
+    except IntegrityError:
+        return False
+
+
+def waitlist_position(course_id, entry_id):
+    return CourseWaitlistEntry.objects.filter(course_id=course_id, id__lte=entry_id).count()
+
+
+def self_enroll(course, student):
+    """
+    Enroll one student against the seat cap.
+    Returns ("enrolled" | "already_enrolled" | "waitlisted", waitlist position or None).
+    """
+    if Enrollment.objects.filter(course_id=course.pk, student_id=student.pk).exists():
+        return "already_enrolled", None
+    with transaction.atomic(using=router.db_for_write(Course)):
+        # the seat UPDATE goes first: it is the write that serializes signups
+        if claim_seat(course.pk):
+            if not _insert_enrollment(course.pk, student.pk):
+                release_seat(course.pk)
+                return "already_enrolled", None
+            CourseWaitlistEntry.objects.filter(course_id=course.pk, student_id=student.pk).delete()
+            changefeed.record_changes(Course, course.developer_id, [course.pk], "upsert")
+            analytics.invalidate(course.pk)
+            leaderboard.invalidate(course.pk)
+            return "enrolled", None
+        entry, _ = CourseWaitlistEntry.objects.get_or_create(
+            course_id=course.pk, student_id=student.pk, defaults={"developer_id": course.developer_id},
+        )
+    return "waitlisted", waitlist_position(course.pk, entry.pk)
+
+
+def self_unenroll(course, student):
+    """Leave the course (or its waitlist); a freed seat goes to the waitlist head."""
+    with transaction.atomic(using=router.db_for_write(Course)):
+        removed, _ = Enrollment.objects.filter(course_id=course.pk, student_id=student.pk).delete()
+        if removed:
+            release_seat(course.pk)
+            changefeed.record_changes(Course, course.developer_id, [course.pk], "upsert")
+            analytics.invalidate(course.pk)
+            leaderboard.invalidate(course.pk)
+        left_waitlist, _ = CourseWaitlistEntry.objects.filter(course_id=course.pk, student_id=student.pk).delete()
+    if removed:
+        promote_waitlist(course)
+    return bool(removed), bool(left_waitlist)
+
+
+def promote_waitlist(course):
+    """Fill free seats from the head of the waitlist; returns the promoted student ids."""
+    promoted = []
+    if not CourseWaitlistEntry.objects.filter(course_id=course.pk).exists():
+        return promoted
+    with transaction.atomic(using=router.db_for_write(Course)):
+        while claim_seat(course.pk):
+            entry = CourseWaitlistEntry.objects.filter(course_id=course.pk).order_by("id").first()
+            if entry is None:
+                release_seat(course.pk)
+                break
+            entry.delete()
+            if _insert_enrollment(course.pk, entry.student_id):
+                promoted.append(entry.student_id)
+            else:
+                release_seat(course.pk)
+        if promoted:
+            changefeed.record_changes(Course, course.developer_id, [course.pk], "upsert")
+            analytics.invalidate(course.pk)
+            leaderboard.invalidate(course.pk)
+    return promoted
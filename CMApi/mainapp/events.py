@@ -0,0 +1,218 @@
+# mainapp/events.py
+"""
+Pub/sub behind the /api/events/ Server-Sent Events stream.
+
+Publishers are ordinary (sync) model signals; subscribers are SSE responses
+awaiting an asyncio queue on the ASGI event loop, so an open stream costs a
+queue, not a worker thread.
+
+* ``LocalEventBus`` fans events out inside one process (runserver, one
+  uvicorn worker).
+* ``BrokerEventBus`` is for several processes: publishes go to the broker
+  started with ``python manage.py run_event_broker`` and every process
+  dispatches what the broker echoes back to its own subscribers.
+  Enabled by ``EVENTS_BROKER_URL = "tcp://127.0.0.1:8765"``.
+"""
+import asyncio
+import json
+import socket
+import threading
+from collections import defaultdict
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.db import router, transaction
+
+
+def user_topic(developer_id, user_id):
+    return f"{developer_id}:user:{user_id}"
+
+
+class Subscription:
+    def __init__(self, topics, loop, maxsize):
+        self.topics = topics
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def deliver(self, event):
+        # runs on the subscriber's loop; a stalled client loses events, not memory
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class LocalEventBus:
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, topics, maxsize=100):
+        """Call from the event loop that will consume the subscription."""
+        subscription = Subscription(list(topics), asyncio.get_running_loop(), maxsize)
+        with self._lock:
+            for topic in subscription.topics:
+                self._subscribers[topic].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for topic in subscription.topics:
+                subscribers = self._subscribers.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[topic]
+
+    def publish(self, topic, event):
+        """Thread-safe; usually called from a sync view or signal."""
+        self.dispatch(topic, event)
+
+    def dispatch(self, topic, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(topic, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # loop already closed; the stream's cleanup will unsubscribe it
+                pass
+
+
+class BrokerEventBus(LocalEventBus):
+    """
+    Newline-delimited JSON over TCP. A connection announces itself with
+    "PUB\\n" or "SUB\\n"; the broker copies every published line to every
+    subscriber connection, this process's listener included.
+    """
+    reconnect_delay = 1.0
+
+    def __init__(self, host, port):
+        super().__init__()
+        self.host, self.port = host, port
+        self._publish_socket = None
+        self._publish_lock = threading.Lock()
+        self._listeners = {}
+
+    def subscribe(self, topics, maxsize=100):
+        subscription = super().subscribe(topics, maxsize)
+        loop = subscription.loop
+        task = self._listeners.get(loop)
+        if task is None or task.done():
+            self._listeners[loop] = loop.create_task(self._listen())
+        return subscription
+
+    def publish(self, topic, event):
+        line = (json.dumps({"topic": topic, "event": event}, default=str) + "\n").encode()
+        with self._publish_lock:
+            for attempt in range(2):
+                try:
+                    if self._publish_socket is None:
+                        self._publish_socket = socket.create_connection((self.host, self.port), timeout=2)
+                        self._publish_socket.sendall(b"PUB\n")
+                    self._publish_socket.sendall(line)
+                    return
+                except OSError:
+                    if self._publish_socket is not None:
+                        self._publish_socket.close()
+                    self._publish_socket = None
+            # broker down: still serve this process's own subscribers
+            self.dispatch(topic, event)
+
+    async def _listen(self):
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+                writer.write(b"SUB\n")
+                await writer.drain()
+                while line := await reader.readline():
+                    message = json.loads(line)
+                    self.dispatch(message["topic"], message["event"])
+            except (OSError, ValueError, KeyError):
+                pass
+            await asyncio.sleep(self.reconnect_delay)
+
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def get_bus():
+    global _bus
+    if _bus is None:
+        with _bus_lock:
+            if _bus is None:
+                url = getattr(settings, "EVENTS_BROKER_URL", None)
+                if url:
+                    parsed = urlparse(url)
+                    _bus = BrokerEventBus(parsed.hostname, parsed.port)
+                else:
+                    _bus = LocalEventBus()
+    return _bus
+
+
+def publish_after_commit(model, topics, event):
+    """Publish once the surrounding transaction (if any) commits."""
+    bus = get_bus()
+
+    def send():
+        for topic in topics:
+            bus.publish(topic, event)
+
+    transaction.on_commit(send, using=router.db_for_write(model))
+
+
+def _student_users(student_ids):
+    from .models import Student
+    return dict(Student.objects.filter(pk__in=student_ids).values_list("pk", "user_id"))
+
+
+def notify_grade_changes(developer_id, changes):
+    """
+    changes: dicts with submission, assignment, student, grade, previous_grade.
+    Each event goes to the student and to the course instructor.
+    """
+    from .models import Assignment, Submission
+    if not changes:
+        return
+    students = _student_users({c["student"] for c in changes})
+    assignments = {
+        pk: (course_id, instructor_user_id)
+        for pk, course_id, instructor_user_id in Assignment.objects
+        .filter(pk__in={c["assignment"] for c in changes})
+        .values_list("pk", "course_id", "course__instructor__user_id")
+    }
+    for change in changes:
+        course_id, instructor_user_id = assignments.get(change["assignment"], (None, None))
+        event = {"type": "grade", "course": course_id, **change}
+        topics = [user_topic(developer_id, uid)
+                  for uid in {students.get(change["student"]), instructor_user_id} if uid]
+        publish_after_commit(Submission, topics, event)
+
+
+def notify_progress_changes(developer_id, changes):
+    """changes: dicts with progress, lesson, student, completed."""
+    from .models import Lesson, Progress
+    if not changes:
+        return
+    students = _student_users({c["student"] for c in changes})
+    lessons = {
+        pk: (course_id, instructor_user_id)
+        for pk, course_id, instructor_user_id in Lesson.objects
+        .filter(pk__in={c["lesson"] for c in changes})
+        .values_list("pk", "course_id", "course__instructor__user_id")
+    }
+    for change in changes:
+        course_id, instructor_user_id = lessons.get(change["lesson"], (None, None))
+        event = {"type": "progress", "course": course_id, **change}
+        topics = [user_topic(developer_id, uid)
+                  for uid in {students.get(change["student"]), instructor_user_id} if uid]
+        publish_after_commit(Progress, topics, event)
+
+
+def format_sse(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
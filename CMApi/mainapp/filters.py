@@ -0,0 +1,64 @@
+# mainapp/filters.py
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+
+def _split(value):
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+class CourseCatalogFilter(BaseFilterBackend):
+    """
+    Query-string filters for the course catalog:
+
+    ?category=Math,Science    ?level=beginner,advanced    ?is_active=true
+    ?start_date_after=2025-01-01&start_date_before=2025-06-30
+    ?end_date_after=...&end_date_before=...               (inclusive)
+
+    Every filter is backed by one of the (developer, ...) indexes on Course.
+    """
+    bool_values = {"true": True, "1": True, "yes": True, "false": False, "0": False, "no": False}
+    date_params = {
+        "start_date_after": "start_date__gte",
+        "start_date_before": "start_date__lte",
+        "end_date_after": "end_date__gte",
+        "end_date_before": "end_date__lte",
+    }
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        errors = {}
+
+        if params.get("category"):
+            queryset = queryset.filter(category__in=_split(params["category"]))
+
+        if params.get("level"):
+            levels = _split(params["level"])
+            valid = {value for value, _ in queryset.model._meta.get_field("level").choices}
+            unknown = set(levels) - valid
+            if unknown:
+                errors["level"] = f"unknown level: {', '.join(sorted(unknown))}"
+            queryset = queryset.filter(level__in=levels)
+
+        if params.get("is_active"):
+            value = self.bool_values.get(params["is_active"].lower())
+            if value is None:
+                errors["is_active"] = "must be true or false."
+            else:
+                queryset = queryset.filter(is_active=value)
+
+        for param, lookup in self.date_params.items():
+            if params.get(param):
+                try:
+                    day = parse_date(params[param])
+                except ValueError:
+                    day = None
+                if day is None:
+                    errors[param] = "must be a date (YYYY-MM-DD)."
+                else:
+                    queryset = queryset.filter(**{lookup: day})
+
+        if errors:
+            raise ValidationError(errors)
+        return queryset
@@ -0,0 +1,114 @@
+# mainapp/gradebook.py
+"""
+Course gradebook: students x assignments.
+
+``gradebook`` pivots a single Submission query into a NumPy matrix (NaN for
+"no grade") and computes the per-assignment statistics column-wise.
+``iter_csv_rows`` streams the same matrix for CSV export by merging the roster
+and the submissions, both ordered by student, so memory stays at one row.
+"""
+import warnings
+
+import numpy as np
+
+from .models import Assignment, Student, Submission
+
+QUANTILES = (0.25, 0.5, 0.75)
+
+
+def _assignments(course):
+    return list(Assignment.objects.filter(course=course).order_by("due_date", "pk").values_list("pk", "title"))
+
+
+def _roster(course):
+    return (
+        Student.objects.filter(courses=course).order_by("pk")
+        .values_list("pk", "user__username", "user__first_name", "user__last_name")
+    )
+
+
+def _grades(course):
+    # later submissions for the same (student, assignment) overwrite earlier ones
+    return (
+        Submission.objects.filter(assignment__course=course)
+        .order_by("student_id", "submitted_at", "pk")
+        .values_list("student_id", "assignment_id", "grade")
+    )
+
+
+def _student_name(username, first_name, last_name):
+    return f"{first_name} {last_name}".strip() or username or ""
+
+
+def _number(value):
+    return None if np.isnan(value) else round(float(value), 2)
+
+
+def column_stats(matrix):
+    """Per-column count/mean/median/stddev/quantiles/min/max, ignoring NaN."""
+    if not matrix.shape[1]:
+        # nanquantile of an (n, 0) matrix cannot be unpacked per quantile
+        return []
+    if not matrix.shape[0]:
+        return [{"graded": 0} for _ in range(matrix.shape[1])]
+    counts = np.count_nonzero(~np.isnan(matrix), axis=0)
+    with warnings.catch_warnings():
+        # all-NaN columns (ungraded assignments) just yield NaN
+        warnings.simplefilter("ignore", RuntimeWarning)
+        mean = np.nanmean(matrix, axis=0)
+        std = np.nanstd(matrix, axis=0)
+        low, median, high = np.nanquantile(matrix, QUANTILES, axis=0)
+        minimum = np.nanmin(matrix, axis=0)
+        maximum = np.nanmax(matrix, axis=0)
+    return [
+        {
+            "graded": int(counts[j]), "mean": _number(mean[j]), "median": _number(median[j]),
+            "stddev": _number(std[j]), "p25": _number(low[j]), "p75": _number(high[j]),
+            "min": _number(minimum[j]), "max": _number(maximum[j]),
+        }
+        for j in range(matrix.shape[1])
+    ]
+
+
+def gradebook(course):
+    assignments = _assignments(course)
+    roster = list(_roster(course))
+    student_index = {row[0]: i for i, row in enumerate(roster)}
+    assignment_index = {pk: j for j, (pk, _) in enumerate(assignments)}
+
+    matrix = np.full((len(roster), len(assignments)), np.nan)
+    for student_id, assignment_id, grade in _grades(course):
+        i = student_index.get(student_id)
+        if i is not None and grade is not None:
+            matrix[i, assignment_index[assignment_id]] = grade
+
+    stats = column_stats(matrix)
+    return {
+        "course": course.pk,
+        "assignments": [
+            {"id": pk, "title": title, "stats": stat} for (pk, title), stat in zip(assignments, stats)
+        ],
+        "students": [{"id": pk, "name": _student_name(*names)} for pk, *names in roster],
+        # grades[i][j]: student i, assignment j; null = not submitted or not graded
+        "grades": [[_number(value) for value in row] for row in matrix],
+    }
+
+
+def iter_csv_rows(course, chunk_size=2000):
+    """Header, then one row per student; roster and grades are merged as they stream."""
+    assignments = _assignments(course)
+    assignment_index = {pk: j for j, (pk, _) in enumerate(assignments)}
+    yield ["student_id", "student"] + [title for _, title in assignments]
+
+    grades = iter(_grades(course).iterator(chunk_size=chunk_size))
+    pending = next(grades, None)
+    for student_id, *names in _roster(course).iterator(chunk_size=chunk_size):
+        row = [""] * len(assignments)
+        # skip submissions of students no longer on the roster
+        while pending is not None and pending[0] < student_id:
+            pending = next(grades, None)
+        while pending is not None and pending[0] == student_id:
+            if pending[2] is not None:
+                row[assignment_index[pending[1]]] = str(pending[2])
+            pending = next(grades, None)
+        yield [student_id, _student_name(*names)] + row
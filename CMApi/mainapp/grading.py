@@ -0,0 +1,70 @@
+# mainapp/grading.py
+"""
+Bulk grading: one ownership query, one bulk_update, one transaction.
+post_save does not fire for bulk_update, so the change feed and /api/events/
+hear about new grades through ``signals.bulk_saved``.
+"""
+from django.db import router, transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import Submission
+from .signals import bulk_saved
+
+MAX_GRADES_PER_REQUEST = 5000
+
+# same bounds as Submission.grade
+grade_field = serializers.DecimalField(max_digits=5, decimal_places=2, allow_null=True)
+
+
+def bulk_grade(developer, user, grades):
+    """
+    Apply {submission_id: grade} for ``user`` (course instructor or superuser).
+    Returns (updated, unchanged, errors); nothing is written when ``errors``
+    (submission id -> message) is not empty.
+    """
+    errors, parsed = {}, {}
+    for key, value in grades.items():
+        try:
+            submission_id = int(key)
+        except (TypeError, ValueError):
+            errors[key] = "Submission ids must be integers."
+            continue
+        try:
+            parsed[submission_id] = grade_field.run_validation(value)
+        except serializers.ValidationError as exc:
+            errors[key] = exc.detail[0] if isinstance(exc.detail, list) else exc.detail
+
+    # one query: which of these submissions may this user grade?
+    submissions = Submission.objects.filter(developer=developer, pk__in=list(parsed))
+    if not user.is_superuser:
+        teacher = getattr(user, "teacher", None)
+        submissions = submissions.filter(assignment__course__instructor=teacher) if teacher else submissions.none()
+    current = {
+        pk: (assignment_id, student_id, grade)
+        for pk, assignment_id, student_id, grade in
+        submissions.values_list("pk", "assignment_id", "student_id", "grade")
+    }
+    for submission_id in parsed:
+        if submission_id not in current:
+            errors[str(submission_id)] = "Submission not found in your courses."
+    if errors:
+        return 0, 0, errors
+
+    now = timezone.now()
+    rows, changes = [], []
+    for submission_id, grade in parsed.items():
+        assignment_id, student_id, previous = current[submission_id]
+        if grade == previous:
+            continue
+        rows.append(Submission(pk=submission_id, grade=grade, updated_at=now))
+        changes.append({
+            "submission": submission_id, "assignment": assignment_id, "student": student_id,
+            "grade": grade, "previous_grade": previous,
+        })
+    with transaction.atomic(using=router.db_for_write(Submission)):
+        Submission.objects.bulk_update(rows, ["grade", "updated_at"], batch_size=500)
+        bulk_saved.send(
+            sender=Submission, developer_id=developer.pk, ids=[row.pk for row in rows], changes=changes,
+        )
+    return len(rows), len(parsed) - len(rows), {}
@@ -0,0 +1,227 @@
+# mainapp/leaderboard.py
+"""
+Course leaderboards: rank by average grade, then completed lessons.
+
+``LeaderboardEntry`` rows are the source of truth. They are recomputed only
+for the (course, student) pairs that a grade or progress change touches:
+two small aggregate queries, no course-wide ORDER BY.
+
+Reads use an in-process ``CourseBoard``, a ``SortedList`` of rank keys
+(sortedcontainers). Moving a student and looking up a rank are O(log n);
+top-N and "my rank +- k" are slices.
+Each board carries the course's version number from the cache. The process
+that commits a change applies the delta to its own board and bumps the
+version; any other process sees the new version and reloads its board from
+the table on the next read. Version keys are per shard and expire after
+LEADERBOARD_VERSION_SECONDS. A new version starts from the clock, so a
+worker that missed a bump (no shared cache, see CACHE_URL) reloads its
+board within that time.
+"""
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router, transaction
+from django.db.models import Avg, Count
+from sortedcontainers import SortedList
+
+from accounts.sharding import current_shard
+from .gradebook import _student_name
+from .models import Course, LeaderboardEntry, Progress, Student, Submission
+
+Enrollment = Course.students.through
+MAX_BOARDS = 256
+
+_boards = OrderedDict()
+_boards_lock = threading.Lock()
+
+
+def rank_key(student_id, average_grade, completed_lessons):
+    """Sort key, best first: graded before ungraded, higher average, more lessons, lower id."""
+    return (average_grade is None, -(average_grade or 0.0), -completed_lessons, student_id)
+
+
+class CourseBoard:
+    def __init__(self, version, standings):
+        self.version = version
+        self.lock = threading.Lock()
+        self.keys = SortedList(rank_key(pk, *standing) for pk, standing in standings.items())
+        self.by_student = {key[3]: key for key in self.keys}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def update(self, student_id, standing):
+        """standing: (average_grade, completed_lessons), or None to drop the student."""
+        old = self.by_student.pop(student_id, None)
+        if old is not None:
+            self.keys.remove(old)
+        if standing is not None:
+            key = rank_key(student_id, *standing)
+            self.keys.add(key)
+            self.by_student[student_id] = key
+
+    def rank(self, student_id):
+        key = self.by_student.get(student_id)
+        return None if key is None else self.keys.bisect_left(key) + 1
+
+    def top(self, n):
+        return 1, self.keys[:n]
+
+    def around(self, student_id, k):
+        rank = self.rank(student_id)
+        if rank is None:
+            return None, []
+        start = max(0, rank - 1 - k)
+        return start + 1, self.keys[start:rank + k]
+
+
+def _version_key(alias, course_id):
+    return f"leaderboard:v:{alias}:{course_id}"
+
+
+def _version_timeout():
+    return getattr(settings, "LEADERBOARD_VERSION_SECONDS", 60)
+
+
+def _new_version():
+    # never equal to a version an existing board was built from
+    return time.time_ns()
+
+
+def _standing(average_grade, completed_lessons):
+    return (None if average_grade is None else float(average_grade), completed_lessons)
+
+
+def _load(course_id):
+    roster = Enrollment.objects.filter(course_id=course_id).values_list("student_id", flat=True)
+    entries = {
+        student_id: (average_grade, completed)
+        for student_id, average_grade, completed in LeaderboardEntry.objects.filter(course_id=course_id)
+        .values_list("student_id", "average_grade", "completed_lessons")
+    }
+    return {pk: _standing(*entries.get(pk, (None, 0))) for pk in roster}
+
+
+def get_board(course_id):
+    alias = current_shard()
+    version = cache.get_or_set(_version_key(alias, course_id), _new_version, timeout=_version_timeout())
+    key = (alias, course_id)
+    with _boards_lock:
+        board = _boards.get(key)
+        if board is not None:
+            _boards.move_to_end(key)
+    if board is None or board.version != version:
+        board = CourseBoard(version, _load(course_id))
+        with _boards_lock:
+            _boards[key] = board
+            while len(_boards) > MAX_BOARDS:
+                _boards.popitem(last=False)
+    return board
+
+
+def _publish(alias, course_id, updates):
+    """After commit: bump the version; patch this process's board if it was current."""
+    version_key = _version_key(alias, course_id)
+    try:
+        version = cache.incr(version_key)
+    except ValueError:
+        cache.add(version_key, _new_version(), timeout=_version_timeout())
+        version = None
+    with _boards_lock:
+        board = _boards.get((alias, course_id))
+    if board is None:
+        return
+    with board.lock:
+        if updates is not None and version is not None and board.version == version - 1:
+            for student_id, standing in updates.items():
+                board.update(student_id, standing)
+            board.version = version
+            return
+    with _boards_lock:
+        _boards.pop((alias, course_id), None)
+
+
+def _on_commit(course_id, updates):
+    alias = current_shard()
+    transaction.on_commit(
+        lambda: _publish(alias, course_id, updates), using=router.db_for_write(LeaderboardEntry),
+    )
+
+
+def refresh(developer_id, course_id, student_ids):
+    """Recompute the entries of these students in one course."""
+    if course_id is None:
+        return
+    student_ids = set(student_ids)
+    enrolled = set(
+        Enrollment.objects.filter(course_id=course_id, student_id__in=student_ids)
+        .values_list("student_id", flat=True)
+    )
+    grades = {
+        row["student_id"]: (row["average"], row["graded"])
+        for row in Submission.objects.filter(
+            assignment__course_id=course_id, student_id__in=enrolled, grade__isnull=False,
+        ).values("student_id").annotate(average=Avg("grade"), graded=Count("pk")).order_by()
+    }
+    completed = dict(
+        Progress.objects.filter(lesson__course_id=course_id, student_id__in=enrolled, completed=True)
+        .values("student_id").annotate(n=Count("pk")).order_by().values_list("student_id", "n")
+    )
+
+    rows, updates = [], {}
+    for student_id in enrolled:
+        average, graded = grades.get(student_id, (None, 0))
+        if average is not None:
+            average = Decimal(average).quantize(Decimal("0.01"))
+        rows.append(LeaderboardEntry(
+            developer_id=developer_id, course_id=course_id, student_id=student_id,
+            average_grade=average, graded_count=graded, completed_lessons=completed.get(student_id, 0),
+        ))
+        updates[student_id] = _standing(average, completed.get(student_id, 0))
+    with transaction.atomic(using=router.db_for_write(LeaderboardEntry)):
+        LeaderboardEntry.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=["course", "student"],
+            update_fields=["average_grade", "graded_count", "completed_lessons", "updated_at"],
+        )
+        gone = student_ids - enrolled
+        if gone:
+            LeaderboardEntry.objects.filter(course_id=course_id, student_id__in=gone).delete()
+            updates.update(dict.fromkeys(gone))
+        _on_commit(course_id, updates)
+
+
+def invalidate(course_id):
+    """Roster changes: reload the board from the table on next read."""
+    if course_id is not None:
+        _on_commit(course_id, None)
+
+
+def rebuild(courses):
+    """Recompute every entry of the given courses; returns rows written."""
+    written = 0
+    for course_id, developer_id in courses.values_list("pk", "developer_id"):
+        roster = set(Enrollment.objects.filter(course_id=course_id).values_list("student_id", flat=True))
+        stale = set(LeaderboardEntry.objects.filter(course_id=course_id).values_list("student_id", flat=True))
+        refresh(developer_id, course_id, roster | stale)
+        written += len(roster)
+    return written
+
+
+def describe(first_rank, keys):
+    """Response rows for a slice of a board; one query for the names."""
+    names = {
+        pk: _student_name(*rest)
+        for pk, *rest in Student.objects.filter(pk__in=[key[3] for key in keys])
+        .values_list("pk", "user__username", "user__first_name", "user__last_name")
+    }
+    return [
+        {
+            "rank": first_rank + i, "student": key[3], "name": names.get(key[3], ""),
+            "average_grade": None if key[0] else round(-key[1], 2), "completed_lessons": -key[2],
+        }
+        for i, key in enumerate(keys)
+    ]
@@ -0,0 +1,65 @@
+# mainapp/management/commands/bench_batch.py
+import io
+from contextlib import redirect_stdout
+
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import ApiKey
+from mainapp.bench_utils import fresh_bench_developer, drop_bench_developer, timer, summarize
+from mainapp.models import Course
+from mainapp.seed_utils import seed_into_developer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare a course-page render done as separate API calls with the same "
+        "calls through /api/batch/ (sequential and parallel), authenticated by JWT."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rounds", type=int, default=50)
+        parser.add_argument("--students", type=int, default=20)
+        parser.add_argument("--keep", action="store_true")
+
+    def handle(self, *args, **o):
+        developer = fresh_bench_developer("__bench_batch__")
+        try:
+            seed_into_developer(developer, student_count=o["students"], teacher_count=2, guest_count=0)
+            _, raw_key = ApiKey.create_for_dev(developer)
+            course = Course.objects.filter(developer=developer).exclude(students=None).first()
+            student_user = course.students.first().user
+
+            client = APIClient()
+            client.credentials(
+                HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(student_user).access_token}",
+                HTTP_X_API_KEY=raw_key,
+            )
+            paths = [
+                f"/api/courses/{course.pk}/",
+                f"/api/lessons/?course={course.pk}",
+                f"/api/assignments/?course={course.pk}",
+                f"/api/course-materials/?course={course.pk}",
+                "/api/progress/",
+            ]
+            batch = [{"method": "GET", "path": path} for path in paths]
+
+            separate_ms, batch_ms, parallel_ms = [], [], []
+            with redirect_stdout(io.StringIO()):
+                for _ in range(o["rounds"]):
+                    with timer(separate_ms):
+                        for path in paths:
+                            assert client.get(path).status_code == 200
+                    with timer(batch_ms):
+                        response = client.post("/api/batch/", {"requests": batch}, format="json")
+                    assert response.status_code == 200, response.content
+                    with timer(parallel_ms):
+                        client.post("/api/batch/", {"requests": batch, "parallel": True}, format="json")
+
+            self.stdout.write(f"{len(paths)} separate calls : {summarize(separate_ms)}")
+            self.stdout.write(f"batch (sequential)  : {summarize(batch_ms)}")
+            self.stdout.write(f"batch (parallel)    : {summarize(parallel_ms)}")
+        finally:
+            if not o["keep"]:
+                drop_bench_developer(developer)
@@ -0,0 +1,127 @@
+# mainapp/management/commands/bench_changes.py
+import io
+import random
+from contextlib import redirect_stdout
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import ApiKey
+from mainapp.bench_utils import fresh_bench_developer, drop_bench_developer, timer, summarize
+from mainapp.models import (
+    Teacher, Student, Course, Lesson, Assignment, CourseMaterial, Submission, Progress,
+)
+
+User = get_user_model()
+
+FULL_REFETCH = [
+    "/api/courses/", "/api/lessons/", "/api/assignments/",
+    "/api/course-materials/", "/api/submissions/", "/api/progress/",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare a client sync through /api/changes/ with refetching every collection: "
+        "bytes on the wire and latency, on a synthetic workspace."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--courses", type=int, default=10)
+        parser.add_argument("--students", type=int, default=100)
+        parser.add_argument("--lessons", type=int, default=20, help="per course")
+        parser.add_argument("--assignments", type=int, default=5, help="per course")
+        parser.add_argument("--edits", type=int, default=25, help="rows changed between syncs")
+        parser.add_argument("--rounds", type=int, default=5)
+        parser.add_argument("--keep", action="store_true")
+
+    def handle(self, *args, **o):
+        rng = random.Random(7)
+        developer = fresh_bench_developer("__bench_changes__")
+        try:
+            client = self._build_workspace(developer, o)
+            full_ms, delta_ms, full_bytes, delta_bytes = [], [], [], []
+            with override_settings(CHANGE_FEED_SETTLE_SECONDS=0), redirect_stdout(io.StringIO()):
+                cursor = client.get("/api/changes/").data["cursor"]
+                for _ in range(o["rounds"]):
+                    self._edit(developer, rng, o["edits"])
+
+                    size = 0
+                    with timer(full_ms):
+                        for url in FULL_REFETCH:
+                            size += len(client.get(url).content)
+                    full_bytes.append(size)
+
+                    size = 0
+                    with timer(delta_ms):
+                        has_more = True
+                        while has_more:
+                            response = client.get("/api/changes/", {"since": cursor})
+                            size += len(response.content)
+                            cursor, has_more = response.data["cursor"], response.data["has_more"]
+                    delta_bytes.append(size)
+
+            self.stdout.write(f"full refetch: {summarize(full_ms)}  bytes/sync={sum(full_bytes) // len(full_bytes)}")
+            self.stdout.write(f"change feed : {summarize(delta_ms)}  bytes/sync={sum(delta_bytes) // len(delta_bytes)}")
+        finally:
+            if not o["keep"]:
+                drop_bench_developer(developer)
+
+    def _build_workspace(self, developer, o):
+        _, raw_key = ApiKey.create_for_dev(developer)
+        teacher_user = User.objects.create_user(username="__bench_changes__teacher", role="teacher")
+        teacher = Teacher.objects.create(developer=developer, user=teacher_user, specialization="x", experience=1)
+        students = Student.objects.bulk_create(
+            [Student(developer=developer, age=20) for _ in range(o["students"])]
+        )
+        today = timezone.now().date()
+        courses = Course.objects.bulk_create([
+            Course(developer=developer, instructor=teacher, title=f"Bench {i}", description="d",
+                   start_date=today, end_date=today, duration=1, level="beginner")
+            for i in range(o["courses"])
+        ])
+        Course.students.through.objects.bulk_create([
+            Course.students.through(course_id=c.pk, student_id=s.pk) for c in courses for s in students
+        ], batch_size=1000)
+        lessons = Lesson.objects.bulk_create([
+            Lesson(developer=developer, course=c, title=f"Lesson {n}", content="lorem ipsum " * 40, order=n)
+            for c in courses for n in range(o["lessons"])
+        ], batch_size=1000)
+        assignments = Assignment.objects.bulk_create([
+            Assignment(developer=developer, course=c, title=f"Assignment {n}", description="d",
+                       due_date=timezone.now())
+            for c in courses for n in range(o["assignments"])
+        ], batch_size=1000)
+        CourseMaterial.objects.bulk_create([
+            CourseMaterial(developer=developer, course=c, title="Slides", file="course_materials/slides.pdf")
+            for c in courses
+        ])
+        Submission.objects.bulk_create([
+            Submission(developer=developer, assignment=a, student=s, file="submissions/x.txt")
+            for a in assignments for s in students
+        ], batch_size=1000)
+        Progress.objects.bulk_create([
+            Progress(developer=developer, lesson=lesson, student=s)
+            for lesson in lessons[: o["lessons"]] for s in students
+        ], batch_size=1000)
+
+        client = APIClient()
+        client.force_authenticate(teacher_user)
+        client.defaults["HTTP_X_API_KEY"] = raw_key
+        return client
+
+    def _edit(self, developer, rng, edits):
+        """A realistic mix: graded submissions, completed lessons, edited lessons."""
+        submissions = list(Submission.objects.filter(developer=developer).order_by("?")[:edits // 2])
+        for submission in submissions:
+            submission.grade = rng.randint(50, 100)
+            submission.save()
+        for progress in Progress.objects.filter(developer=developer).order_by("?")[:edits // 3]:
+            progress.completed = True
+            progress.save()
+        for lesson in Lesson.objects.filter(developer=developer).order_by("?")[:max(1, edits // 6)]:
+            lesson.title = f"{lesson.title}*"
+            lesson.save()
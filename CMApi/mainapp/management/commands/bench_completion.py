@@ -0,0 +1,92 @@
+# mainapp/management/commands/bench_completion.py
+import random
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from mainapp import analytics
+from mainapp.bench_utils import fresh_bench_developer, drop_bench_developer, timer, summarize
+from mainapp.models import Course, Lesson, Progress, Student
+
+User = get_user_model()
+
+
+def naive_completion(course):
+    """The ORM way: model instances and nested dicts, one Python object per cell."""
+    students = list(course.students.order_by("pk"))
+    lessons = list(course.lessons.order_by("order", "pk"))
+    done = {}
+    for progress in Progress.objects.filter(lesson__course=course):
+        if progress.completed:
+            done.setdefault(progress.student_id, set()).add(progress.lesson_id)
+    per_student = [len(done.get(s.pk, ())) / len(lessons) for s in students]
+    per_lesson = [sum(1 for s in students if lesson.pk in done.get(s.pk, ())) / len(students) for lesson in lessons]
+    return per_student, per_lesson, sum(per_student) / len(students)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark /api/courses/{id}/completion/ on a synthetic course "
+        "(default 5k students x 200 lessons): ORM loop vs NumPy vs cached."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=5000)
+        parser.add_argument("--lessons", type=int, default=200)
+        parser.add_argument("--fill", type=float, default=0.6, help="share of cells with a progress row")
+        parser.add_argument("--rounds", type=int, default=3)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--keep", action="store_true")
+
+    def handle(self, *args, **o):
+        rng = random.Random(3)
+        developer = fresh_bench_developer("__bench_completion__")
+        try:
+            today = timezone.now().date()
+            course = Course.objects.create(
+                developer=developer, title="Bench completion", description="d",
+                start_date=today, end_date=today, duration=1, level="beginner",
+            )
+            students = Student.objects.bulk_create(
+                [Student(developer=developer, age=20) for _ in range(o["students"])], batch_size=o["batch_size"],
+            )
+            Course.students.through.objects.bulk_create(
+                [Course.students.through(course_id=course.pk, student_id=s.pk) for s in students],
+                batch_size=o["batch_size"],
+            )
+            lessons = Lesson.objects.bulk_create([
+                Lesson(developer=developer, course=course, title=f"Lesson {n}", content="x", order=n)
+                for n in range(o["lessons"])
+            ])
+            batch = []
+            for student in students:
+                for lesson in lessons:
+                    if rng.random() < o["fill"]:
+                        batch.append(Progress(developer=developer, student_id=student.pk, lesson_id=lesson.pk,
+                                              completed=rng.random() < 0.7))
+                if len(batch) >= o["batch_size"]:
+                    Progress.objects.bulk_create(batch)
+                    batch = []
+            Progress.objects.bulk_create(batch)
+            cells = o["students"] * o["lessons"]
+            self.stdout.write(f"{o['students']} students x {o['lessons']} lessons = {cells} cells")
+
+            naive_ms, numpy_ms, cached_ms = [], [], []
+            for _ in range(o["rounds"]):
+                with timer(naive_ms):
+                    expected = naive_completion(course)
+                with timer(numpy_ms):
+                    result = analytics.compute_completion(course)
+                analytics.course_completion(course)
+                with timer(cached_ms):
+                    analytics.course_completion(course)
+            assert abs(result["overall"] - expected[2]) < 1e-3, (result["overall"], expected[2])
+
+            self.stdout.write(f"ORM loop : {summarize(naive_ms)}")
+            self.stdout.write(f"NumPy    : {summarize(numpy_ms)}")
+            self.stdout.write(f"cached   : {summarize(cached_ms)}")
+            self.stdout.write(f"overall completion: {result['overall']}")
+        finally:
+            if not o["keep"]:
+                drop_bench_developer(developer)
@@ -0,0 +1,103 @@
+# mainapp/management/commands/bench_enrollment.py
+import io
+import threading
+import time
+from collections import Counter
+from contextlib import redirect_stdout
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import ApiKey
+from mainapp.bench_utils import fresh_bench_developer, drop_bench_developer, summarize
+from mainapp.models import Course, CourseWaitlistEntry, Student, Teacher
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Contention benchmark for capped self-enrollment: many threads POST "
+        "/api/courses/{id}/enroll/ at once; reports throughput and checks that "
+        "the course is never overbooked."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=500)
+        parser.add_argument("--capacity", type=int, default=100)
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--keep", action="store_true")
+
+    def handle(self, *args, **o):
+        developer = fresh_bench_developer("__bench_enrollment__")
+        try:
+            _, raw_key = ApiKey.create_for_dev(developer)
+            teacher = Teacher.objects.create(
+                developer=developer, specialization="x", experience=1,
+                user=User.objects.create_user(username="__bench_enrollment__teacher", role="teacher"),
+            )
+            today = timezone.now().date()
+            course = Course.objects.create(
+                developer=developer, instructor=teacher, title="Popular course", description="d",
+                start_date=today, end_date=today, duration=1, level="beginner", capacity=o["capacity"],
+            )
+            users = User.objects.bulk_create([
+                User(username=f"__bench_enrollment__s{i}", role="student") for i in range(o["students"])
+            ])
+            Student.objects.bulk_create([Student(developer=developer, user=u, age=20) for u in users])
+
+            results = Counter()
+            latencies = []
+            lock = threading.Lock()
+            barrier = threading.Barrier(o["threads"])
+            url = f"/api/courses/{course.pk}/enroll/"
+
+            def worker(chunk):
+                client = APIClient()
+                client.defaults["HTTP_X_API_KEY"] = raw_key
+                mine, mine_ms = Counter(), []
+                try:
+                    barrier.wait()
+                    for user in chunk:
+                        client.force_authenticate(user)
+                        start = time.perf_counter()
+                        response = client.post(url, format="json")
+                        mine_ms.append(time.perf_counter() - start)
+                        mine[response.data.get("status", response.status_code)] += 1
+                finally:
+                    connections.close_all()
+                with lock:
+                    results.update(mine)
+                    latencies.extend(mine_ms)
+
+            chunks = [users[i::o["threads"]] for i in range(o["threads"])]
+            threads = [threading.Thread(target=worker, args=(chunk,)) for chunk in chunks]
+            with redirect_stdout(io.StringIO()):
+                started = time.perf_counter()
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                elapsed = time.perf_counter() - started
+
+            course.refresh_from_db()
+            roster = course.students.count()
+            waitlisted = CourseWaitlistEntry.objects.filter(course=course).count()
+            self.stdout.write(
+                f"{o['students']} signups on {o['threads']} threads in {elapsed:.2f}s "
+                f"({o['students'] / elapsed:.0f} req/s), latency {summarize(latencies)}"
+            )
+            self.stdout.write(f"responses: {dict(results)}")
+            self.stdout.write(
+                f"capacity={course.capacity} roster={roster} student_count={course.student_count} "
+                f"waitlisted={waitlisted}"
+            )
+            if roster > course.capacity or roster != course.student_count:
+                raise CommandError("Overbooked or counter out of sync.")
+            self.stdout.write(self.style.SUCCESS("No overbooking."))
+        finally:
+            if not o["keep"]:
+                drop_bench_developer(developer)
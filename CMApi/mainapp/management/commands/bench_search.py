@@ -0,0 +1,85 @@
+# mainapp/management/commands/bench_search.py
+import itertools
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from mainapp.bench_utils import fresh_bench_developer, drop_bench_developer, timer, summarize
+from mainapp.models import Course, Lesson
+from mainapp.search import rebuild_index, search
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark /api/search/ ranking against an icontains scan on a synthetic "
+        "workspace (default: 1M lessons). Uses a throw-away developer account."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lessons", type=int, default=1_000_000)
+        parser.add_argument("--courses", type=int, default=200)
+        parser.add_argument("--vocabulary", type=int, default=20_000)
+        parser.add_argument("--words", type=int, default=40, help="words per lesson body")
+        parser.add_argument("--queries", type=int, default=50)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--keep", action="store_true", help="keep the benchmark data")
+
+    def handle(self, *args, **o):
+        rng = random.Random(o["seed"])
+        vocab = [f"w{i:05d}" for i in range(o["vocabulary"])]
+        # zipf-ish: a few words are very common, most are rare
+        weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocab))))
+
+        developer = fresh_bench_developer("__bench_search__")
+        today = timezone.now().date()
+        try:
+            Course.objects.bulk_create([
+                Course(developer=developer, title=f"Course {i} {' '.join(rng.choices(vocab, cum_weights=weights, k=3))}",
+                       description=" ".join(rng.choices(vocab, cum_weights=weights, k=30)),
+                       start_date=today, end_date=today, duration=1, level="beginner")
+                for i in range(o["courses"])
+            ])
+            course_ids = list(Course.objects.filter(developer=developer).values_list("pk", flat=True))
+
+            started = time.perf_counter()
+            batch = []
+            for i in range(o["lessons"]):
+                batch.append(Lesson(
+                    developer=developer, course_id=course_ids[i % len(course_ids)], order=i,
+                    title=" ".join(rng.choices(vocab, cum_weights=weights, k=4)),
+                    content=" ".join(rng.choices(vocab, cum_weights=weights, k=o["words"])),
+                ))
+                if len(batch) >= o["batch_size"]:
+                    Lesson.objects.bulk_create(batch)
+                    batch = []
+            if batch:
+                Lesson.objects.bulk_create(batch)
+            self.stdout.write(f"Inserted {o['lessons']} lessons in {time.perf_counter() - started:.1f}s")
+
+            started = time.perf_counter()
+            postings = rebuild_index(developer, batch_size=o["batch_size"])
+            self.stdout.write(f"Indexed {postings} postings in {time.perf_counter() - started:.1f}s")
+
+            # mid-frequency terms: common enough to match, rare enough to matter
+            pool = vocab[50:2000]
+            queries = [" ".join(rng.sample(pool, rng.choice([1, 2]))) for _ in range(o["queries"])]
+            indexed, scanned = [], []
+            for q in queries:
+                with timer(indexed):
+                    search(developer, q, limit=20)
+                cond = Q()
+                for term in q.split():
+                    cond |= Q(title__icontains=term) | Q(content__icontains=term)
+                with timer(scanned):
+                    # a scan has to see every match before it can rank them
+                    list(Lesson.objects.filter(cond, developer=developer).values_list("pk", "title"))
+
+            self.stdout.write(f"indexed search: {summarize(indexed)}")
+            self.stdout.write(f"icontains scan: {summarize(scanned)}")
+        finally:
+            if not o["keep"]:
+                drop_bench_developer(developer)
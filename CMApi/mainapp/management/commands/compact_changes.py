@@ -0,0 +1,27 @@
+# mainapp/management/commands/compact_changes.py
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from accounts.sharding import pinned_shard, shard_aliases
+from mainapp.changefeed import compact
+
+
+class Command(BaseCommand):
+    help = (
+        "Compact the /api/changes/ log: drop entries superseded by a newer entry for "
+        "the same row and tombstones older than --tombstone-days."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tombstone-days", type=int, default=30)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        age = timedelta(days=options["tombstone_days"])
+        for alias in shard_aliases():
+            with pinned_shard(alias):
+                superseded, tombstones = compact(age, batch_size=options["batch_size"])
+            self.stdout.write(self.style.SUCCESS(
+                f"[{alias}] removed {superseded} superseded entries and {tombstones} old tombstones"
+            ))
@@ -0,0 +1,128 @@
+# mainapp/management/commands/dedupe_media.py
+import hashlib
+import os
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.core.files import File
+from django.core.files.storage import storages
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from accounts.sharding import pinned_shard, shard_aliases
+from mainapp.models import CourseMaterial, StoredBlob, Submission
+from mainapp.storage import BLOB_DIR, ContentAddressedStorage, is_blob_name
+
+FILE_MODELS = (Submission, CourseMaterial)
+
+
+def _digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _size(value):
+    if value < 1024:
+        return f"{value} B"
+    for unit in ("KiB", "MiB", "GiB", "TiB"):
+        value /= 1024
+        if value < 1024 or unit == "TiB":
+            return f"{value:.1f} {unit}"
+
+
+class Command(BaseCommand):
+    help = (
+        "Move uploads stored before content-addressed storage into the store (one file per "
+        "digest), point every row at its blob, recount references and report the space saved. "
+        "Run it once after migrating, ideally while uploads are paused."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="hash and report, change nothing")
+        parser.add_argument("--orphan-age", type=int, default=3600,
+                            help="seconds before an unreferenced blob is removed (default 3600)")
+
+    def handle(self, *args, **o):
+        storage = storages["default"]
+        if not isinstance(storage, ContentAddressedStorage):
+            raise CommandError("STORAGES['default'] is not mainapp.storage.ContentAddressedStorage.")
+
+        blob_bytes_before = StoredBlob.objects.aggregate(total=Sum("size"))["total"] or 0
+        files = missing = legacy_bytes = 0
+        dry_run_blobs = {}
+        for alias in shard_aliases():
+            with pinned_shard(alias):
+                for model in FILE_MODELS:
+                    references = defaultdict(list)
+                    rows = model.objects.exclude(file="").exclude(file__startswith=BLOB_DIR + "/")
+                    for pk, name in rows.values_list("pk", "file").iterator(chunk_size=2000):
+                        references[name].append(pk)
+                    for name, pks in references.items():
+                        path = storage.path(name)
+                        if not os.path.exists(path):
+                            missing += 1
+                            continue
+                        files += 1
+                        size = os.path.getsize(path)
+                        legacy_bytes += size
+                        if o["dry_run"]:
+                            dry_run_blobs[_digest(path)] = size
+                            continue
+                        with open(path, "rb") as f:
+                            blob = storage.store(File(f), name, references=len(pks))
+                        model.objects.filter(pk__in=pks).update(file=blob)
+                        storage.delete(name)
+            self.stdout.write(f"[{alias}] scanned")
+
+        if o["dry_run"]:
+            stored = sum(dry_run_blobs.values())
+            self.stdout.write(self.style.SUCCESS(
+                f"{files} legacy files ({_size(legacy_bytes)}) -> {len(dry_run_blobs)} blobs; "
+                f"would save about {_size(legacy_bytes - stored)} (before blobs already stored); "
+                f"{missing} missing"
+            ))
+            return
+
+        fixed, removed = self.recount(storage, o["orphan_age"])
+        blob_bytes_after = StoredBlob.objects.aggregate(total=Sum("size"))["total"] or 0
+        saved = legacy_bytes - (blob_bytes_after - blob_bytes_before)
+        self.stdout.write(self.style.SUCCESS(
+            f"{files} legacy files ({_size(legacy_bytes)}) moved into the store, {missing} missing; "
+            f"{fixed} reference counts repaired, {removed} orphaned blobs removed; saved {_size(saved)}"
+        ))
+
+    def recount(self, storage, orphan_age):
+        """Set every StoredBlob.refcount from the rows that point at it, on all shards."""
+        counts = Counter()
+        for alias in shard_aliases():
+            with pinned_shard(alias):
+                for model in FILE_MODELS:
+                    rows = (
+                        model.objects.filter(file__startswith=BLOB_DIR + "/")
+                        .values("file").annotate(n=Count("pk")).order_by().values_list("file", "n")
+                    )
+                    counts.update(dict(rows))
+        fixed = removed = 0
+        cutoff = timezone.now() - timedelta(seconds=orphan_age)
+        known = set()
+        for blob in StoredBlob.objects.iterator(chunk_size=2000):
+            known.add(blob.name)
+            count = counts.get(blob.name, 0)
+            if count == blob.refcount:
+                continue
+            if count == 0 and blob.created_at < cutoff:
+                # deleting the last reference removes the file as well
+                StoredBlob.objects.filter(pk=blob.pk).update(refcount=1)
+                storage.delete(blob.name)
+                removed += 1
+            elif count:
+                StoredBlob.objects.filter(pk=blob.pk).update(refcount=count)
+                fixed += 1
+        stray = [name for name in counts if is_blob_name(name) and name not in known]
+        if stray:
+            self.stderr.write(f"{len(stray)} rows point at blobs with no StoredBlob row, e.g. {stray[0]}")
+        return fixed, removed
@@ -0,0 +1,38 @@
+# mainapp/management/commands/export_workspace.py
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.sharding import developer_shard
+from mainapp.tenant_io import iter_export
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream a developer workspace (profiles, courses, lessons, assignments, submission "
+        "metadata, progress) as NDJSON, in dependency order. Import it with import_workspace."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("developer", help="Developer id or username")
+        parser.add_argument("--output", "-o", default="-", help="File to write (default: stdout)")
+
+    def handle(self, *args, **options):
+        value = options["developer"]
+        lookup = {"pk": int(value)} if value.isdigit() else {"username": value}
+        developer = User.objects.filter(**lookup).first()
+        if developer is None:
+            raise CommandError(f"Developer '{value}' not found.")
+
+        to_file = options["output"] != "-"
+        out = open(options["output"], "w", encoding="utf-8") if to_file else self.stdout
+        try:
+            with developer_shard(developer):
+                for line in iter_export(developer):
+                    out.write(line, ending="") if not to_file else out.write(line)
+        finally:
+            if to_file:
+                out.close()
+        if to_file:
+            self.stderr.write(self.style.SUCCESS(f"Exported {developer.username} to {options['output']}"))
@@ -0,0 +1,45 @@
+# mainapp/management/commands/import_workspace.py
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from accounts.sharding import developer_shard
+from mainapp.tenant_io import import_stream
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Import an export_workspace NDJSON file into a developer workspace. Rows get new ids; "
+        "accounts are created with unusable passwords. All or nothing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("developer", help="Target developer id or username")
+        parser.add_argument("input", help="NDJSON file ('-' for stdin)")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--username-suffix", default="",
+                            help="Appended to every imported username (to avoid clashes)")
+
+    def handle(self, *args, **options):
+        value = options["developer"]
+        lookup = {"pk": int(value)} if value.isdigit() else {"username": value}
+        developer = User.objects.filter(**lookup).first()
+        if developer is None:
+            raise CommandError(f"Developer '{value}' not found.")
+
+        source = sys.stdin if options["input"] == "-" else open(options["input"], encoding="utf-8")
+        try:
+            with developer_shard(developer):
+                counts = import_stream(developer, source, batch_size=options["batch_size"],
+                                       username_suffix=options["username_suffix"])
+        except ValidationError as error:
+            raise CommandError(f"Import failed, nothing was written: {error.detail}")
+        finally:
+            if source is not sys.stdin:
+                source.close()
+        summary = ", ".join(f"{kind}: {n}" for kind, n in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Imported into {developer.username}: {summary}"))
@@ -0,0 +1,24 @@
+# mainapp/management/commands/purge_uploads.py
+from django.core.management.base import BaseCommand
+
+from accounts.sharding import pinned_shard, shard_aliases
+from mainapp import uploads
+from mainapp.models import UploadSession
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete resumable uploads idle for longer than UPLOAD_SESSION_TTL_HOURS and "
+        "partial files left without a session. Run it periodically (e.g. hourly cron)."
+    )
+
+    def handle(self, *args, **options):
+        cutoff = uploads.stale_cutoff()
+        live_ids = set()
+        for alias in shard_aliases():
+            with pinned_shard(alias):
+                purged = uploads.purge_stale(cutoff)
+                live_ids.update(str(pk) for pk in UploadSession.objects.values_list("pk", flat=True))
+            self.stdout.write(f"[{alias}] {purged} stale uploads removed")
+        files = uploads.purge_stray_files(cutoff, live_ids)
+        self.stdout.write(self.style.SUCCESS(f"{files} stray partial files removed"))
@@ -0,0 +1,37 @@
+# mainapp/management/commands/rebuild_leaderboards.py
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.sharding import pinned_shard, shard_aliases, shard_for_developer
+from mainapp.leaderboard import rebuild
+from mainapp.models import Course
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every LeaderboardEntry from grades and progress. Run once after "
+        "migrating; afterwards the signals keep the entries up to date."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--developer", help="Developer id or username (default: every workspace)")
+
+    def handle(self, *args, **options):
+        developer = None
+        if options["developer"]:
+            value = options["developer"]
+            lookup = {"pk": int(value)} if value.isdigit() else {"username": value}
+            developer = User.objects.filter(**lookup).first()
+            if developer is None:
+                raise CommandError(f"Developer '{value}' not found.")
+
+        aliases = [shard_for_developer(developer.pk)] if developer else shard_aliases()
+        for alias in aliases:
+            with pinned_shard(alias):
+                courses = Course.objects.all()
+                if developer is not None:
+                    courses = courses.filter(developer=developer)
+                written = rebuild(courses)
+            self.stdout.write(self.style.SUCCESS(f"[{alias}] {written} leaderboard entries rebuilt"))
@@ -0,0 +1,34 @@
+# mainapp/management/commands/rebuild_search_index.py
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.sharding import developer_shard, pinned_shard, shard_aliases
+from mainapp.search import rebuild_index
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Rebuild the search postings for one developer (or every developer on every shard)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--developer", help="Developer id or username (default: all)")
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if options["developer"]:
+            value = options["developer"]
+            lookup = {"pk": int(value)} if value.isdigit() else {"username": value}
+            developer = User.objects.filter(**lookup).first()
+            if developer is None:
+                raise CommandError(f"Developer '{value}' not found.")
+            with developer_shard(developer):
+                written = rebuild_index(developer, batch_size=batch_size)
+            self.stdout.write(self.style.SUCCESS(f"Indexed {developer.username}: {written} postings"))
+            return
+
+        for alias in shard_aliases():
+            with pinned_shard(alias):
+                written = rebuild_index(batch_size=batch_size)
+            self.stdout.write(self.style.SUCCESS(f"Indexed shard '{alias}': {written} postings"))
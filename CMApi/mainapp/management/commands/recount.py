@@ -0,0 +1,35 @@
+# mainapp/management/commands/recount.py
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.sharding import pinned_shard, shard_aliases, shard_for_developer
+from mainapp.counters import recount
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Repair drift in the denormalized Course/Assignment counters by recounting "
+        "them from the source tables in bulk (only rows that differ are written)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--developer", help="Developer id or username (default: every workspace)")
+
+    def handle(self, *args, **options):
+        developer = None
+        if options["developer"]:
+            value = options["developer"]
+            lookup = {"pk": int(value)} if value.isdigit() else {"username": value}
+            developer = User.objects.filter(**lookup).first()
+            if developer is None:
+                raise CommandError(f"Developer '{value}' not found.")
+
+        aliases = [shard_for_developer(developer.pk)] if developer else shard_aliases()
+        for alias in aliases:
+            with pinned_shard(alias):
+                fixed = recount(developer)
+            drifted = {name: rows for name, rows in fixed.items() if rows}
+            summary = ", ".join(f"{name}: {rows}" for name, rows in drifted.items()) or "no drift"
+            self.stdout.write(self.style.SUCCESS(f"[{alias}] {summary}"))
@@ -0,0 +1,62 @@
+# mainapp/management/commands/run_event_broker.py
+import asyncio
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# a subscriber this far behind is dropped; it reconnects and carries on
+MAX_SUBSCRIBER_BUFFER = 1024 * 1024
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the local pub/sub broker behind /api/events/ for multi-process "
+        "deployments (set EVENTS_BROKER_URL=tcp://host:port on every worker)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--bind", default=None, help="host:port (default: from EVENTS_BROKER_URL or 127.0.0.1:8765)")
+
+    def handle(self, *args, **options):
+        if options["bind"]:
+            host, _, port = options["bind"].rpartition(":")
+        else:
+            parsed = urlparse(getattr(settings, "EVENTS_BROKER_URL", None) or "tcp://127.0.0.1:8765")
+            host, port = parsed.hostname, parsed.port
+        self.subscribers = set()
+        try:
+            asyncio.run(self._serve(host or "127.0.0.1", int(port)))
+        except KeyboardInterrupt:
+            pass
+
+    async def _serve(self, host, port):
+        server = await asyncio.start_server(self._handle, host, port)
+        self.stdout.write(self.style.SUCCESS(f"Event broker listening on {host}:{port}"))
+        async with server:
+            await server.serve_forever()
+
+    async def _handle(self, reader, writer):
+        try:
+            role = await reader.readline()
+            if role == b"SUB\n":
+                self.subscribers.add(writer)
+                # nothing to read from a subscriber; wait for it to hang up
+                while await reader.read(1024):
+                    pass
+            elif role == b"PUB\n":
+                while line := await reader.readline():
+                    self._broadcast(line)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.subscribers.discard(writer)
+            writer.close()
+
+    def _broadcast(self, line):
+        for writer in list(self.subscribers):
+            if writer.transport.get_write_buffer_size() > MAX_SUBSCRIBER_BUFFER:
+                self.subscribers.discard(writer)
+                writer.close()
+                continue
+            writer.write(line)
@@ -0,0 +1,35 @@
+# Generated by Django 5.1 on 2026-10-19 13:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0002_search_posting'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['developer', 'category', 'level'], name='course_dev_category_level_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['developer', 'level'], name='course_dev_level_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['developer', 'is_active', 'start_date'], name='course_dev_active_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['developer', 'start_date'], name='course_dev_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['developer', 'end_date'], name='course_dev_end_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1 on 2026-10-19 13:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0003_course_catalog_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['developer', 'due_date'], name='assignment_dev_due_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1 on 2026-10-19 13:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0004_assignment_due_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeFeedHorizon',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seq', models.BigIntegerField(default=0)),
+                ('compacted_at', models.DateTimeField(auto_now=True)),
+                ('developer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='change_feed_horizon', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ChangeLogEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('op', models.CharField(choices=[('upsert', 'Created or updated'), ('delete', 'Deleted')], max_length=6)),
+                ('changed_at', models.DateTimeField(auto_now_add=True)),
+                ('developer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ChangeLogEntries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['developer', 'id'], name='changelog_dev_seq_idx'), models.Index(fields=['developer', 'model', 'object_id'], name='changelog_dev_object_idx')],
+            },
+        ),
+    ]
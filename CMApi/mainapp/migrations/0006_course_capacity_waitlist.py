@@ -0,0 +1,54 @@
+# Generated by Django 5.1 on 2026-10-19 13:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_student_count(apps, schema_editor):
+    Course = apps.get_model("mainapp", "Course")
+    Enrollment = Course.students.through
+    counts = (
+        Enrollment.objects.using(schema_editor.connection.alias)
+        .filter(course_id=OuterRef("pk")).order_by().values("course_id")
+        .annotate(n=Count("pk")).values("n")
+    )
+    Course.objects.using(schema_editor.connection.alias).update(student_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0005_change_feed'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='capacity',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='student_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='CourseWaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist', to='mainapp.course')),
+                ('developer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='CourseWaitlistEntries', to=settings.AUTH_USER_MODEL)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlisted', to='mainapp.student')),
+            ],
+            options={
+                'ordering': ['id'],
+                'constraints': [models.UniqueConstraint(fields=('course', 'student'), name='uniq_waitlist_course_student')],
+            },
+        ),
+        migrations.RunPython(backfill_student_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.1 on 2026-10-19 13:33
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    db = schema_editor.connection.alias
+    Course = apps.get_model("mainapp", "Course")
+    Assignment = apps.get_model("mainapp", "Assignment")
+    Lesson = apps.get_model("mainapp", "Lesson")
+    Submission = apps.get_model("mainapp", "Submission")
+
+    def count(queryset, outer_field):
+        return Coalesce(Subquery(
+            queryset.using(db).filter(**{outer_field: OuterRef("pk")}).order_by()
+            .values(outer_field).annotate(n=Count("pk")).values("n")
+        ), 0)
+
+    Course.objects.using(db).update(
+        lesson_count=count(Lesson.objects.all(), "course_id"),
+        assignment_count=count(Assignment.objects.all(), "course_id"),
+        submission_count=count(Submission.objects.all(), "assignment__course_id"),
+    )
+    Assignment.objects.using(db).update(
+        submission_count=count(Submission.objects.all(), "assignment_id"),
+        graded_count=count(Submission.objects.filter(grade__isnull=False), "assignment_id"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0006_course_capacity_waitlist'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assignment',
+            name='graded_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='assignment',
+            name='submission_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='assignment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='lesson_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='submission_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
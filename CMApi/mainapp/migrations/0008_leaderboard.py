@@ -0,0 +1,32 @@
+# Generated by Django 5.1 on 2026-10-19 13:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0007_denormalized_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('average_grade', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('graded_count', models.PositiveIntegerField(default=0)),
+                ('completed_lessons', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard', to='mainapp.course')),
+                ('developer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='LeaderboardEntries', to=settings.AUTH_USER_MODEL)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='mainapp.student')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('course', 'student'), name='uniq_leaderboard_course_student')],
+            },
+        ),
+    ]
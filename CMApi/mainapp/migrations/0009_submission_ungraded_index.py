@@ -0,0 +1,19 @@
+# Generated by Django 5.1 on 2026-10-19 13:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0008_leaderboard'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(condition=models.Q(('grade__isnull', True)), fields=['assignment', 'submitted_at'], name='submission_ungraded_idx'),
+        ),
+    ]
@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.conf import settings
 from accounts.models import User
@@ -40,8 +42,24 @@ class Guest(models.Model):
         return self.user.get_full_name() or self.user.username
     
     
+class CounterFieldsMixin:
+    """
+    Denormalized counters (mainapp/counters.py) only change through atomic
+    F() UPDATEs; a full save() of a stale instance must not write them back.
+    """
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None and not kwargs.get("force_insert"):
+            kwargs["update_fields"] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
+
+
 # Course model representing a course in the LMS
-class Course(models.Model):
+class Course(CounterFieldsMixin, models.Model):
     developer = models.ForeignKey(User, on_delete=models.CASCADE, related_name="Courses")
     title = models.CharField(max_length=100)
     description = models.TextField()
@@ -60,6 +78,16 @@ class Course(models.Model):
         ('intermediate', 'Intermediate'),
         ('advanced', 'Advanced')
     ])
+    # seat cap for self-enrollment; null = unlimited
+    capacity = models.PositiveIntegerField(null=True, blank=True)
+    # denormalized roster size, kept by mainapp/enrollment.py (claimed atomically against capacity)
+    student_count = models.PositiveIntegerField(default=0, editable=False)
+    # course-card counters, kept by mainapp/counters.py
+    lesson_count = models.PositiveIntegerField(default=0, editable=False)
+    assignment_count = models.PositiveIntegerField(default=0, editable=False)
+    submission_count = models.PositiveIntegerField(default=0, editable=False)
+
+    counter_fields = ("student_count", "lesson_count", "assignment_count", "submission_count")
 
     def __str__(self):
         return self.title
@@ -67,6 +95,14 @@ class Course(models.Model):
         constraints = [
             models.UniqueConstraint(fields=["developer", "title"], name="uniq_course_title_per_developer"),
         ]
+        # catalog filters/ordering (mainapp/filters.py) and the facet GROUP BY
+        indexes = [
+            models.Index(fields=["developer", "category", "level"], name="course_dev_category_level_idx"),
+            models.Index(fields=["developer", "level"], name="course_dev_level_idx"),
+            models.Index(fields=["developer", "is_active", "start_date"], name="course_dev_active_start_idx"),
+            models.Index(fields=["developer", "start_date"], name="course_dev_start_idx"),
+            models.Index(fields=["developer", "end_date"], name="course_dev_end_idx"),
+        ]
 
 
 # CourseMaterial model representing materials for courses
@@ -84,7 +120,7 @@ class CourseMaterial(models.Model):
         return self.title
     
 # Assignment model representing assignments for courses
-class Assignment(models.Model):
+class Assignment(CounterFieldsMixin, models.Model):
     developer = models.ForeignKey(User, on_delete=models.CASCADE, related_name="Assignments")
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="assignments")
     title = models.CharField(max_length=100)
@@ -92,11 +128,20 @@ class Assignment(models.Model):
     due_date = models.DateTimeField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # kept by mainapp/counters.py
+    submission_count = models.PositiveIntegerField(default=0, editable=False)
+    graded_count = models.PositiveIntegerField(default=0, editable=False)
+
+    counter_fields = ("submission_count", "graded_count")
 
     class Meta:
         permissions = [
             ("grade_assignment", "Can grade assignments")
         ]
+        indexes = [
+            # upcoming-deadlines feed: range scan on due_date inside a workspace
+            models.Index(fields=["developer", "due_date"], name="assignment_dev_due_idx"),
+        ]
     def __str__(self):
         return f"{self.title} ({self.course.title})"
 
@@ -111,6 +156,15 @@ class Submission(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # teacher grading queue: only ungraded rows are indexed (partial
+            # index where the backend supports it, skipped elsewhere)
+            models.Index(
+                fields=["assignment", "submitted_at"], condition=models.Q(grade__isnull=True),
+                name="submission_ungraded_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.student.user.get_full_name()} - {self.assignment.title}" 
@@ -147,16 +201,140 @@ class Progress(models.Model):
         return f"{self.student.user.get_full_name() or self.student.user.username} - {self.lesson.title}"
 
 
+# Inverted index behind /api/search/ (see mainapp/search.py): one row per (document, term)
+class SearchPosting(models.Model):
+    KIND_CHOICES = [
+        ('course', 'Course'),
+        ('lesson', 'Lesson'),
+        ('material', 'CourseMaterial'),
+    ]
+    developer = models.ForeignKey(User, on_delete=models.CASCADE, related_name="SearchPostings")
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="search_postings")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    term = models.CharField(max_length=64)
+    weight = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["developer", "term"], name="search_dev_term_idx"),
+            models.Index(fields=["kind", "object_id"], name="search_document_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.term} -> {self.kind}:{self.object_id}"
+
+
+# Per-tenant change log behind /api/changes/ (see mainapp/changefeed.py).
+# The auto-increment id is the sync sequence handed to clients as their cursor.
+class ChangeLogEntry(models.Model):
+    OP_CHOICES = [
+        ('upsert', 'Created or updated'),
+        ('delete', 'Deleted'),
+    ]
+    developer = models.ForeignKey(User, on_delete=models.CASCADE, related_name="ChangeLogEntries")
+    model = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    op = models.CharField(max_length=6, choices=OP_CHOICES)
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["developer", "id"], name="changelog_dev_seq_idx"),
+            models.Index(fields=["developer", "model", "object_id"], name="changelog_dev_object_idx"),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.op} {self.model}:{self.object_id}"
+
+
+# Highest sequence compacted away per developer; older cursors must resync.
+class ChangeFeedHorizon(models.Model):
+    developer = models.OneToOneField(User, on_delete=models.CASCADE, related_name="change_feed_horizon")
+    seq = models.BigIntegerField(default=0)
+    compacted_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.developer.username} @ {self.seq}"
 
 
+# FIFO queue of students waiting for a seat in a full course.
+class CourseWaitlistEntry(models.Model):
+    developer = models.ForeignKey(User, on_delete=models.CASCADE, related_name="CourseWaitlistEntries")
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="waitlist")
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name="waitlisted")
+    created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        ordering = ["id"]
+        constraints = [
+            models.UniqueConstraint(fields=["course", "student"], name="uniq_waitlist_course_student"),
+        ]
 
+    def __str__(self):
+        return f"{self.student_id} waiting for {self.course_id}"
+
+
+# Per-student leaderboard standing in a course, maintained by mainapp/leaderboard.py.
+class LeaderboardEntry(models.Model):
+    developer = models.ForeignKey(User, on_delete=models.CASCADE, related_name="LeaderboardEntries")
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="leaderboard")
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name="leaderboard_entries")
+    average_grade = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    graded_count = models.PositiveIntegerField(default=0)
+    completed_lessons = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["course", "student"], name="uniq_leaderboard_course_student"),
+        ]
 
+    def __str__(self):
+        return f"{self.student_id} in {self.course_id}: {self.average_grade}"
 
 
+# One stored file per content digest, shared by every workspace (see
+# mainapp/storage.py). Lives on the default database, next to the media root.
+class StoredBlob(models.Model):
+    digest = models.CharField(max_length=64, primary_key=True)
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField()
+    # FileField values pointing at this blob, across all shards
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
 
+    def __str__(self):
+        return f"{self.name} x{self.refcount}"
 
 
+# A resumable course-material upload in progress (mainapp/uploads.py). Chunks
+# are written to partial_name; finalize turns it into a CourseMaterial.
+class UploadSession(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    developer = models.ForeignKey(User, on_delete=models.CASCADE, related_name="UploadSessions")
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="upload_sessions")
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name="upload_sessions")
+    title = models.CharField(max_length=100)
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+    # expected SHA-256 (hex), optional until finalize
+    checksum = models.CharField(max_length=64, blank=True)
+    # set while a PATCH is writing a chunk; a lease, so a dead writer does not block the upload
+    writing_until = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # stale-upload cleanup
+            models.Index(fields=["updated_at"], name="upload_session_updated_idx"),
+        ]
 
+    @property
+    def partial_name(self):
+        return f"uploads/partial/{self.pk}.part"
 
+    def __str__(self):
+        return f"{self.filename} {self.offset}/{self.size}"
@@ -17,6 +17,35 @@ class IsCourseOwnerOrReadOnly(BasePermission):
         teacher = getattr(request.user, "teacher", None)
         return teacher is not None and obj.instructor_id == teacher.id
 
+class IsCourseInstructor(BasePermission):
+    """Course reports (analytics, gradebook): the instructor or a superuser, any method."""
+    def has_object_permission(self, request, view, obj):
+        if request.user and request.user.is_superuser:
+            return True
+        teacher = getattr(request.user, "teacher", None)
+        return teacher is not None and obj.instructor_id == teacher.id
+
+class IsAssignmentInstructor(BasePermission):
+    """Assignment exports: the course instructor or a superuser, any method."""
+    def has_object_permission(self, request, view, obj):
+        if request.user and request.user.is_superuser:
+            return True
+        teacher = getattr(request.user, "teacher", None)
+        return teacher is not None and obj.course.instructor_id == teacher.id
+
+class IsCourseOwnerOrSelfEnrolling(BasePermission):
+    """
+    Roster changes with a student_ids list need the course instructor (or a
+    superuser); a student may enroll or unenroll themselves.
+    """
+    def has_object_permission(self, request, view, obj):
+        if request.user and request.user.is_superuser:
+            return True
+        teacher = getattr(request.user, "teacher", None)
+        if teacher is not None and obj.instructor_id == teacher.id:
+            return True
+        return "student_ids" not in request.data and hasattr(request.user, "student")
+
 class IsOwnSubmissionOrCourseTeacher(BasePermission):
     """
     Student can manage own submission; teacher of the course can view/change.
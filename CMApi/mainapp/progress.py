@@ -0,0 +1,103 @@
+# mainapp/progress.py
+"""
+Bulk progress sync for offline players.
+
+``sync_progress`` checks the whole batch against the student's courses in one
+query, then upserts the changed rows in one INSERT ... ON CONFLICT statement
+on (student, lesson). post_save does not fire for bulk writes, so the change
+feed and /api/events/ hear about them through ``signals.bulk_saved``.
+"""
+from django.db import router, transaction
+
+from .models import Lesson, Progress
+from .signals import bulk_saved
+
+MAX_ITEMS_PER_SYNC = 1000
+
+
+def _parse_item(item):
+    """(lesson_id, completed) or an error message."""
+    if not isinstance(item, dict):
+        return "Each item must be an object."
+    lesson_id, completed = item.get("lesson"), item.get("completed", True)
+    if isinstance(lesson_id, bool) or not isinstance(lesson_id, int):
+        return "lesson must be an integer id."
+    if not isinstance(completed, bool):
+        return "completed must be true or false."
+    return lesson_id, completed
+
+
+def sync_progress(student, items):
+    """
+    Upsert progress rows for ``student``. ``items`` is a list of
+    {"lesson": id, "completed": bool}; a later item for the same lesson wins.
+    Returns one result per item, in request order.
+    """
+    results = [None] * len(items)
+    wanted = {}  # lesson_id -> (completed, indexes of the items that asked for it)
+    for index, item in enumerate(items):
+        parsed = _parse_item(item)
+        if isinstance(parsed, str):
+            results[index] = {"status": "error", "error": parsed}
+            continue
+        lesson_id, completed = parsed
+        _, indexes = wanted.get(lesson_id, (None, []))
+        wanted[lesson_id] = (completed, indexes + [index])
+
+    # one query: lessons of courses this student is enrolled in
+    allowed = set(
+        Lesson.objects.filter(
+            developer_id=student.developer_id, pk__in=list(wanted), course__students=student,
+        ).values_list("pk", flat=True)
+    )
+    for lesson_id in [pk for pk in wanted if pk not in allowed]:
+        for index in wanted.pop(lesson_id)[1]:
+            results[index] = {"lesson": lesson_id, "status": "error",
+                              "error": "Lesson is not in one of your courses."}
+
+    existing = {
+        lesson_id: (pk, completed)
+        for lesson_id, pk, completed in Progress.objects.filter(
+            student=student, lesson_id__in=list(wanted),
+        ).values_list("lesson_id", "pk", "completed")
+    }
+    rows, statuses = [], {}
+    for lesson_id, (completed, _) in wanted.items():
+        if lesson_id not in existing:
+            statuses[lesson_id] = "created"
+        elif existing[lesson_id][1] != completed:
+            statuses[lesson_id] = "updated"
+        else:
+            statuses[lesson_id] = "unchanged"
+            continue
+        rows.append(Progress(
+            developer_id=student.developer_id, student=student, lesson_id=lesson_id, completed=completed,
+        ))
+
+    with transaction.atomic(using=router.db_for_write(Progress)):
+        Progress.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=["student", "lesson"],
+            update_fields=["completed", "updated_at"],
+        )
+        ids = dict(
+            Progress.objects.filter(student=student, lesson_id__in=[row.lesson_id for row in rows])
+            .values_list("lesson_id", "pk")
+        )
+        changes = [
+            {"progress": ids[row.lesson_id], "lesson": row.lesson_id,
+             "student": student.pk, "completed": row.completed}
+            for row in rows
+            # same rule as the post_save event: only real flips (new rows start incomplete)
+            if row.completed != (existing[row.lesson_id][1] if row.lesson_id in existing else False)
+        ]
+        bulk_saved.send(
+            sender=Progress, developer_id=student.developer_id,
+            ids=[ids[row.lesson_id] for row in rows], changes=changes,
+        )
+
+    for lesson_id, (completed, indexes) in wanted.items():
+        pk = ids.get(lesson_id) or existing[lesson_id][0]
+        for index in indexes:
+            results[index] = {"lesson": lesson_id, "id": pk, "completed": completed,
+                              "status": statuses[lesson_id]}
+    return results
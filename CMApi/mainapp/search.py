@@ -0,0 +1,180 @@
+# mainapp/search.py
+"""
+Full-text search over courses, lessons and course materials.
+
+Documents are tokenized into ``SearchPosting`` rows (one per document/term,
+weighted by field). Lookups hit the (developer, term) index, so the same code
+runs on SQLite and Postgres and the postings live on the tenant's shard like
+every other mainapp row. Signals (mainapp/signals.py) keep the index in sync
+one document at a time; ``rebuild_search_index`` rebuilds it in bulk.
+"""
+import re
+from collections import Counter
+
+from django.db import connections, router, transaction
+from django.db.models import Count, Sum
+
+from .models import Course, Lesson, CourseMaterial, SearchPosting
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is",
+    "it", "of", "on", "or", "that", "the", "this", "to", "with",
+}
+MAX_TERM_LENGTH = 64
+# a repeated word should not outrank a title match
+MAX_TERM_FREQUENCY = 5
+
+# kind -> (model, [(field, weight), ...])
+DOCUMENTS = {
+    "course": (Course, [("title", 10), ("summary", 4), ("description", 2)]),
+    "lesson": (Lesson, [("title", 10), ("content", 1)]),
+    "material": (CourseMaterial, [("title", 10)]),
+}
+INDEXED_FIELDS = {kind: {name for name, _ in fields} for kind, (_, fields) in DOCUMENTS.items()}
+
+
+def tokenize(text):
+    if not text:
+        return []
+    return [
+        t for t in TOKEN_RE.findall(text.lower())
+        if len(t) > 1 and len(t) <= MAX_TERM_LENGTH and t not in STOPWORDS
+    ]
+
+
+def kind_for(model):
+    for kind, (doc_model, _) in DOCUMENTS.items():
+        if doc_model is model:
+            return kind
+    return None
+
+
+def document_terms(kind, obj):
+    """(course_id, {term: weight}) for one document."""
+    _, fields = DOCUMENTS[kind]
+    weights = Counter()
+    for name, weight in fields:
+        counts = Counter(tokenize(getattr(obj, name)))
+        for term, tf in counts.items():
+            weights[term] += weight * min(tf, MAX_TERM_FREQUENCY)
+    course_id = obj.pk if kind == "course" else obj.course_id
+    return course_id, weights
+
+
+def build_postings(kind, obj):
+    """Unsaved SearchPosting rows for one document."""
+    course_id, weights = document_terms(kind, obj)
+    return [
+        SearchPosting(
+            developer_id=obj.developer_id, course_id=course_id,
+            kind=kind, object_id=obj.pk, term=term, weight=weight,
+        )
+        for term, weight in weights.items()
+    ]
+
+
+def index_document(obj, update_fields=None):
+    kind = kind_for(type(obj))
+    if kind is None:
+        return
+    if update_fields is not None and not (set(update_fields) & (INDEXED_FIELDS[kind] | {"course"})):
+        return
+    remove_document(obj)
+    SearchPosting.objects.bulk_create(build_postings(kind, obj))
+
+
+def remove_document(obj):
+    kind = kind_for(type(obj))
+    if kind is not None:
+        SearchPosting.objects.filter(kind=kind, object_id=obj.pk).delete()
+
+
+POSTING_COLUMNS = ["developer", "course", "kind", "object_id", "term", "weight"]
+
+
+def _insert_postings(rows):
+    """executemany() plain tuples: the rebuild path skips model instances entirely."""
+    opts = SearchPosting._meta
+    connection = connections[router.db_for_write(SearchPosting)]
+    columns = [opts.get_field(name).column for name in POSTING_COLUMNS]
+    sql = "INSERT INTO %s (%s) VALUES (%s)" % (
+        connection.ops.quote_name(opts.db_table),
+        ", ".join(connection.ops.quote_name(c) for c in columns),
+        ", ".join(["%s"] * len(columns)),
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+def rebuild_index(developer=None, batch_size=5000):
+    """Drop and rebuild postings (optionally for one developer). Returns rows written."""
+    postings = SearchPosting.objects.all()
+    if developer is not None:
+        postings = postings.filter(developer=developer)
+
+    written = 0
+    with transaction.atomic(using=router.db_for_write(SearchPosting)):
+        postings.delete()
+        for kind, (model, fields) in DOCUMENTS.items():
+            qs = model.objects.all()
+            if developer is not None:
+                qs = qs.filter(developer=developer)
+            columns = ["pk", "developer_id"] + [name for name, _ in fields]
+            if kind != "course":
+                columns.append("course_id")
+            rows = []
+            for obj in qs.only(*columns).iterator(chunk_size=batch_size):
+                course_id, weights = document_terms(kind, obj)
+                rows.extend(
+                    (obj.developer_id, course_id, kind, obj.pk, term, weight)
+                    for term, weight in weights.items()
+                )
+                if len(rows) >= batch_size:
+                    _insert_postings(rows)
+                    written += len(rows)
+                    rows = []
+            if rows:
+                _insert_postings(rows)
+                written += len(rows)
+    return written
+
+
+def search(developer, query, courses=None, kinds=None, limit=20):
+    """
+    Rank documents matching ``query``: documents containing more of the query
+    terms come first, ties broken by summed field weight.
+    ``courses`` restricts results to a Course queryset (the actor's visibility).
+    """
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return []
+    postings = SearchPosting.objects.filter(developer=developer, term__in=terms)
+    if courses is not None:
+        postings = postings.filter(course__in=courses.values("pk"))
+    if kinds is not None:
+        postings = postings.filter(kind__in=kinds)
+    hits = list(
+        postings.values("kind", "object_id", "course_id")
+        .annotate(score=Sum("weight"), matched=Count("term"))
+        .order_by("-matched", "-score", "kind", "object_id")[:limit]
+    )
+
+    # one title lookup per kind present in the page
+    titles = {}
+    for kind in {h["kind"] for h in hits}:
+        model = DOCUMENTS[kind][0]
+        ids = [h["object_id"] for h in hits if h["kind"] == kind]
+        titles[kind] = dict(model.objects.filter(pk__in=ids).values_list("pk", "title"))
+
+    return [
+        {
+            "type": h["kind"],
+            "id": h["object_id"],
+            "course": h["course_id"],
+            "title": titles[h["kind"]].get(h["object_id"]),
+            "score": h["score"],
+            "matched_terms": h["matched"],
+        }
+        for h in hits
+    ]
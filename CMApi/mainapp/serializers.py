@@ -1,7 +1,8 @@
 # from django.contrib.auth.models import Group, User
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
-from .models import Teacher, Student, Course, CourseMaterial, Assignment, Submission, Lesson, Progress
+from django.conf import settings
+from .models import Teacher, Student, Course, CourseMaterial, Assignment, Submission, Lesson, Progress, UploadSession
 
 User = get_user_model()
 
@@ -39,15 +40,18 @@ class CourseSerializer(serializers.ModelSerializer):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         developer = getattr(self.context.get("request"), "developer", None)
-        if ws:
+        if developer:
             self.fields["students"].queryset = Student.objects.filter(developer=developer)
     class Meta:
         model = Course
         fields = [
             "id", "title", "description", "instructor", "students",
             "start_date", "end_date", "duration", "is_active",
-            "created_at", "updated_at", "summary", "category", "level"
+            "created_at", "updated_at", "summary", "category", "level",
+            "capacity", "student_count", "lesson_count", "assignment_count", "submission_count",
         ]
+        # denormalized counters (mainapp/counters.py): plain columns, no extra queries
+        read_only_fields = ["student_count", "lesson_count", "assignment_count", "submission_count"]
     def validate(self, attrs):
         # Ensuring end_date >= start_date
         start = attrs.get("start_date") or getattr(self.instance, "start_date", None)
@@ -67,6 +71,25 @@ class CourseMaterialSerializer(serializers.ModelSerializer):
         model = CourseMaterial
         fields = '__all__'
 
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """Resumable course-material upload (see mainapp/uploads.py)."""
+    class Meta:
+        model = UploadSession
+        fields = ["id", "course", "title", "filename", "size", "offset", "checksum", "created_at", "updated_at"]
+        read_only_fields = ["id", "offset", "created_at", "updated_at"]
+
+    def validate_size(self, value):
+        limit = getattr(settings, "UPLOAD_MAX_BYTES", None)
+        if value <= 0 or (limit and value > limit):
+            raise serializers.ValidationError(f"Must be between 1 and {limit} bytes.")
+        return value
+
+    def validate_checksum(self, value):
+        value = value.lower()
+        if value and (len(value) != 64 or any(c not in "0123456789abcdef" for c in value)):
+            raise serializers.ValidationError("Expected a hex SHA-256 digest.")
+        return value
+
 class AssignmentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Assignment
@@ -100,6 +123,30 @@ class SubmissionStudentSerializer(serializers.ModelSerializer):
         fields = ["id", "assignment", "student", "file", "submitted_at", "grade", "created_at", "updated_at"]
         read_only_fields = ["id", "student", "submitted_at", "grade", "created_at", "updated_at"]
 
+class DeadlineSerializer(serializers.ModelSerializer):
+    """
+    Assignment plus the caller's own submission state.
+    Expects the annotations added by UpcomingDeadlinesView.get_queryset.
+    """
+    course_title = serializers.CharField(read_only=True)
+    submission = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Assignment
+        fields = ["id", "title", "description", "due_date", "course", "course_title", "submission"]
+
+    def get_submission(self, obj):
+        submission_id = getattr(obj, "my_submission_id", None)
+        if submission_id is None:
+            return {"status": "overdue" if obj.due_date < self.context["now"] else "pending"}
+        return {
+            "id": submission_id,
+            "status": "graded" if obj.my_grade is not None else "submitted",
+            "submitted_at": obj.my_submitted_at,
+            "grade": obj.my_grade,
+        }
+
+
 class LessonSerializer(serializers.ModelSerializer):
     class Meta:
         model = Lesson
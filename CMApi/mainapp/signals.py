@@ -0,0 +1,310 @@
+# mainapp/signals.py
+from django.db import router, transaction
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
+from django.dispatch import Signal, receiver
+
+from .models import Course, Lesson, CourseMaterial, Assignment, Submission, Progress
+from . import search, changefeed, events, enrollment, counters, analytics, leaderboard
+
+# Sent by bulk write paths (bulk_create/bulk_update) that bypass post_save.
+# sender=model; developer_id; ids: every row written; changes: one dict per
+# row whose grade/completion changed, shaped like the /api/events/ payloads.
+bulk_saved = Signal()
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Lesson)
+@receiver(post_save, sender=CourseMaterial)
+def index_search_document(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    search.index_document(instance, update_fields=update_fields)
+
+
+@receiver(post_delete, sender=Lesson)
+@receiver(post_delete, sender=CourseMaterial)
+def unindex_search_document(sender, instance, **kwargs):
+    # course postings go away with the course (FK cascade)
+    search.remove_document(instance)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Lesson)
+@receiver(post_save, sender=Assignment)
+@receiver(post_save, sender=CourseMaterial)
+@receiver(post_save, sender=Submission)
+@receiver(post_save, sender=Progress)
+def log_upsert(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    changefeed.record_change(instance, "upsert")
+
+
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Lesson)
+@receiver(post_delete, sender=Assignment)
+@receiver(post_delete, sender=CourseMaterial)
+@receiver(post_delete, sender=Submission)
+@receiver(post_delete, sender=Progress)
+def log_tombstone(sender, instance, **kwargs):
+    changefeed.record_change(instance, "delete")
+
+
+# fields whose previous value post_save receivers compare against
+TRACKED_FIELDS = {
+    Submission: ("grade", "assignment_id", "file"),
+    Progress: ("completed",),
+    Lesson: ("course_id",),
+    Assignment: ("course_id",),
+    CourseMaterial: ("file",),
+}
+
+
+@receiver(pre_save, sender=Submission)
+@receiver(pre_save, sender=CourseMaterial)
+@receiver(pre_save, sender=Progress)
+@receiver(pre_save, sender=Lesson)
+@receiver(pre_save, sender=Assignment)
+def remember_previous_values(sender, instance, raw=False, **kwargs):
+    # new rows have nothing to compare
+    if raw or instance.pk is None:
+        return
+    fields = TRACKED_FIELDS[sender]
+    row = sender.objects.filter(pk=instance.pk).values_list(*fields).first()
+    instance._previous = dict(zip(fields, row)) if row is not None else None
+
+
+def _previous(instance, field, default=None):
+    previous = getattr(instance, "_previous", None)
+    return default if previous is None else previous[field]
+
+
+@receiver(post_save, sender=Submission)
+def publish_grade_event(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = _previous(instance, "grade")
+    if instance.grade == previous:
+        return
+    events.notify_grade_changes(instance.developer_id, [{
+        "submission": instance.pk, "assignment": instance.assignment_id,
+        "student": instance.student_id, "grade": instance.grade, "previous_grade": previous,
+    }])
+
+
+@receiver(post_save, sender=Progress)
+def publish_progress_event(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if bool(instance.completed) == bool(_previous(instance, "completed", False)):
+        return
+    events.notify_progress_changes(instance.developer_id, [{
+        "progress": instance.pk, "lesson": instance.lesson_id,
+        "student": instance.student_id, "completed": instance.completed,
+    }])
+
+
+@receiver(m2m_changed, sender=Course.students.through)
+def recount_roster(sender, instance, action, reverse, pk_set, **kwargs):
+    """Roster writes through the serializer / related managers keep student_count right."""
+    if reverse and action == "pre_clear":
+        # student.courses.clear(): remember the courses before the rows go
+        instance._cleared_course_ids = list(instance.courses.values_list("pk", flat=True))
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        enrollment.recount([instance.pk])
+        analytics.invalidate(instance.pk)
+        leaderboard.invalidate(instance.pk)
+        if action != "post_add":
+            enrollment.promote_waitlist(instance)
+        return
+    course_ids = pk_set if action != "post_clear" else getattr(instance, "_cleared_course_ids", [])
+    enrollment.recount(course_ids)
+    analytics.invalidate(*course_ids)
+    for course_id in course_ids:
+        leaderboard.invalidate(course_id)
+    if action != "post_add":
+        for course in Course.objects.filter(pk__in=course_ids):
+            enrollment.promote_waitlist(course)
+
+
+@receiver(bulk_saved)
+def log_bulk_upsert(sender, developer_id, ids, **kwargs):
+    if ids and sender in changefeed.FEED_NAMES:
+        changefeed.record_changes(sender, developer_id, ids, "upsert")
+
+
+@receiver(bulk_saved, sender=Submission)
+def publish_bulk_grade_events(sender, developer_id, changes, **kwargs):
+    events.notify_grade_changes(developer_id, changes)
+
+
+@receiver(bulk_saved, sender=Progress)
+def publish_bulk_progress_events(sender, developer_id, changes, **kwargs):
+    events.notify_progress_changes(developer_id, changes)
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_save, sender=Assignment)
+def count_course_child(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    field = "lesson_count" if sender is Lesson else "assignment_count"
+    previous_course = None if created else _previous(instance, "course_id", instance.course_id)
+    if previous_course == instance.course_id:
+        return
+    counters.bump(Course, previous_course, **{field: -1})
+    counters.bump(Course, instance.course_id, **{field: 1})
+    if sender is Lesson:
+        analytics.invalidate(previous_course, instance.course_id)
+    if sender is Assignment and not created:
+        # the assignment's submissions move with it
+        moved = Submission.objects.filter(assignment=instance).count()
+        counters.bump(Course, previous_course, submission_count=-moved)
+        counters.bump(Course, instance.course_id, submission_count=moved)
+
+
+@receiver(post_delete, sender=Lesson)
+@receiver(post_delete, sender=Assignment)
+def uncount_course_child(sender, instance, **kwargs):
+    field = "lesson_count" if sender is Lesson else "assignment_count"
+    counters.bump(Course, instance.course_id, **{field: -1})
+    if sender is Lesson:
+        analytics.invalidate(instance.course_id)
+
+
+@receiver(post_save, sender=Submission)
+def count_submission(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    graded = instance.grade is not None
+    if created:
+        counters.submission_added(instance.assignment_id, graded)
+        return
+    previous_assignment = _previous(instance, "assignment_id", instance.assignment_id)
+    was_graded = _previous(instance, "grade", instance.grade) is not None
+    if previous_assignment != instance.assignment_id:
+        counters.submission_removed(previous_assignment, was_graded)
+        counters.submission_added(instance.assignment_id, graded)
+    elif graded != was_graded:
+        counters.bump(Assignment, instance.assignment_id, graded_count=1 if graded else -1)
+
+
+@receiver(post_delete, sender=Submission)
+def uncount_submission(sender, instance, **kwargs):
+    counters.submission_removed(instance.assignment_id, instance.grade is not None)
+
+
+@receiver(bulk_saved, sender=Submission)
+def count_bulk_grades(sender, changes, **kwargs):
+    deltas = {}
+    for change in changes:
+        delta = (change["grade"] is not None) - (change["previous_grade"] is not None)
+        deltas[change["assignment"]] = deltas.get(change["assignment"], 0) + delta
+    for assignment_id, delta in deltas.items():
+        counters.bump(Assignment, assignment_id, graded_count=delta)
+
+
+@receiver(post_save, sender=Progress)
+@receiver(post_delete, sender=Progress)
+def invalidate_completion(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    analytics.invalidate(Lesson.objects.filter(pk=instance.lesson_id).values_list("course_id", flat=True).first())
+
+
+@receiver(bulk_saved, sender=Progress)
+def invalidate_bulk_completion(sender, ids, **kwargs):
+    if ids:
+        analytics.invalidate(*Lesson.objects.filter(progress__pk__in=ids).values_list("course_id", flat=True).distinct())
+
+
+def _courses_of(model, ids):
+    return dict(model.objects.filter(pk__in=ids).values_list("pk", "course_id"))
+
+
+def _rerank(developer_id, course_students):
+    for course_id, student_ids in course_students.items():
+        leaderboard.refresh(developer_id, course_id, student_ids)
+
+
+@receiver(post_save, sender=Submission)
+def rank_submission(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous_assignment = _previous(instance, "assignment_id", instance.assignment_id)
+    if created and instance.grade is None:
+        return
+    if not created and previous_assignment == instance.assignment_id and instance.grade == _previous(instance, "grade"):
+        return
+    courses = _courses_of(Assignment, {previous_assignment, instance.assignment_id})
+    _rerank(instance.developer_id, {course_id: [instance.student_id] for course_id in courses.values()})
+
+
+@receiver(post_delete, sender=Submission)
+def unrank_submission(sender, instance, **kwargs):
+    if instance.grade is not None:
+        course_id = _courses_of(Assignment, [instance.assignment_id]).get(instance.assignment_id)
+        leaderboard.refresh(instance.developer_id, course_id, [instance.student_id])
+
+
+def _rerank_progress(instance):
+    course_id = _courses_of(Lesson, [instance.lesson_id]).get(instance.lesson_id)
+    leaderboard.refresh(instance.developer_id, course_id, [instance.student_id])
+
+
+@receiver(post_save, sender=Progress)
+def rank_progress(sender, instance, created, raw=False, **kwargs):
+    if raw or bool(instance.completed) == bool(_previous(instance, "completed", False)):
+        return
+    _rerank_progress(instance)
+
+
+@receiver(post_delete, sender=Progress)
+def unrank_progress(sender, instance, **kwargs):
+    if instance.completed:
+        _rerank_progress(instance)
+
+
+@receiver(bulk_saved, sender=Submission)
+@receiver(bulk_saved, sender=Progress)
+def rank_bulk_changes(sender, developer_id, changes, **kwargs):
+    parent, key = (Assignment, "assignment") if sender is Submission else (Lesson, "lesson")
+    courses = _courses_of(parent, {change[key] for change in changes})
+    course_students = {}
+    for change in changes:
+        course_students.setdefault(courses.get(change[key]), set()).add(change["student"])
+    _rerank(developer_id, course_students)
+
+
+def _release_file(sender, field_file, name):
+    # after commit: a rolled-back delete must not lose the file
+    if name:
+        storage = field_file.storage
+        transaction.on_commit(lambda: storage.delete(name), using=router.db_for_write(sender))
+
+
+@receiver(pre_save, sender=Submission)
+@receiver(pre_save, sender=CourseMaterial)
+def note_new_upload(sender, instance, raw=False, **kwargs):
+    # an uncommitted FieldFile is saved to storage (one more reference) during this save,
+    # even when its content, and so its name, matches the previous file
+    instance._new_upload = not raw and bool(instance.file) and not instance.file._committed
+
+
+@receiver(post_save, sender=Submission)
+@receiver(post_save, sender=CourseMaterial)
+def release_replaced_file(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    previous = _previous(instance, "file", instance.file.name)
+    if previous != instance.file.name or getattr(instance, "_new_upload", False):
+        _release_file(sender, instance.file, previous)
+
+
+@receiver(post_delete, sender=Submission)
+@receiver(post_delete, sender=CourseMaterial)
+def release_deleted_file(sender, instance, **kwargs):
+    _release_file(sender, instance.file, instance.file.name)
@@ -0,0 +1,98 @@
+# mainapp/storage.py
+"""
+Content-addressed media storage.
+
+Uploads are hashed (SHA-256) while they stream to a temporary file. The file
+is then moved to ``cas/<d0d1>/<d2d3>/<digest><ext>`` unless that digest is
+already stored, so identical submissions and materials share one file.
+
+Each digest has a ``StoredBlob`` row on the default database, counting the
+FileField values that point at it. ``save`` adds a reference and ``delete``
+removes one; the file itself goes away with the last reference. Rows that
+reference a file release it in mainapp/signals.py when they are deleted or
+their file is replaced. ``python manage.py dedupe_media`` moves pre-existing
+uploads into the store and repairs the counts.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F
+
+from .models import StoredBlob
+
+BLOB_DIR = "cas"
+INCOMING_DIR = "cas/incoming"
+
+
+def blob_name(digest, name=""):
+    # keep the extension so served files still get a sensible content type
+    extension = os.path.splitext(name)[1].lower()[:16]
+    return f"{BLOB_DIR}/{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+
+def is_blob_name(name):
+    return bool(name) and name.startswith(BLOB_DIR + "/") and not name.startswith(INCOMING_DIR + "/")
+
+
+class ContentAddressedStorage(FileSystemStorage):
+
+    def get_available_name(self, name, max_length=None):
+        # the stored name is derived from the content in _save, never renamed
+        return name
+
+    def _save(self, name, content):
+        return self.store(content, name)
+
+    def store(self, content, name="", references=1):
+        """Store ``content`` (a File) once per digest and add ``references``; returns the blob name."""
+        os.makedirs(self.path(INCOMING_DIR), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.path(INCOMING_DIR))
+        digest, size = hashlib.sha256(), 0
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+            return self.adopt(temp_path, digest.hexdigest(), size, name, references)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def adopt(self, temp_path, digest, size, name="", references=1):
+        """
+        Move an already hashed file (on the media filesystem) into the store,
+        or discard it when the digest is stored already; returns the blob name.
+        """
+        # the row lock orders this against a delete() of the same digest
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            blob, _ = StoredBlob.objects.select_for_update().get_or_create(
+                digest=digest, defaults={"name": blob_name(digest, name), "size": size},
+            )
+            StoredBlob.objects.filter(pk=digest).update(refcount=F("refcount") + references)
+            path = self.path(blob.name)
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(temp_path, path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(path, self.file_permissions_mode)
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return blob.name
+
+    def delete(self, name):
+        """Drop one reference; the file is removed with the last one."""
+        if not is_blob_name(name):
+            # uploaded before this storage existed: one file per row
+            return super().delete(name)
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            blob = StoredBlob.objects.select_for_update().filter(name=name).first()
+            if blob is not None and blob.refcount > 1:
+                StoredBlob.objects.filter(pk=blob.pk).update(refcount=F("refcount") - 1)
+                return
+            if blob is not None:
+                blob.delete()
+            super().delete(name)
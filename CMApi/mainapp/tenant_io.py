@@ -0,0 +1,320 @@
+# mainapp/tenant_io.py
+"""
+Workspace export / import as NDJSON.
+
+The stream is one JSON object per line:
+    {"type": "header", "format": "cmapi-workspace", "version": 1, ...}
+    {"type": "user", "id": 7, "username": ...}
+    {"type": "teacher", "id": 3, "user_id": 7, ...}
+    ...
+    {"type": "footer", "counts": {"user": 120, ...}}
+
+Sections come in SECTIONS order: a row only references rows of earlier
+sections, by their ids in the source workspace. ``iter_export`` reads every
+table with chunked ``values_list`` iterators ordered by id, so memory does
+not depend on the workspace size.
+
+``import_stream`` reads the lines one at a time, bulk-inserts batches in
+the same order and maps old ids to new ones. It keeps only the id maps of
+sections that other rows point at (users, profiles, courses, lessons,
+assignments); submissions, progress and enrollments, the bulk of a large
+workspace, pass through in batches. bulk_create would stamp auto_now /
+auto_now_add fields, so each batch writes the exported timestamps back
+with one bulk_update.
+
+Not exported: password hashes (imported users get unusable passwords and
+must reset them), uploaded file bytes (only the stored names), and derived
+data: counters, search postings and leaderboards are rebuilt at the end,
+and every inserted batch is announced with ``bulk_saved`` so the change
+feed gets its entries (no grade or progress events are sent).
+
+A file name is only kept if it names a deduplicated blob stored on this
+server, which then gains a reference per imported row. Any other name (a
+legacy per-upload path, or a blob that is not here) is cleared: such a file
+belongs to one row of the source workspace, and sharing it would let the
+first delete in either workspace remove it for both.
+"""
+import datetime
+import json
+from dataclasses import dataclass, field as dataclass_field
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections, router, transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from accounts.sharding import current_shard, mirror_users
+from . import counters, leaderboard, search
+from .models import (
+    Assignment, Course, CourseMaterial, Guest, Lesson, Progress, StoredBlob, Student, Submission, Teacher,
+)
+from .signals import bulk_saved
+from .storage import is_blob_name
+
+User = get_user_model()
+Enrollment = Course.students.through
+
+FORMAT = "cmapi-workspace"
+VERSION = 1
+CHUNK_SIZE = 2000
+ROLE_GROUPS = {"teacher": "Teacher", "student": "Student", "guest": "Guest", "admin": "Admin"}
+
+
+@dataclass
+class Section:
+    type: str
+    model: type
+    fields: list
+    # field -> section whose ids it holds
+    references: dict = dataclass_field(default_factory=dict)
+    # how rows of this workspace are found
+    lookup: str = "developer"
+
+
+SECTIONS = [
+    Section("user", User, ["username", "email", "first_name", "last_name", "role", "is_active", "date_joined"],
+            lookup=None),
+    Section("teacher", Teacher, ["user_id", "bio", "specialization", "experience", "is_active",
+                                 "created_at", "updated_at"], {"user_id": "user"}),
+    Section("student", Student, ["user_id", "age", "enrolled_date", "is_active", "created_at", "updated_at"],
+            {"user_id": "user"}),
+    Section("guest", Guest, ["user_id", "created_at", "updated_at"], {"user_id": "user"}),
+    Section("course", Course, ["title", "description", "instructor_id", "start_date", "end_date", "duration",
+                               "is_active", "created_at", "updated_at", "category", "summary", "level",
+                               "capacity"], {"instructor_id": "teacher"}),
+    Section("enrollment", Enrollment, ["course_id", "student_id"],
+            {"course_id": "course", "student_id": "student"}, lookup="course__developer"),
+    Section("lesson", Lesson, ["course_id", "title", "content", "video_url", "order", "created_at", "updated_at"],
+            {"course_id": "course"}),
+    Section("assignment", Assignment, ["course_id", "title", "description", "due_date", "created_at",
+                                       "updated_at"], {"course_id": "course"}),
+    Section("course_material", CourseMaterial, ["course_id", "title", "file", "uploaded_at", "created_at",
+                                                "updated_at"], {"course_id": "course"}),
+    Section("submission", Submission, ["assignment_id", "student_id", "file", "submitted_at", "grade",
+                                       "created_at", "updated_at"],
+            {"assignment_id": "assignment", "student_id": "student"}),
+    Section("progress", Progress, ["student_id", "lesson_id", "completed", "created_at", "updated_at"],
+            {"student_id": "student", "lesson_id": "lesson"}),
+]
+SECTION_INDEX = {section.type: i for i, section in enumerate(SECTIONS)}
+# sections whose ids other rows reference: their id maps are kept during an import
+REFERENCED = {target for section in SECTIONS for target in section.references.values()}
+PROFILE_MODELS = (Teacher, Student, Guest)
+
+
+class _Encoder(DjangoJSONEncoder):
+    # DjangoJSONEncoder rounds datetimes to milliseconds; a round trip keeps them exact
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def _line(record):
+    return json.dumps(record, cls=_Encoder, separators=(",", ":")) + "\n"
+
+
+def _rows(section, developer):
+    queryset = section.model.objects.filter(**{section.lookup: developer}).order_by("pk")
+    return queryset.values_list("pk", *section.fields).iterator(chunk_size=CHUNK_SIZE)
+
+
+def _users(developer):
+    """The accounts behind the workspace's profiles, fetched one chunk of ids at a time."""
+    for i, profile in enumerate(PROFILE_MODELS):
+        user_ids = profile.objects.filter(developer=developer).exclude(user_id=None)
+        for earlier in PROFILE_MODELS[:i]:
+            # one account with two profiles is exported once
+            user_ids = user_ids.exclude(user_id__in=earlier.objects.filter(developer=developer).values("user_id"))
+        user_ids = user_ids.order_by("user_id").values_list("user_id", flat=True).iterator(chunk_size=CHUNK_SIZE)
+        chunk = []
+        for user_id in user_ids:
+            chunk.append(user_id)
+            if len(chunk) == CHUNK_SIZE:
+                yield from User.objects.filter(pk__in=chunk).order_by("pk").values_list("pk", *SECTIONS[0].fields)
+                chunk = []
+        if chunk:
+            yield from User.objects.filter(pk__in=chunk).order_by("pk").values_list("pk", *SECTIONS[0].fields)
+
+
+def iter_export(developer):
+    """Yield the workspace as NDJSON lines (str)."""
+    yield _line({
+        "type": "header", "format": FORMAT, "version": VERSION, "developer": developer.username,
+        "exported_at": timezone.now(), "sections": [section.type for section in SECTIONS],
+    })
+    counts = {}
+    for section in SECTIONS:
+        rows = _users(developer) if section.type == "user" else _rows(section, developer)
+        n = 0
+        for pk, *values in rows:
+            record = {"type": section.type, "id": pk}
+            record.update(zip(section.fields, values))
+            yield _line(record)
+            n += 1
+        counts[section.type] = n
+    yield _line({"type": "footer", "counts": counts})
+
+
+class _Importer:
+    def __init__(self, developer, batch_size, username_suffix):
+        self.developer = developer
+        self.batch_size = batch_size
+        self.username_suffix = username_suffix
+        self.id_maps = {name: {} for name in REFERENCED}
+        self.counts = {}
+        self.blob_references = {}
+        self.groups = {role: Group.objects.get_or_create(name=name)[0] for role, name in ROLE_GROUPS.items()}
+
+    def convert(self, section, record, line_number):
+        values = {}
+        for name in section.fields:
+            value = record.get(name)
+            target = section.references.get(name)
+            if target is not None and value is not None:
+                try:
+                    value = self.id_maps[target][value]
+                except KeyError:
+                    raise ValidationError({"line": line_number, "detail": f"{section.type} {record.get('id')}: "
+                                                                         f"unknown {target} id {value}."})
+            else:
+                model_field = section.model._meta.get_field(name[:-3] if name.endswith("_id") else name)
+                value = model_field.to_python(value) if value is not None else None
+            values[name] = value
+        return values
+
+    def flush(self, section, batch):
+        if not batch:
+            return
+        if section.type == "user":
+            self._insert_users(section, batch)
+        else:
+            self._insert(section, batch)
+        self.counts[section.type] = self.counts.get(section.type, 0) + len(batch)
+
+    def _insert_users(self, section, batch):
+        for _, values in batch:
+            values["username"] = f"{values['username']}{self.username_suffix}"
+        taken = set(User.objects.filter(username__in=[values["username"] for _, values in batch])
+                    .values_list("username", flat=True))
+        if taken:
+            raise ValidationError({"detail": f"Usernames already exist: {', '.join(sorted(taken)[:10])}. "
+                                             f"Import with a username suffix."})
+        users = [User(password=make_password(None), **values) for _, values in batch]
+        User.objects.bulk_create(users)
+        self._remember(section, batch, users)
+        memberships = [
+            User.groups.through(user_id=user.pk, group_id=self.groups[user.role].pk)
+            for user in users if user.role in self.groups
+        ]
+        User.groups.through.objects.bulk_create(memberships)
+        # tenant rows on a shard reference local copies of the accounts
+        mirror_users(current_shard(), users)
+
+    def _insert(self, section, batch):
+        model = section.model
+        if "file" in section.fields:
+            self._check_files(batch)
+        extra = {} if section.lookup != "developer" else {"developer_id": self.developer.pk}
+        objs = [model(**values, **extra) for _, values in batch]
+        model.objects.bulk_create(objs)
+        stamped = [f.name for f in model._meta.concrete_fields
+                   if getattr(f, "auto_now", False) or getattr(f, "auto_now_add", False)]
+        if stamped:
+            for obj, (_, values) in zip(objs, batch):
+                for name in stamped:
+                    if values.get(name) is not None:
+                        setattr(obj, name, values[name])
+            model.objects.bulk_update(objs, stamped)
+        if section.type in REFERENCED:
+            self._remember(section, batch, objs)
+        if "file" in section.fields:
+            for _, values in batch:
+                if values["file"]:
+                    self.blob_references[values["file"]] = self.blob_references.get(values["file"], 0) + 1
+        # bulk_create sends no post_save: the change feed hears of the rows here
+        bulk_saved.send(sender=model, developer_id=self.developer.pk, ids=[obj.pk for obj in objs], changes=[])
+
+    def _check_files(self, batch):
+        """Clear file names that are not stored blobs here (see the module docstring)."""
+        names = {values["file"] for _, values in batch if is_blob_name(values["file"])}
+        stored = set(StoredBlob.objects.filter(name__in=names).values_list("name", flat=True))
+        for _, values in batch:
+            if values["file"] and values["file"] not in stored:
+                values["file"] = ""
+
+    def _remember(self, section, batch, objs):
+        if section.type in REFERENCED:
+            id_map = self.id_maps[section.type]
+            for (old_id, _), obj in zip(batch, objs):
+                id_map[old_id] = obj.pk
+
+    def finish(self):
+        # the imported rows point at deduplicated files that may already be stored here
+        for name, n in self.blob_references.items():
+            StoredBlob.objects.filter(name=name).update(refcount=F("refcount") + n)
+        counters.recount(self.developer)
+        search.rebuild_index(self.developer)
+        leaderboard.rebuild(Course.objects.filter(developer=self.developer))
+
+
+def _flush(importer, section, batch, line_number):
+    try:
+        importer.flush(section, batch)
+    except IntegrityError as error:
+        # e.g. a course title the target workspace already uses
+        raise ValidationError({"line": line_number, "detail": f"{section.type} rows clash with existing data: {error}"})
+
+
+def import_stream(developer, lines, batch_size=1000, username_suffix=""):
+    """
+    Import NDJSON ``lines`` (str or bytes) into ``developer``'s workspace;
+    returns {section type: rows inserted}. Runs in one transaction per database.
+    """
+    if not connections[router.db_for_write(Course)].features.can_return_rows_from_bulk_insert:
+        raise ValidationError({"detail": "This database cannot return ids from bulk inserts; import is not supported."})
+    importer = _Importer(developer, batch_size, username_suffix)
+    shard = router.db_for_write(Course)
+    with transaction.atomic(using=DEFAULT_DB_ALIAS), transaction.atomic(using=shard):
+        section, batch, position = None, [], -1
+        header = footer = None
+        line_number = 0
+        for line_number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                kind = record["type"]
+            except (ValueError, KeyError, TypeError):
+                raise ValidationError({"line": line_number, "detail": "Not a JSON record with a type."})
+            if header is None:
+                if kind != "header" or record.get("format") != FORMAT or record.get("version") != VERSION:
+                    raise ValidationError({"line": line_number, "detail": f"Not a {FORMAT} v{VERSION} export."})
+                header = record
+                continue
+            if kind == "footer":
+                footer = record
+                break
+            index = SECTION_INDEX.get(kind)
+            if index is None or index < position:
+                raise ValidationError({"line": line_number, "detail": f"Unexpected record type '{kind}' here."})
+            if index != position:
+                _flush(importer, section, batch, line_number)
+                section, batch, position = SECTIONS[index], [], index
+            batch.append((record.get("id"), importer.convert(section, record, line_number)))
+            if len(batch) >= batch_size:
+                _flush(importer, section, batch, line_number)
+                batch = []
+        _flush(importer, section, batch, line_number)
+        if footer is None:
+            raise ValidationError({"detail": "Export is truncated (no footer line)."})
+        expected = {kind: n for kind, n in footer.get("counts", {}).items() if n}
+        if expected != importer.counts:
+            raise ValidationError({"detail": "Row counts do not match the footer.",
+                                   "expected": expected, "imported": importer.counts})
+        importer.finish()
+    return importer.counts
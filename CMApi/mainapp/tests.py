@@ -1,3 +1,154 @@
+import csv
+import io
+import json
+import zipfile
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import ApiKey, User
+from accounts.sharding import is_sharded, shard_aliases
+from . import gradebook
+from .models import Assignment, Course, Lesson, Progress, Student, Submission, Teacher
+
+
+class StudentDashboardQueryBudgetTests(TestCase):
+    # API key + developer + open-purge check, user profile checks
+    # (permissions), then courses, pending assignments and recent grades
+    QUERY_CEILING = 8
+
+    def setUp(self):
+        self.developer = User.objects.create_user("dashboard_dev", password="x", role="admin")
+        _, self.api_key = ApiKey.create_for_dev(self.developer)
+        user = User.objects.create_user("dashboard_student", password="x", role="student")
+        self.student = Student.objects.create(developer=self.developer, user=user, age=20)
+        self.course_number = 0
+
+    def add_courses(self, count):
+        today = timezone.now().date()
+        due = timezone.now() + timedelta(days=7)
+        for _ in range(count):
+            self.course_number += 1
+            course = Course.objects.create(
+                developer=self.developer, title=f"Course {self.course_number}", description="d",
+                start_date=today, end_date=today, duration=1,
+            )
+            course.students.add(self.student)
+            lessons = [
+                Lesson.objects.create(developer=self.developer, course=course, title=f"L{n}", content="c", order=n)
+                for n in range(3)
+            ]
+            Progress.objects.create(developer=self.developer, student=self.student, lesson=lessons[0], completed=True)
+            graded, pending = [
+                Assignment.objects.create(developer=self.developer, course=course, title=f"A{n}",
+                                          description="d", due_date=due + timedelta(hours=n))
+                for n in range(2)
+            ]
+            Submission.objects.create(developer=self.developer, assignment=graded, student=self.student,
+                                      file="submissions/answer.txt", grade=80)
+
+    def get_dashboard(self):
+        client = APIClient()
+        # a fresh user, so the profile lookups are counted like in a real request
+        client.force_authenticate(User.objects.get(pk=self.student.user_id))
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get("/api/dashboard/", HTTP_X_API_KEY=self.api_key)
+        self.assertEqual(response.status_code, 200)
+        return response.data, len(queries)
+
+    def test_query_count_does_not_grow_with_courses(self):
+        self.add_courses(1)
+        data, few = self.get_dashboard()
+        self.assertEqual(len(data["courses"]), 1)
+
+        self.add_courses(7)
+        data, many = self.get_dashboard()
+        self.assertEqual(len(data["courses"]), 8)
+        self.assertEqual(few, many)
+        self.assertLessEqual(many, self.QUERY_CEILING)
+
+    def test_dashboard_content(self):
+        self.add_courses(2)
+        data, _ = self.get_dashboard()
+        course = data["courses"][0]
+        self.assertEqual((course["lessons"], course["completed_lessons"]), (3, 1))
+        self.assertEqual(course["next_lesson"]["order"], 1)
+        self.assertEqual([a["title"] for a in data["pending_assignments"]], ["A1", "A1"])
+        self.assertEqual(len(data["recent_grades"]), 2)
+
+
+class GradebookTests(TestCase):
+
+    def setUp(self):
+        self.developer = User.objects.create_user("gradebook_dev", password="x", role="admin")
+        today = timezone.now().date()
+        self.course = Course.objects.create(developer=self.developer, title="No work yet", description="d",
+                                            start_date=today, end_date=today, duration=1)
+        user = User.objects.create_user("gradebook_student", password="x", role="student")
+        self.course.students.add(Student.objects.create(developer=self.developer, user=user, age=20))
+
+    def test_course_without_assignments(self):
+        data = gradebook.gradebook(self.course)
+        self.assertEqual(data["assignments"], [])
+        self.assertEqual(data["grades"], [[]])
+
+    def test_assignment_without_grades(self):
+        Assignment.objects.create(developer=self.developer, course=self.course, title="A",
+                                  description="d", due_date=timezone.now())
+        stats = gradebook.gradebook(self.course)["assignments"][0]["stats"]
+        self.assertEqual((stats["graded"], stats["median"]), (0, None))
+
+
+@skipUnless(is_sharded(), "needs a second tenant shard (SHARD_DATABASE_URLS)")
+class ShardedStreamingTests(TestCase):
+    """Streamed responses of a workspace that was moved off the default shard."""
+    databases = "__all__"
+
+    def setUp(self):
+        self.developer = User.objects.create_user("stream_dev", password="x", role="admin")
+        _, self.api_key = ApiKey.create_for_dev(self.developer)
+        teacher_user = User.objects.create_user("stream_teacher", password="x", role="teacher")
+        student_user = User.objects.create_user("stream_student", password="x", role="student")
+        teacher = Teacher.objects.create(developer=self.developer, user=teacher_user,
+                                         specialization="s", experience=1)
+        student = Student.objects.create(developer=self.developer, user=student_user, age=20)
+        today = timezone.now().date()
+        self.course = Course.objects.create(developer=self.developer, instructor=teacher, title="Sharded",
+                                            description="d", start_date=today, end_date=today, duration=1)
+        self.course.students.add(student)
+        self.assignment = Assignment.objects.create(developer=self.developer, course=self.course, title="A",
+                                                    description="d", due_date=timezone.now())
+        Submission.objects.create(developer=self.developer, assignment=self.assignment, student=student,
+                                  file="", grade=90)
+        target = next(alias for alias in shard_aliases() if alias != DEFAULT_DB_ALIAS)
+        call_command("move_tenant", str(self.developer.pk), target, stdout=io.StringIO())
+        self.teacher_user = teacher_user
+
+    def get(self, user, url):
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get(url, HTTP_X_API_KEY=self.api_key)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content)
+
+    def test_gradebook_csv(self):
+        body = self.get(self.teacher_user, f"/api/courses/{self.course.pk}/gradebook/csv/")
+        rows = list(csv.reader(io.StringIO(body.decode())))
+        self.assertEqual(rows[1][1:], ["stream_student", "90.00"])
+
+    def test_submissions_zip(self):
+        body = self.get(self.teacher_user, f"/api/assignments/{self.assignment.pk}/submissions/zip/")
+        with zipfile.ZipFile(io.BytesIO(body)) as archive:
+            manifest = archive.read("manifest.csv").decode().splitlines()
+        self.assertEqual(len(manifest), 2)
 
-# Create your tests here.
+    def test_workspace_export(self):
+        body = self.get(self.developer, "/api/workspace/export/")
+        footer = json.loads(body.decode().splitlines()[-1])
+        self.assertEqual((footer["counts"]["course"], footer["counts"]["submission"]), (1, 1))
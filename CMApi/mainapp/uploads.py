@@ -0,0 +1,193 @@
+# mainapp/uploads.py
+"""
+Resumable course-material uploads (a small subset of the tus protocol).
+
+1. ``create_session`` records the declared size and an empty partial file
+   under MEDIA_ROOT/uploads/partial/.
+2. ``write_chunk`` appends one request body at the session's offset, reading
+   the request stream directly (Django never spools it), and moves the offset
+   by the bytes actually written. A dropped connection keeps what arrived, so
+   the client resumes from the offset reported by HEAD. The offset is claimed
+   with a short lease (``writing_until``) instead of a row lock, so no
+   database transaction stays open during the transfer.
+3. ``finalize`` takes the same lease, so it runs once per session, checks
+   the size and SHA-256 and moves the file into the content-addressed store
+   (a rename, no copy), then creates the CourseMaterial row.
+
+``python manage.py purge_uploads`` drops sessions idle for longer than
+UPLOAD_SESSION_TTL_HOURS, together with their partial files.
+"""
+import hashlib
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import storages
+from django.db import router, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .models import CourseMaterial, UploadSession
+from .storage import ContentAddressedStorage
+
+PARTIAL_DIR = "uploads/partial"
+COPY_BUFFER = 1 << 20
+
+
+class FinalizeInProgress(Exception):
+    """Another request is finalizing (or writing to) the session."""
+
+
+class OffsetMismatch(Exception):
+    """The client's Upload-Offset is not where the session is."""
+
+    def __init__(self, offset):
+        super().__init__(offset)
+        self.offset = offset
+
+
+def _lease():
+    return timedelta(seconds=getattr(settings, "UPLOAD_CHUNK_LEASE_SECONDS", 600))
+
+
+def _claim(session, offset):
+    """Take the session's lease if it is at ``offset`` and nobody holds it; returns whether it was taken."""
+    now = timezone.now()
+    return bool(
+        UploadSession.objects.filter(pk=session.pk, offset=offset)
+        .filter(Q(writing_until__isnull=True) | Q(writing_until__lt=now))
+        .update(writing_until=now + _lease())
+    )
+
+
+def _storage():
+    return storages["default"]
+
+
+def partial_path(session):
+    return _storage().path(session.partial_name)
+
+
+def create_session(developer, user, course, title, filename, size, checksum=""):
+    session = UploadSession.objects.create(
+        developer=developer, course=course, created_by=user, title=title,
+        filename=os.path.basename(filename), size=size, checksum=checksum.lower(),
+    )
+    path = partial_path(session)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "wb").close()
+    return session
+
+
+def write_chunk(session, offset, stream, length):
+    """Write up to ``length`` bytes from ``stream`` at ``offset``; returns the new offset."""
+    if offset + length > session.size:
+        raise ValidationError({"detail": "Chunk goes past the declared upload size."})
+    # claim the offset with one conditional UPDATE: no transaction or row lock
+    # is held while the (possibly slow) client sends the body
+    if not _claim(session, offset):
+        # wrong offset, or another PATCH is writing this one right now
+        raise OffsetMismatch(UploadSession.objects.filter(pk=session.pk).values_list("offset", flat=True).first())
+    written = 0
+    try:
+        with open(partial_path(session), "r+b") as out:
+            out.seek(offset)
+            while written < length:
+                try:
+                    data = stream.read(min(COPY_BUFFER, length - written))
+                except OSError:
+                    # client went away (UnreadablePostError): keep what made it to disk
+                    break
+                if not data:
+                    break
+                out.write(data)
+                written += len(data)
+    finally:
+        UploadSession.objects.filter(pk=session.pk, offset=offset).update(
+            offset=offset + written, writing_until=None, updated_at=timezone.now(),
+        )
+    session.offset = offset + written
+    return session.offset
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(COPY_BUFFER), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def finalize(session, checksum=""):
+    """Verify the upload and turn it into a CourseMaterial."""
+    if session.offset != session.size:
+        raise ValidationError({"detail": f"Upload incomplete: {session.offset} of {session.size} bytes received."})
+    expected = (checksum or session.checksum).lower()
+    if not expected:
+        raise ValidationError({"checksum": "A SHA-256 checksum is required to finalize."})
+    # the same lease as a chunk write: a second finalize (or a late PATCH)
+    # cannot get past this while the file is hashed and moved
+    if not _claim(session, session.size):
+        raise FinalizeInProgress()
+    path = partial_path(session)
+    try:
+        digest = _sha256(path)
+        if digest != expected:
+            # some chunk was corrupted; there is no telling which, so start over
+            open(path, "wb").close()
+            UploadSession.objects.filter(pk=session.pk).update(offset=0, updated_at=timezone.now())
+            raise ValidationError({"checksum": "Checksum mismatch; the upload was reset to offset 0."})
+
+        storage = _storage()
+        if isinstance(storage, ContentAddressedStorage):
+            name = storage.adopt(path, digest, session.size, session.filename)
+        else:
+            with open(path, "rb") as f:
+                name = storage.save(f"course_materials/{session.filename}", File(f))
+            os.remove(path)
+    except Exception:
+        UploadSession.objects.filter(pk=session.pk).update(writing_until=None)
+        raise
+    with transaction.atomic(using=router.db_for_write(CourseMaterial)):
+        material = CourseMaterial.objects.create(
+            developer_id=session.developer_id, course_id=session.course_id, title=session.title, file=name,
+        )
+        session.delete()
+    return material
+
+
+def discard(session):
+    path = partial_path(session)
+    session.delete()
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def stale_cutoff(now=None):
+    return (now or timezone.now()) - timedelta(hours=getattr(settings, "UPLOAD_SESSION_TTL_HOURS", 24))
+
+
+def purge_stale(cutoff):
+    """Drop this shard's sessions idle since before ``cutoff``; returns how many."""
+    stale = list(UploadSession.objects.filter(updated_at__lt=cutoff))
+    for session in stale:
+        discard(session)
+    return len(stale)
+
+
+def purge_stray_files(cutoff, live_ids):
+    """Remove partial files older than ``cutoff`` whose session (on any shard) is gone."""
+    removed = 0
+    directory = _storage().path(PARTIAL_DIR)
+    if not os.path.isdir(directory):
+        return removed
+    for entry in os.scandir(directory):
+        # only old files, so a session being created right now is safe
+        if not entry.name.endswith(".part") or entry.stat().st_mtime >= cutoff.timestamp():
+            continue
+        if entry.name[:-len(".part")] not in live_ids:
+            os.remove(entry.path)
+            removed += 1
+    return removed
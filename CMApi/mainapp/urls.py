@@ -4,6 +4,13 @@ from .views import TeacherViewSet, StudentViewSet, CourseViewSet, CourseMaterial
 from rest_framework_simplejwt.views import TokenRefreshView
 from accounts.authentication import TenantTokenObtainPairView
 from .views_seeds import SeedDeveloperDataView
+from .views_search import SearchView
+from .views_dashboard import UpcomingDeadlinesView, StudentDashboardView, TeacherDashboardView
+from .views_sync import ChangeFeedView
+from .views_events import event_stream
+from .views_batch import BatchView
+from .views_uploads import UploadSessionViewSet
+from .views_transfer import WorkspaceExportView, WorkspaceImportView
 
 
 router = DefaultRouter()
@@ -15,6 +22,7 @@ router.register(r'assignments', AssignmentViewSet)
 router.register(r'submissions', SubmissionViewSet)
 router.register(r'lessons', LessonViewSet)
 router.register(r'progress', ProgressViewSet)
+router.register(r'uploads', UploadSessionViewSet)
 
 
 urlpatterns = [
@@ -23,6 +31,15 @@ urlpatterns = [
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path("api/accounts/", include("accounts.urls")),
     path("api/dev/seed/", SeedDeveloperDataView.as_view(), name="seed_this_workspace"),
-    path("api/listusers/", ListUsersViews.as_view(), name ="List_Users")
+    path("api/listusers/", ListUsersViews.as_view(), name ="List_Users"),
+    path("api/search/", SearchView.as_view(), name="search"),
+    path("api/deadlines/", UpcomingDeadlinesView.as_view(), name="upcoming_deadlines"),
+    path("api/dashboard/", StudentDashboardView.as_view(), name="student_dashboard"),
+    path("api/dashboard/teacher/", TeacherDashboardView.as_view(), name="teacher_dashboard"),
+    path("api/changes/", ChangeFeedView.as_view(), name="change_feed"),
+    path("api/events/", event_stream, name="event_stream"),
+    path("api/batch/", BatchView.as_view(), name="batch"),
+    path("api/workspace/export/", WorkspaceExportView.as_view(), name="workspace_export"),
+    path("api/workspace/import/", WorkspaceImportView.as_view(), name="workspace_import"),
 
 ]
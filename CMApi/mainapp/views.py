@@ -7,7 +7,7 @@ from .serializers import (
     TeacherSerializer, StudentSerializer, CourseSerializer, CourseMaterialSerializer,
     AssignmentSerializer, SubmissionStudentSerializer, SubmissionTeacherSerializer, LessonSerializer, ProgressSerializer, UserDetailsSerializer,UserSummarySerializer
 )
-from .permissions import  IsCourseOwnerOrReadOnly, IsOwnSubmissionOrCourseTeacher, IsOwnProgressOrCourseTeacher, IsOwnProfileOrAdmin, HasDeveloper, IsUserUnderDeveloper
+from .permissions import  IsCourseOwnerOrReadOnly, IsCourseInstructor, IsAssignmentInstructor, IsCourseOwnerOrSelfEnrolling, IsOwnSubmissionOrCourseTeacher, IsOwnProgressOrCourseTeacher, IsOwnProfileOrAdmin, HasDeveloper, IsUserUnderDeveloper
 from rest_framework import serializers  # for ValidationError
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -15,6 +15,21 @@ from rest_framework import status
 from django.utils import timezone
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.views import APIView
+from rest_framework.filters import OrderingFilter
+from django.db.models import Count
+from .filters import CourseCatalogFilter
+from . import analytics, archives, downloads, enrollment, gradebook, grading, leaderboard, progress
+import csv
+from django.core.files.storage import default_storage
+from django.http import StreamingHttpResponse
+from accounts.sharding import iter_on_current_shard
+
+
+class _Echo:
+    """File-like object for csv.writer: writerow() returns the line instead of buffering it."""
+    def write(self, value):
+        return value
+
 # Teacher and Student viewsets: use DjangoModelPermissions so admin/perm-coded users can manage them.
 # In many designs Teacher/Student creation happens via registration (accounts app) so you may only
 # need list/retrieve for normal users. Keeping DjangoModelPermissions allows fine-grained control.
@@ -99,6 +114,9 @@ class CourseViewSet(viewsets.ModelViewSet):
     # DjangoModelPermissions checks model-level add/view/change/delete perms.
     # IsCourseOwnerOrReadOnly enforces that only the instructor (teacher) can modify their own course.
     permission_classes = [IsAuthenticated,HasDeveloper,IsUserUnderDeveloper, DjangoModelPermissions, IsCourseOwnerOrReadOnly]
+    # ?category=&level=&is_active=&start_date_after=... and ?ordering=-start_date,title
+    filter_backends = [CourseCatalogFilter, OrderingFilter]
+    ordering_fields = ["title", "start_date", "end_date", "created_at", "category", "level", "duration"]
 
     def get_queryset(self):
         # Priority 1: API key workspace
@@ -115,6 +133,159 @@ class CourseViewSet(viewsets.ModelViewSet):
             return Course.objects.filter(students=user.student)
         return Course.objects.none()
     
+    @action(detail=False, methods=["get"])
+    def facets(self, request):
+        """
+        GET /api/courses/facets/?<same filters as the list>
+        Course counts per category, per level and per (category, level),
+        computed from a single GROUP BY query.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = (
+            queryset.order_by()
+            .values("category", "level")
+            .annotate(count=Count("id"))
+            .order_by("category", "level")
+        )
+        total, by_category, by_level, pairs = 0, {}, {}, []
+        for row in rows:
+            total += row["count"]
+            by_category[row["category"]] = by_category.get(row["category"], 0) + row["count"]
+            by_level[row["level"]] = by_level.get(row["level"], 0) + row["count"]
+            pairs.append(row)
+        return Response({
+            "total": total,
+            "category": by_category,
+            "level": by_level,
+            "category_level": pairs,
+        })
+
+    @action(detail=True, methods=["get"],
+            permission_classes=[IsAuthenticated, HasDeveloper, IsUserUnderDeveloper, IsCourseInstructor])
+    def completion(self, request, pk=None):
+        """
+        GET /api/courses/{id}/completion/            per-student, per-lesson and overall completion rates
+        GET /api/courses/{id}/completion/?matrix=1   plus one "0101..." row per student (heatmap)
+        Instructor or superuser. Cached until the course's progress, lessons or roster change.
+        """
+        course = self.get_object()
+        include_matrix = request.query_params.get("matrix") in ("1", "true")
+        return Response(analytics.course_completion(course, include_matrix=include_matrix))
+
+    @action(detail=True, methods=["get"],
+            permission_classes=[IsAuthenticated, HasDeveloper, IsUserUnderDeveloper, IsCourseInstructor])
+    def gradebook(self, request, pk=None):
+        """
+        GET /api/courses/{id}/gradebook/
+        Students x assignments grade matrix with per-assignment stats
+        (graded, mean, median, stddev, p25, p75, min, max). Instructor or superuser.
+        """
+        return Response(gradebook.gradebook(self.get_object()))
+
+    @action(detail=True, methods=["get"], url_path="gradebook/csv",
+            permission_classes=[IsAuthenticated, HasDeveloper, IsUserUnderDeveloper, IsCourseInstructor])
+    def gradebook_csv(self, request, pk=None):
+        """GET /api/courses/{id}/gradebook/csv/  streamed CSV, one row per student."""
+        course = self.get_object()
+        writer = csv.writer(_Echo())
+        response = StreamingHttpResponse(
+            iter_on_current_shard(writer.writerow(row) for row in gradebook.iter_csv_rows(course)),
+            content_type="text/csv",
+        )
+        response["Content-Disposition"] = f'attachment; filename="gradebook-course-{course.pk}.csv"'
+        return response
+
+    @action(detail=True, methods=["get"], url_path="leaderboard",
+            permission_classes=[IsAuthenticated, HasDeveloper, IsUserUnderDeveloper])
+    def leaderboard(self, request, pk=None):
+        """
+        GET /api/courses/{id}/leaderboard/?top=10          best N students
+        GET /api/courses/{id}/leaderboard/?around=me&k=3   the calling student's rank +- k
+        GET /api/courses/{id}/leaderboard/?around=<student id>&k=3
+        Ranked by average grade, then completed lessons. Visible to the course's
+        enrolled students, its instructor and superusers; around=<student id>
+        is for the instructor and superusers only.
+        """
+        course = self.get_object()
+        teacher = getattr(request.user, "teacher", None)
+        is_staff_view = request.user.is_superuser or (teacher is not None and course.instructor_id == teacher.id)
+        student = getattr(request.user, "student", None)
+        if not is_staff_view and not (student is not None and course.students.filter(pk=student.pk).exists()):
+            raise PermissionDenied("Only the course's students and instructor can see its leaderboard.")
+        params = request.query_params
+        try:
+            top = min(int(params.get("top", 10)), 1000)
+            k = min(int(params.get("k", 3)), 100)
+        except ValueError:
+            raise serializers.ValidationError({"detail": "top and k must be integers."})
+        board = leaderboard.get_board(course.pk)
+        with board.lock:
+            around = params.get("around")
+            if around is None:
+                first_rank, keys = board.top(max(top, 0))
+            else:
+                if around == "me":
+                    if not hasattr(request.user, "student"):
+                        raise serializers.ValidationError({"around": "Only students can use around=me."})
+                    student_id = request.user.student.pk
+                elif around.isdigit():
+                    if not is_staff_view:
+                        raise PermissionDenied("Only the instructor can look up another student's rank.")
+                    student_id = int(around)
+                else:
+                    raise serializers.ValidationError({"around": "Use 'me' or a student id."})
+                first_rank, keys = board.around(student_id, max(k, 0))
+                if first_rank is None:
+                    return Response({"detail": "Student is not enrolled in this course."}, status=status.HTTP_404_NOT_FOUND)
+            size = len(board)
+        return Response({"course": course.pk, "students": size, "results": leaderboard.describe(first_rank, keys)})
+
+    @action(detail=True, methods=["post"],
+            permission_classes=[IsAuthenticated, HasDeveloper, IsUserUnderDeveloper, IsCourseOwnerOrSelfEnrolling])
+    def enroll(self, request, pk=None):
+        """
+        POST /api/courses/{id}/enroll/  {"student_ids": [1, 2, ...]}   (instructor/superuser, up to 10k ids)
+        POST /api/courses/{id}/enroll/                                  (student self-enrollment)
+        Self-enrollment respects the course capacity; when it is full the
+        student is put on the waitlist (202 with their position).
+        """
+        course = self.get_object()
+        if "student_ids" in request.data:
+            student_ids = enrollment.parse_student_ids(request.data)
+            enrollment.validate_tenant_students(course, student_ids)
+            added = enrollment.enroll_students(course, student_ids)
+            return Response({"enrolled": len(added), "already_enrolled": len(student_ids) - len(added)})
+
+        student = getattr(request.user, "student", None)
+        if student is None:
+            raise serializers.ValidationError({"student_ids": "Required unless you enroll yourself as a student."})
+        if not course.is_active:
+            raise serializers.ValidationError("This course is not open for enrollment.")
+        result, position = enrollment.self_enroll(course, student)
+        if result == "waitlisted":
+            return Response({"status": result, "position": position}, status=status.HTTP_202_ACCEPTED)
+        return Response({"status": result})
+
+    @action(detail=True, methods=["post"],
+            permission_classes=[IsAuthenticated, HasDeveloper, IsUserUnderDeveloper, IsCourseOwnerOrSelfEnrolling])
+    def unenroll(self, request, pk=None):
+        """
+        POST /api/courses/{id}/unenroll/  {"student_ids": [1, 2, ...]}   (instructor/superuser)
+        POST /api/courses/{id}/unenroll/                                  (student leaves course or waitlist)
+        Freed seats go to the head of the waitlist.
+        """
+        course = self.get_object()
+        if "student_ids" in request.data:
+            student_ids = enrollment.parse_student_ids(request.data)
+            removed = enrollment.unenroll_students(course, student_ids)
+            return Response({"unenrolled": removed, "not_enrolled": len(student_ids) - removed})
+
+        student = getattr(request.user, "student", None)
+        if student is None:
+            raise serializers.ValidationError({"student_ids": "Required unless you unenroll yourself as a student."})
+        removed, left_waitlist = enrollment.self_unenroll(course, student)
+        return Response({"unenrolled": removed, "left_waitlist": left_waitlist})
+
     def _request_includes_instructor(self):
         """
         Helper: checks whether the raw request payload included an instructor field.
@@ -178,6 +349,12 @@ class CourseViewSet(viewsets.ModelViewSet):
         # If user is superuser, allow changes (default flow)
         return super().update(request, *args, **kwargs)
 
+    def perform_update(self, serializer):
+        course = serializer.save()
+        # a raised capacity frees seats for the waitlist
+        if enrollment.promote_waitlist(course):
+            course.refresh_from_db(fields=["student_count"])
+
 
 class CourseMaterialViewSet(viewsets.ModelViewSet):
     queryset = CourseMaterial.objects.all()
@@ -219,6 +396,16 @@ class CourseMaterialViewSet(viewsets.ModelViewSet):
         else:
             serializer.save()
 
+    @action(detail=True, methods=["get"])
+    def download(self, request, pk=None):
+        """
+        GET /api/course-materials/{id}/download/
+        The material's file, with the same access rules as the detail view.
+        Supports Range / If-Range; see mainapp/downloads.py for web-server offload.
+        """
+        material = self.get_object()
+        return downloads.serve_file(request, material.file, downloads.download_name(material.title, material.file))
+
 
 class AssignmentViewSet(viewsets.ModelViewSet):
     queryset = Assignment.objects.all()
@@ -258,6 +445,22 @@ class AssignmentViewSet(viewsets.ModelViewSet):
         else:
             serializer.save()
 
+    @action(detail=True, methods=["get"], url_path="submissions/zip",
+            permission_classes=[IsAuthenticated, HasDeveloper, IsUserUnderDeveloper, IsAssignmentInstructor])
+    def submissions_zip(self, request, pk=None):
+        """
+        GET /api/assignments/{id}/submissions/zip/
+        Every submitted file plus manifest.csv (student, grade, file), streamed
+        as a ZIP while it is built. Course instructor or superuser.
+        """
+        assignment = self.get_object()
+        response = StreamingHttpResponse(
+            iter_on_current_shard(archives.iter_submission_zip(assignment, default_storage)),
+            content_type="application/zip",
+        )
+        response["Content-Disposition"] = f'attachment; filename="assignment-{assignment.pk}-submissions.zip"'
+        return response
+
 
 class SubmissionViewSet(viewsets.ModelViewSet):
     queryset = Submission.objects.select_related("assignment__course", "student__user").all()
@@ -341,6 +544,38 @@ class SubmissionViewSet(viewsets.ModelViewSet):
         # Otherwise deny
         raise PermissionDenied({"detail": "You do not have permission to modify this submission."})
 
+    @action(detail=False, methods=["post"], url_path="bulk-grade",
+            permission_classes=[IsAuthenticated, HasDeveloper, IsUserUnderDeveloper])
+    def bulk_grade(self, request):
+        """
+        POST /api/submissions/bulk-grade/  {"grades": {"12": 87.5, "13": null, ...}}
+        Course instructor (or superuser) only. All grades are applied in one
+        transaction, or none when any row fails: 400 {"errors": {id: message}}.
+        """
+        user = request.user
+        if not (user.is_superuser or hasattr(user, "teacher")):
+            raise PermissionDenied("Only teachers can grade submissions.")
+        grades = request.data.get("grades") if isinstance(request.data, dict) else None
+        if not isinstance(grades, dict) or not grades:
+            raise serializers.ValidationError({"grades": "A non-empty {submission_id: grade} map is required."})
+        if len(grades) > grading.MAX_GRADES_PER_REQUEST:
+            raise serializers.ValidationError({"grades": f"At most {grading.MAX_GRADES_PER_REQUEST} grades per request."})
+        updated, unchanged, errors = grading.bulk_grade(request.developer, user, grades)
+        if errors:
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"updated": updated, "unchanged": unchanged})
+
+    @action(detail=True, methods=["get"])
+    def download(self, request, pk=None):
+        """
+        GET /api/submissions/{id}/download/
+        The submitted file, for its student and the course instructor.
+        Supports Range / If-Range; see mainapp/downloads.py for web-server offload.
+        """
+        submission = self.get_object()
+        name = f"submission-{submission.pk}-{submission.assignment.title}"
+        return downloads.serve_file(request, submission.file, downloads.download_name(name, submission.file))
+
 class LessonViewSet(viewsets.ModelViewSet):
     queryset = Lesson.objects.all()
 
@@ -402,3 +637,22 @@ class ProgressViewSet(viewsets.ModelViewSet):
             serializer.save(student=student)
         else:
             serializer.save()
+
+    @action(detail=False, methods=["post"],
+            permission_classes=[IsAuthenticated, HasDeveloper, IsUserUnderDeveloper])
+    def sync(self, request):
+        """
+        POST /api/progress/sync/
+        {"items": [{"lesson": 12, "completed": true}, {"lesson": 13}, ...]}   (completed defaults to true)
+        Students only; upserts their progress in one statement and returns one
+        result per item: created / updated / unchanged / error.
+        """
+        student = getattr(request.user, "student", None)
+        if student is None:
+            raise PermissionDenied("Only students can sync their progress.")
+        items = request.data.get("items") if isinstance(request.data, dict) else None
+        if not isinstance(items, list) or not items:
+            raise serializers.ValidationError({"items": "A non-empty list is required."})
+        if len(items) > progress.MAX_ITEMS_PER_SYNC:
+            raise serializers.ValidationError({"items": f"At most {progress.MAX_ITEMS_PER_SYNC} items per sync."})
+        return Response({"results": progress.sync_progress(student, items)})
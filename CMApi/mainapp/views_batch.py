@@ -0,0 +1,158 @@
+# mainapp/views_batch.py
+import contextvars
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .permissions import HasDeveloper, IsUserUnderDeveloper
+
+BATCH_METHODS = {"GET", "POST", "PUT", "PATCH", "DELETE"}
+# sub-requests that make no sense (or would never return) inside a batch
+EXCLUDED_PATHS = ("/api/batch/", "/api/events/", "/api/workspace/")
+
+
+class BatchView(APIView):
+    """
+    POST /api/batch/
+    {
+      "parallel": true,                       # optional: run adjacent GETs concurrently
+      "requests": [
+        {"method": "GET", "path": "/api/courses/12/"},
+        {"method": "GET", "path": "/api/lessons/?course=12"},
+        {"method": "PATCH", "path": "/api/progress/7/", "body": {"completed": true}}
+      ]
+    }
+    -> [{"status": 200, "body": {...}}, ...] in request order.
+
+    The API key, JWT and permission chain run once for the batch; every
+    sub-request is dispatched in-process as the same user and developer, and
+    still goes through its own view's permission checks. Writes run in order
+    and split the GETs around them into separate parallel groups.
+    """
+    permission_classes = [IsAuthenticated, HasDeveloper, IsUserUnderDeveloper]
+
+    def post(self, request):
+        items = request.data.get("requests") if isinstance(request.data, dict) else None
+        max_requests = getattr(settings, "BATCH_MAX_REQUESTS", 25)
+        if not isinstance(items, list) or not items:
+            return Response({"detail": "requests must be a non-empty list."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > max_requests:
+            return Response({"detail": f"At most {max_requests} requests per batch."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        errors = {}
+        for index, item in enumerate(items):
+            error = self._validate(item)
+            if error:
+                errors[index] = error
+        if errors:
+            return Response({"detail": "Invalid sub-requests.", "errors": errors},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        parallel = bool(request.data.get("parallel")) and getattr(settings, "BATCH_MAX_WORKERS", 4) > 1
+        results = [None] * len(items)
+        group = []
+        for index, item in enumerate(items):
+            if item.get("method", "GET").upper() == "GET":
+                group.append(index)
+                continue
+            self._run_group(request, items, group, results, parallel)
+            group = []
+            results[index] = self._dispatch(request, item)
+        self._run_group(request, items, group, results, parallel)
+        return Response(results)
+
+    def _validate(self, item):
+        if not isinstance(item, dict) or not isinstance(item.get("path"), str):
+            return "Each request needs a path."
+        if item.get("method", "GET").upper() not in BATCH_METHODS:
+            return f"Method must be one of {', '.join(sorted(BATCH_METHODS))}."
+        path = urlsplit(item["path"]).path
+        if not path.startswith("/api/") or path.startswith(EXCLUDED_PATHS):
+            return "Path is not allowed in a batch."
+        return None
+
+    def _run_group(self, request, items, indexes, results, parallel):
+        if not indexes:
+            return
+        if not parallel or len(indexes) == 1:
+            for index in indexes:
+                results[index] = self._dispatch(request, items[index])
+            return
+
+        def run(item):
+            try:
+                return self._dispatch(request, item)
+            finally:
+                # worker threads open their own connections; don't leak them
+                connections.close_all()
+
+        workers = min(len(indexes), getattr(settings, "BATCH_MAX_WORKERS", 4))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # copy the context per task so the pinned tenant shard carries over
+            futures = {
+                index: pool.submit(contextvars.copy_context().run, run, items[index])
+                for index in indexes
+            }
+        for index, future in futures.items():
+            results[index] = future.result()
+
+    def _dispatch(self, request, item):
+        sub = self._build_request(request, item)
+        try:
+            match = resolve(sub.path_info)
+        except Resolver404:
+            return {"status": status.HTTP_404_NOT_FOUND, "body": {"detail": "Not found."}}
+        response = match.func(sub, *match.args, **match.kwargs)
+        if response.streaming:
+            # downloads, CSV/ZIP exports: their bodies do not fit in a JSON envelope
+            response.close()
+            return {"status": status.HTTP_501_NOT_IMPLEMENTED,
+                    "body": {"detail": "Streamed responses cannot be batched; request this path directly."}}
+        if hasattr(response, "render"):
+            response.render()
+        content = response.content
+        if response.get("Content-Type", "").startswith("application/json"):
+            body = json.loads(content) if content else None
+        else:
+            body = content.decode(response.charset or "utf-8", errors="replace")
+        return {"status": response.status_code, "body": body}
+
+    def _build_request(self, request, item):
+        outer = request._request
+        url = urlsplit(item["path"])
+        sub = HttpRequest()
+        sub.method = item.get("method", "GET").upper()
+        sub.path = sub.path_info = url.path
+        sub.META = {
+            key: value for key, value in outer.META.items()
+            if key not in ("CONTENT_TYPE", "CONTENT_LENGTH", "QUERY_STRING")
+        }
+        sub.META.update(REQUEST_METHOD=sub.method, PATH_INFO=url.path, QUERY_STRING=url.query)
+        sub.GET = QueryDict(url.query)
+        body = b""
+        if "body" in item and sub.method != "GET":
+            body = json.dumps(item["body"]).encode()
+            sub.META.update(CONTENT_TYPE="application/json", CONTENT_LENGTH=str(len(body)))
+        sub._body = body
+        sub._stream = io.BytesIO(body)
+        sub._read_started = False
+
+        # authentication and tenant resolution already happened for the batch
+        sub.user = request.user
+        sub._force_auth_user = request.user
+        sub._force_auth_token = request.auth
+        sub.developer = request.developer
+        if hasattr(outer, "session"):
+            sub.session = outer.session
+        return sub
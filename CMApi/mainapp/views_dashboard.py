@@ -0,0 +1,229 @@
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, Exists, F, IntegerField, Max, Min, OuterRef, Q, Subquery, Window
+from django.db.models.functions import Coalesce, RowNumber
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import generics
+from rest_framework.exceptions import ValidationError, PermissionDenied
+from rest_framework.pagination import CursorPagination
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .models import Assignment, Course, Lesson, Progress, Submission
+from .permissions import HasDeveloper, IsUserUnderDeveloper
+from .serializers import DeadlineSerializer
+
+
+def _parse_moment(value, name):
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is not None:
+            moment = datetime.combine(day, time.min)
+    if moment is None:
+        raise ValidationError({name: "must be an ISO date or datetime."})
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+class DeadlineCursorPagination(CursorPagination):
+    # (due_date, id) is unique, so the cursor stays stable while rows change
+    ordering = ("due_date", "id")
+    page_size = 20
+    page_size_query_param = "limit"
+    max_page_size = 100
+
+
+class UpcomingDeadlinesView(generics.ListAPIView):
+    """
+    GET /api/deadlines/?from=<iso>&to=<iso>&limit=20&cursor=<next>
+    The student's assignments due in [from, to) across every enrolled course,
+    each with the student's own submission status. Defaults to the next 14 days.
+    One query per page, whatever the number of courses.
+    """
+    serializer_class = DeadlineSerializer
+    pagination_class = DeadlineCursorPagination
+    permission_classes = [IsAuthenticated, HasDeveloper, IsUserUnderDeveloper]
+    default_window = timedelta(days=14)
+
+    def get_window(self):
+        params = self.request.query_params
+        start = _parse_moment(params["from"], "from") if params.get("from") else timezone.now()
+        end = _parse_moment(params["to"], "to") if params.get("to") else start + self.default_window
+        if end <= start:
+            raise ValidationError({"to": "must be after from."})
+        return start, end
+
+    def get_queryset(self):
+        student = getattr(self.request.user, "student", None)
+        if student is None:
+            raise PermissionDenied("Only students have a deadlines feed.")
+        start, end = self.get_window()
+        mine = Submission.objects.filter(assignment=OuterRef("pk"), student=student).order_by("-submitted_at")
+        return (
+            Assignment.objects
+            .filter(developer=self.request.developer, course__students=student,
+                    due_date__gte=start, due_date__lt=end)
+            .annotate(
+                course_title=F("course__title"),
+                my_submission_id=Subquery(mine.values("id")[:1]),
+                my_grade=Subquery(mine.values("grade")[:1]),
+                my_submitted_at=Subquery(mine.values("submitted_at")[:1]),
+            )
+        )
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["now"] = timezone.now()
+        return context
+
+
+class StudentDashboardView(APIView):
+    """
+    GET /api/dashboard/
+    The student home screen in one call: enrolled courses with completion and
+    the next unfinished lesson, pending assignments (a few per course) and the
+    most recently graded submissions. Three queries, whatever the number of courses.
+    """
+    permission_classes = [IsAuthenticated, HasDeveloper, IsUserUnderDeveloper]
+    pending_per_course = 3
+    recent_grades = 10
+
+    def get(self, request):
+        student = getattr(request.user, "student", None)
+        if student is None:
+            raise PermissionDenied("Only students have a dashboard.")
+        now = timezone.now()
+        return Response({
+            "courses": self.get_courses(student),
+            "pending_assignments": self.get_pending_assignments(student, now),
+            "recent_grades": self.get_recent_grades(student),
+            "generated_at": now,
+        })
+
+    def get_courses(self, student):
+        done = Progress.objects.filter(student=student, completed=True)
+        completed = (
+            done.filter(lesson__course=OuterRef("pk")).order_by()
+            .values("lesson__course").annotate(n=Count("pk")).values("n")
+        )
+        next_lesson = (
+            Lesson.objects.filter(course=OuterRef("pk"))
+            .exclude(pk__in=done.values("lesson_id"))
+            .order_by("order", "pk")
+        )
+        courses = (
+            Course.objects.filter(developer=self.request.developer, students=student)
+            .annotate(
+                completed_lessons=Coalesce(Subquery(completed, output_field=IntegerField()), 0),
+                next_lesson_id=Subquery(next_lesson.values("pk")[:1]),
+                next_lesson_title=Subquery(next_lesson.values("title")[:1]),
+                next_lesson_order=Subquery(next_lesson.values("order")[:1]),
+            )
+            .order_by("start_date", "pk")
+            .values(
+                "id", "title", "category", "level", "start_date", "end_date", "lesson_count",
+                "completed_lessons", "next_lesson_id", "next_lesson_title", "next_lesson_order",
+            )
+        )
+        return [
+            {
+                "id": c["id"], "title": c["title"], "category": c["category"], "level": c["level"],
+                "start_date": c["start_date"], "end_date": c["end_date"],
+                "lessons": c["lesson_count"], "completed_lessons": c["completed_lessons"],
+                "completion": round(c["completed_lessons"] / c["lesson_count"], 4) if c["lesson_count"] else 0.0,
+                "next_lesson": None if c["next_lesson_id"] is None else {
+                    "id": c["next_lesson_id"], "title": c["next_lesson_title"], "order": c["next_lesson_order"],
+                },
+            }
+            for c in courses
+        ]
+
+    def get_pending_assignments(self, student, now):
+        """Unsubmitted assignments due from now on, the earliest few of each course."""
+        submitted = Submission.objects.filter(assignment=OuterRef("pk"), student=student)
+        return list(
+            Assignment.objects
+            .filter(developer=self.request.developer, course__students=student, due_date__gte=now)
+            .exclude(Exists(submitted))
+            .annotate(
+                course_title=F("course__title"),
+                position=Window(RowNumber(), partition_by=F("course_id"), order_by=[F("due_date"), F("pk")]),
+            )
+            .filter(position__lte=self.pending_per_course)
+            .order_by("due_date", "pk")
+            .values("id", "title", "due_date", "course_id", "course_title")
+        )
+
+    def get_recent_grades(self, student):
+        return list(
+            Submission.objects
+            .filter(developer=self.request.developer, student=student, grade__isnull=False)
+            .order_by("-updated_at", "-pk")
+            .values(
+                "id", "grade", "submitted_at", "updated_at",
+                assignment_title=F("assignment__title"), course_id=F("assignment__course_id"),
+                course_title=F("assignment__course__title"),
+            )[:self.recent_grades]
+        )
+
+
+class TeacherDashboardView(APIView):
+    """
+    GET /api/dashboard/teacher/
+    Grading queue across every course the teacher instructs: ungraded
+    submissions per assignment (and how many of them came in late), plus late
+    submissions per course. Two grouped aggregates; the ungraded one is served
+    by the partial ``submission_ungraded_idx`` index.
+    """
+    permission_classes = [IsAuthenticated, HasDeveloper, IsUserUnderDeveloper]
+
+    def get(self, request):
+        teacher = getattr(request.user, "teacher", None)
+        if teacher is None:
+            raise PermissionDenied("Only teachers have a grading queue.")
+        # the teacher already scopes the workspace; an extra developer filter
+        # would steer the planner away from the partial index
+        mine = Submission.objects.filter(assignment__course__instructor=teacher)
+        late = Q(submitted_at__gt=F("assignment__due_date"))
+
+        queue = list(
+            mine.filter(grade__isnull=True)
+            .values(
+                "assignment_id", "assignment__title", "assignment__due_date",
+                "assignment__course_id", "assignment__course__title",
+            )
+            .annotate(ungraded=Count("pk"), late=Count("pk", filter=late),
+                      oldest=Min("submitted_at"), newest=Max("submitted_at"))
+            .order_by("assignment__due_date", "assignment_id")
+        )
+        late_by_course = {
+            row["assignment__course_id"]: row
+            for row in mine.filter(late)
+            .values("assignment__course_id", "assignment__course__title")
+            .annotate(late=Count("pk"), late_ungraded=Count("pk", filter=Q(grade__isnull=True)))
+            .order_by()
+        }
+        return Response({
+            "ungraded": sum(row["ungraded"] for row in queue),
+            "late": sum(row["late"] for row in late_by_course.values()),
+            "assignments": [
+                {
+                    "id": row["assignment_id"], "title": row["assignment__title"],
+                    "due_date": row["assignment__due_date"], "course": row["assignment__course_id"],
+                    "course_title": row["assignment__course__title"], "ungraded": row["ungraded"],
+                    "late_ungraded": row["late"], "oldest_ungraded": row["oldest"], "newest_ungraded": row["newest"],
+                }
+                for row in queue
+            ],
+            "late_by_course": [
+                {
+                    "course": course_id, "course_title": row["assignment__course__title"],
+                    "late": row["late"], "late_ungraded": row["late_ungraded"],
+                }
+                for course_id, row in sorted(late_by_course.items())
+            ],
+        })
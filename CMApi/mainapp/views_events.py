@@ -0,0 +1,81 @@
+# mainapp/views_events.py
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from .events import get_bus, user_topic, format_sse
+from .permissions import IsUserUnderDeveloper
+
+KEEPALIVE_SECONDS = 15
+
+
+def _authenticate(request):
+    """
+    Session or JWT, like the DRF views. EventSource cannot set headers, so the
+    access token may also come as ?access_token=.
+    """
+    if request.user.is_authenticated:
+        return request.user
+    jwt = JWTAuthentication()
+    try:
+        raw = request.GET.get("access_token")
+        if raw:
+            return jwt.get_user(jwt.get_validated_token(raw.encode()))
+        result = jwt.authenticate(request)
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None
+    return result[0] if result else None
+
+
+def _resolve_actor(request):
+    user = _authenticate(request)
+    if user is None:
+        return None, JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+    request.user = user
+    if not getattr(request, "developer", None):
+        return None, JsonResponse({"detail": "Valid API key required (missing/expired)."}, status=403)
+    if not IsUserUnderDeveloper().has_permission(request, None):
+        return None, JsonResponse({"detail": IsUserUnderDeveloper.message}, status=403)
+    return user, None
+
+
+async def event_stream(request):
+    """
+    GET /api/events/  (text/event-stream)
+    Pushes "grade" events when a submission's grade changes and "progress"
+    events when a lesson completion flips, for submissions/progress of the
+    actor (students) or of the actor's courses (teachers).
+    Serve with an ASGI server (uvicorn CMApi.asgi:application); the open
+    connection waits on the event loop, not on a worker thread.
+    """
+    if request.method != "GET":
+        return JsonResponse({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+    user, error = await sync_to_async(_resolve_actor)(request)
+    if error is not None:
+        return error
+    topic = user_topic(request.developer.pk, user.pk)
+
+    async def stream():
+        bus = get_bus()
+        subscription = bus.subscribe([topic])
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # comment line: keeps proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event)
+        finally:
+            bus.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,43 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+
+from .permissions import HasDeveloper, IsUserUnderDeveloper
+from .search import search, DOCUMENTS
+from .visibility import visible_courses
+
+
+class SearchView(APIView):
+    """
+    GET /api/search/?q=<text>&type=lesson,course&limit=20
+    Ranked search over course, lesson and material text inside the caller's
+    workspace, limited to the courses the actor can see.
+    """
+    permission_classes = [IsAuthenticated, HasDeveloper, IsUserUnderDeveloper]
+    max_limit = 100
+
+    def get(self, request):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            return Response({"detail": "q is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = max(1, min(int(request.query_params.get("limit", 20)), self.max_limit))
+        except ValueError:
+            return Response({"detail": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        kinds = None
+        if request.query_params.get("type"):
+            kinds = [k.strip() for k in request.query_params["type"].split(",") if k.strip()]
+            unknown = set(kinds) - set(DOCUMENTS)
+            if unknown:
+                return Response({"detail": f"unknown type: {', '.join(sorted(unknown))}"},
+                                status=status.HTTP_400_BAD_REQUEST)
+        # guests browse the catalog only, not course content
+        if hasattr(request.user, "guest") and not request.user.is_superuser:
+            kinds = ["course"]
+
+        results = search(request.developer, query, courses=visible_courses(request),
+                         kinds=kinds, limit=limit)
+        return Response({"query": query, "count": len(results), "results": results})
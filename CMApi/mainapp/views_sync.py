@@ -0,0 +1,41 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+
+from .changefeed import changes_since, latest_seq, ResyncRequired
+from .permissions import HasDeveloper, IsUserUnderDeveloper
+
+
+class ChangeFeedView(APIView):
+    """
+    GET /api/changes/                      -> {"cursor": "<current>"}; do a full fetch, then
+    GET /api/changes/?since=<cursor>       -> changes after the cursor, oldest first
+    Keep calling with the returned cursor while has_more is true.
+    410 Gone means the cursor was compacted away: refetch everything and
+    continue from the cursor in the response.
+    """
+    permission_classes = [IsAuthenticated, HasDeveloper, IsUserUnderDeveloper]
+    default_limit = 500
+    max_limit = 1000
+
+    def get(self, request):
+        developer = request.developer
+        since = request.query_params.get("since")
+        if since is None:
+            return Response({"cursor": str(latest_seq(developer)), "has_more": False, "changes": []})
+
+        try:
+            since = int(since)
+            limit = max(1, min(int(request.query_params.get("limit", self.default_limit)), self.max_limit))
+        except ValueError:
+            return Response({"detail": "since and limit must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            return Response(changes_since(request, since, limit=limit))
+        except ResyncRequired:
+            return Response(
+                {"detail": "Cursor is too old, a full resync is required.", "reset": True,
+                 "cursor": str(latest_seq(developer))},
+                status=status.HTTP_410_GONE,
+            )
@@ -0,0 +1,53 @@
+# mainapp/views_transfer.py
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from accounts.sharding import iter_on_current_shard
+from . import tenant_io
+from .permissions import HasDeveloper
+
+
+def _check_owner(request):
+    # a whole workspace moves: only its developer account (or a superuser)
+    if not (request.user.is_superuser or request.user.pk == request.developer.pk):
+        raise PermissionDenied("Only the workspace's developer account can export or import it.")
+
+
+class WorkspaceExportView(APIView):
+    """
+    GET /api/workspace/export/ -> the workspace as NDJSON, streamed (see mainapp/tenant_io.py).
+    """
+    permission_classes = [IsAuthenticated, HasDeveloper]
+
+    def get(self, request):
+        _check_owner(request)
+        response = StreamingHttpResponse(
+            iter_on_current_shard(tenant_io.iter_export(request.developer)),
+            content_type="application/x-ndjson",
+        )
+        stamp = timezone.now().strftime("%Y%m%d-%H%M%S")
+        response["Content-Disposition"] = f'attachment; filename="workspace-{request.developer.pk}-{stamp}.ndjson"'
+        return response
+
+
+class WorkspaceImportView(APIView):
+    """
+    POST /api/workspace/import/?username_suffix=-copy
+    Body: an export, Content-Type application/x-ndjson, read line by line.
+    All or nothing; 201 with {section: rows imported}.
+    """
+    permission_classes = [IsAuthenticated, HasDeveloper]
+
+    def post(self, request):
+        _check_owner(request)
+        # the raw request body, iterated by line: nothing is parsed up front
+        counts = tenant_io.import_stream(
+            request.developer, request.stream or [],
+            username_suffix=request.query_params.get("username_suffix", ""),
+        )
+        return Response({"imported": counts}, status=status.HTTP_201_CREATED)
@@ -0,0 +1,99 @@
+# mainapp/views_uploads.py
+from django.conf import settings
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from . import uploads
+from .models import UploadSession
+from .permissions import HasDeveloper, IsUserUnderDeveloper
+from .serializers import CourseMaterialSerializer, UploadSessionSerializer
+
+CHUNK_CONTENT_TYPE = "application/offset+octet-stream"
+
+
+def _upload_headers(offset, size):
+    return {"Upload-Offset": str(offset), "Upload-Length": str(size), "Cache-Control": "no-store"}
+
+
+class UploadSessionViewSet(mixins.RetrieveModelMixin, mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """
+    Resumable course-material uploads:
+
+    POST   /api/uploads/                {"course", "title", "filename", "size", "checksum"?}  -> 201 + Location
+    HEAD   /api/uploads/{id}/           Upload-Offset: bytes received so far
+    PATCH  /api/uploads/{id}/           Content-Type: application/offset+octet-stream,
+                                        Upload-Offset: <offset>, body = next chunk      -> 204
+    POST   /api/uploads/{id}/finalize/  {"checksum": "<sha256 hex>"}                    -> 201 CourseMaterial
+    DELETE /api/uploads/{id}/           abort
+
+    A PATCH whose Upload-Offset is not the current offset gets 409 with the
+    right offset in the Upload-Offset header. Course instructor or superuser.
+    """
+    queryset = UploadSession.objects.all()
+    serializer_class = UploadSessionSerializer
+    permission_classes = [IsAuthenticated, HasDeveloper, IsUserUnderDeveloper]
+
+    def get_queryset(self):
+        sessions = UploadSession.objects.filter(developer=self.request.developer)
+        if self.request.user.is_superuser:
+            return sessions
+        return sessions.filter(created_by=self.request.user)
+
+    def create(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        course = serializer.validated_data["course"]
+        if course.developer_id != request.developer.id:
+            raise ValidationError({"course": "Course is not in this workspace."})
+        teacher = getattr(request.user, "teacher", None)
+        if not request.user.is_superuser and (teacher is None or course.instructor_id != teacher.id):
+            raise PermissionDenied("Only the course instructor can upload materials.")
+        data = serializer.validated_data
+        session = uploads.create_session(
+            request.developer, request.user, course, data["title"], data["filename"], data["size"],
+            data.get("checksum", ""),
+        )
+        headers = _upload_headers(session.offset, session.size)
+        headers["Location"] = request.build_absolute_uri(f"{request.path.rstrip('/')}/{session.pk}/")
+        return Response(self.get_serializer(session).data, status=status.HTTP_201_CREATED, headers=headers)
+
+    def retrieve(self, request, pk=None):
+        session = self.get_object()
+        return Response(self.get_serializer(session).data, headers=_upload_headers(session.offset, session.size))
+
+    def partial_update(self, request, pk=None):
+        session = self.get_object()
+        if request.content_type.split(";")[0].strip() != CHUNK_CONTENT_TYPE:
+            return Response({"detail": f"Content-Type must be {CHUNK_CONTENT_TYPE}."},
+                            status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+        try:
+            offset = int(request.headers["Upload-Offset"])
+            length = int(request.META.get("CONTENT_LENGTH") or 0)
+        except (KeyError, ValueError):
+            raise ValidationError({"detail": "Upload-Offset and Content-Length headers are required."})
+        if length > getattr(settings, "UPLOAD_CHUNK_MAX_BYTES", length):
+            return Response({"detail": f"Chunks are limited to {settings.UPLOAD_CHUNK_MAX_BYTES} bytes."},
+                            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        try:
+            # request.stream is the raw body: nothing has been parsed or spooled
+            new_offset = uploads.write_chunk(session, offset, request.stream, length)
+        except uploads.OffsetMismatch as mismatch:
+            return Response({"detail": "Upload-Offset does not match."}, status=status.HTTP_409_CONFLICT,
+                            headers=_upload_headers(mismatch.offset, session.size))
+        return Response(status=status.HTTP_204_NO_CONTENT, headers=_upload_headers(new_offset, session.size))
+
+    @action(detail=True, methods=["post"])
+    def finalize(self, request, pk=None):
+        try:
+            material = uploads.finalize(self.get_object(), request.data.get("checksum", ""))
+        except uploads.FinalizeInProgress:
+            return Response({"detail": "The upload is being written or finalized by another request."},
+                            status=status.HTTP_409_CONFLICT)
+        return Response(CourseMaterialSerializer(material, context={"request": request}).data,
+                        status=status.HTTP_201_CREATED)
+
+    def perform_destroy(self, instance):
+        uploads.discard(instance)
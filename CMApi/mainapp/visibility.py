@@ -0,0 +1,22 @@
+# mainapp/visibility.py
+from .models import Course
+
+
+def visible_courses(request):
+    """
+    Courses the requesting actor may see inside request.developer:
+    admins everything, teachers the courses they teach, students the courses
+    they are enrolled in, guests the active catalog.
+    """
+    developer = getattr(request, "developer", None)
+    user = request.user
+    courses = Course.objects.filter(developer=developer)
+    if user.is_superuser or getattr(user, "role", None) == "admin":
+        return courses
+    if hasattr(user, "teacher"):
+        return courses.filter(instructor=user.teacher)
+    if hasattr(user, "student"):
+        return courses.filter(students=user.student)
+    if hasattr(user, "guest"):
+        return courses.filter(is_active=True)
+    return courses.none()